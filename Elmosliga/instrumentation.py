@@ -0,0 +1,156 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+# Timings collecting for the request being served: the sampled request's
+# and the metrics middleware's, whichever are active
+_current = ContextVar("request_timings", default=())
+
+
+# Outermost timings of the requests in flight while tracemalloc runs. Its
+# peak is per process, so it is only reported for a request that ran alone.
+_memory_lock = threading.Lock()
+_traced_requests = set()
+
+
+class RequestTimings:
+    """What one sampled request spent its time on, in seconds"""
+
+    def __init__(self, request=None):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self._serializing = 0
+        # Peak traced memory above the starting level, only while tracemalloc
+        # runs and no other request overlapped this one
+        self.peak_memory = None
+        # Nested timings of one request (e.g. the metrics middleware's around
+        # the sampled one) share the outermost's memory tracking
+        self._request = request or self
+        self._memory_base = None
+        self._overlapped = False
+        if request is None and tracemalloc.is_tracing():
+            with _memory_lock:
+                if _traced_requests:
+                    for other in _traced_requests:
+                        other._overlapped = True
+                    self._overlapped = True
+                else:
+                    tracemalloc.reset_peak()
+                _traced_requests.add(self)
+                self._memory_base = tracemalloc.get_traced_memory()[0]
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+        request = self._request
+        if request._memory_base is None:
+            return
+        if tracemalloc.is_tracing() and not request._overlapped:
+            self.peak_memory = max(tracemalloc.get_traced_memory()[1] - request._memory_base, 0)
+        if request is self:
+            with _memory_lock:
+                _traced_requests.discard(self)
+
+    def server_timing(self):
+        """Server-Timing header value; durations in milliseconds"""
+        metrics = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f"serialize;dur={self.serialize * 1000:.1f}",
+            f"view;dur={self.total * 1000:.1f}",
+        ]
+        if self.peak_memory is not None:
+            metrics.append(f'mem;desc="peak {self.peak_memory / 1024:.1f} KiB"')
+        return ", ".join(metrics)
+
+    def as_dict(self):
+        fields = {
+            "queries": self.queries,
+            "db_ms": round(self.db * 1000, 1),
+            "serialize_ms": round(self.serialize * 1000, 1),
+            "view_ms": round(self.total * 1000, 1),
+        }
+        if self.peak_memory is not None:
+            fields["peak_kb"] = round(self.peak_memory / 1024, 1)
+        return fields
+
+
+@contextmanager
+def measuring():
+    """Collect RequestTimings for the block, including its sync_to_async calls"""
+    active = _current.get()
+    timings = RequestTimings(active[0] if active else None)
+    token = _current.set((*active, timings))
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        timings.finish()
+
+
+def _record_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection; only measures inside measuring()"""
+    active = _current.get()
+    if not active:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for timings in active:
+            timings.db += elapsed
+            timings.queries += 1
+
+
+def wrap_all_connections(wrapper, dispatch_uid):
+    """
+    Add an execute wrapper to every database connection, once.
+
+    Connections are per thread, so the wrapper is added to each connection
+    as it is opened (and to those already open) rather than around a block:
+    queries from sync_to_async threads and background work go through it too.
+    """
+    def add(sender=None, connection=None, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(add, dispatch_uid=dispatch_uid, weak=False)
+    for connection in connections.all(initialized_only=True):
+        add(connection=connection)
+
+
+_serializer_data = BaseSerializer.data
+
+
+def _timed_data(serializer):
+    active = _current.get()
+    if not active:
+        return _serializer_data.fget(serializer)
+
+    # Nested serializers build their output inside the outermost one
+    for timings in active:
+        timings._serializing += 1
+    started = time.perf_counter()
+    try:
+        return _serializer_data.fget(serializer)
+    finally:
+        elapsed = time.perf_counter() - started
+        for timings in active:
+            timings._serializing -= 1
+            if not timings._serializing:
+                timings.serialize += elapsed
+
+
+def instrument():
+    """Hook query and serializer timing in; idempotent"""
+    wrap_all_connections(_record_query, "request-timing")
+    BaseSerializer.data = property(_timed_data)
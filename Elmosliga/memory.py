@@ -0,0 +1,113 @@
+"""
+tracemalloc control for one worker process.
+
+Snapshots keep only allocation totals per source line in the project's
+apps, attributed to the innermost League or accounts frame of each
+allocation, so library allocations made on their behalf (e.g. by the ORM
+for a queryset a view lists) count against the view's line.
+"""
+import os
+import tracemalloc
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+# Frames recorded per allocation; deep enough to get from the ORM back to a view
+TRACE_FRAMES = 25
+
+PROJECT_APPS = ("League", "accounts")
+
+# Snapshots kept per process; the oldest is dropped first
+MAX_SNAPSHOTS = 10
+
+# name -> {"taken_at", "sizes": Counter, "counts": Counter}
+_snapshots = {}
+
+
+class TracingError(Exception):
+    """A tracing action that needs tracing on, or a snapshot that is missing"""
+
+
+def start(frames=TRACE_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop():
+    tracemalloc.stop()
+    _snapshots.clear()
+
+
+def status():
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "pid": os.getpid(),
+        "tracing": tracemalloc.is_tracing(),
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "snapshots": list(_snapshots),
+    }
+
+
+def _app_roots():
+    return tuple(os.path.join(str(settings.BASE_DIR), app) + os.sep for app in PROJECT_APPS)
+
+
+def _site(traceback, roots):
+    """``file:line`` of the innermost project frame, or None"""
+    root = str(settings.BASE_DIR)
+    for frame in reversed(traceback):
+        if frame.filename.startswith(roots):
+            return f"{os.path.relpath(frame.filename, root)}:{frame.lineno}"
+    return None
+
+
+def snapshot(name=None):
+    """Take and keep a snapshot; returns its name"""
+    if not tracemalloc.is_tracing():
+        raise TracingError("Tracing is not started.")
+    taken = tracemalloc.take_snapshot()
+    roots = _app_roots()
+    sizes, counts = Counter(), Counter()
+    for trace in taken.traces:
+        site = _site(trace.traceback, roots)
+        if site is not None:
+            sizes[site] += trace.size
+            counts[site] += 1
+
+    name = name or f"snapshot-{len(_snapshots) + 1}"
+    _snapshots.pop(name, None)
+    while len(_snapshots) >= MAX_SNAPSHOTS:
+        _snapshots.pop(next(iter(_snapshots)))
+    _snapshots[name] = {"taken_at": timezone.now(), "sizes": sizes, "counts": counts}
+    return name
+
+
+def compare(first, second, limit=20):
+    """
+    The allocation sites that grew (or shrank) most from snapshot ``first``
+    to ``second``.
+
+    Returns:
+        list: dicts with ``site``, ``size_kb``, ``size_diff_kb``, ``count``
+        and ``count_diff``, largest absolute size change first
+    """
+    try:
+        before, after = _snapshots[first], _snapshots[second]
+    except KeyError as exc:
+        raise TracingError(f"No snapshot named {exc.args[0]!r}.") from None
+
+    sites = set(before["sizes"]) | set(after["sizes"])
+    rows = [
+        {
+            "site": site,
+            "size_kb": round(after["sizes"][site] / 1024, 1),
+            "size_diff_kb": round((after["sizes"][site] - before["sizes"][site]) / 1024, 1),
+            "count": after["counts"][site],
+            "count_diff": after["counts"][site] - before["counts"][site],
+        }
+        for site in sites
+    ]
+    rows.sort(key=lambda row: abs(row["size_diff_kb"]), reverse=True)
+    return rows[:limit]
@@ -0,0 +1,93 @@
+"""
+Prometheus metrics.
+
+With several worker processes set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by them (wiped on every restart): each worker then writes
+its values to memory-mapped files there, and the metrics endpoint adds them
+up across workers.
+"""
+import atexit
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+)
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUESTS = Counter(
+    "elmosliga_http_requests_total",
+    "Requests served, by route, method and status",
+    ["route", "method", "status"],
+)
+LATENCY = Histogram(
+    "elmosliga_http_request_duration_seconds",
+    "Time spent serving a request",
+    ["route", "method"],
+)
+QUERIES = Histogram(
+    "elmosliga_http_request_queries",
+    "Database queries run by a request",
+    ["route"],
+    buckets=QUERY_BUCKETS,
+)
+ERRORS = Counter(
+    "elmosliga_http_errors_total",
+    "Requests answered with a server error",
+    ["route", "method", "status"],
+)
+
+SCORING_DURATION = Histogram(
+    "elmosliga_scoring_duration_seconds",
+    "Time spent rescoring a league",
+)
+PREDICTIONS_RESCORED = Counter(
+    "elmosliga_predictions_rescored_total",
+    "Predictions whose points were recalculated",
+)
+EMAIL_QUEUE_DEPTH = Gauge(
+    "elmosliga_email_queue_depth",
+    "Emails handed to a sender thread and not yet sent",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "elmosliga_cache_requests_total",
+    "Lookups of cached values, by cache and hit or miss",
+    ["cache", "result"],
+)
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def registry(path=None):
+    """
+    The registry to expose: every worker's values from the multiprocess
+    directory (``path`` or PROMETHEUS_MULTIPROC_DIR) when set, otherwise
+    this process's own.
+    """
+    path = path or multiprocess_dir()
+    if not path:
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected, path=path)
+    return collected
+
+
+def cache_lookup(cache, value):
+    """Count a lookup in ``cache`` as a hit unless ``value`` is None; returns it"""
+    CACHE_REQUESTS.labels(cache, "miss" if value is None else "hit").inc()
+    return value
+
+
+@atexit.register
+def _worker_exit():
+    # Live gauges stop counting an exited worker's values
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(os.getpid())
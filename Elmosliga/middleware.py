@@ -0,0 +1,298 @@
+import cProfile
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+from Elmosliga import metrics, profiling
+from Elmosliga.instrumentation import instrument, measuring
+from Elmosliga.routers import pick_replica, reading_from
+from Elmosliga.slow_queries import serving
+from League.authentication import acredential_user_id, credential_user_id
+
+timing_logger = logging.getLogger("Elmosliga.timing")
+
+# Set after a write by a session client (the admin, the browsable API);
+# while present the client reads its own writes from the primary
+PRIMARY_PIN_COOKIE = "db_primary_pin"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def primary_pin_key(user_id):
+    """Cache key pinning an API user to the primary after a write"""
+    return f"db_primary_pin:{user_id}"
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve read-only endpoints from a replica.
+
+    A safe request to a view whose class sets ``read_from_replica`` reads
+    from one replica for the whole request. Any other request uses the
+    primary and, if it could have written, pins the client to the primary
+    for REPLICA_STICKY_SECONDS, so e.g. a prediction is read back right
+    after it was submitted.
+
+    API clients (token or JWT, typically the cross-origin SPA, which never
+    gets our cookies back) are pinned by user id in the cache, which every
+    worker shares (settings require CACHE_URL with replicas); session
+    clients by a cookie.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replica = None
+        if self.routable(request) and not self.pinned(credential_user_id(request)):
+            replica = pick_replica()
+        with reading_from(replica):
+            response = self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        replica = None
+        if self.routable(request) and not self.pinned(await acredential_user_id(request)):
+            replica = pick_replica()
+        with reading_from(replica):
+            response = await self.get_response(request)
+        self.pin(request, response)
+        return response
+
+    @staticmethod
+    def routable(request):
+        """Whether a request may read from a replica, short of a user pin"""
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return False
+        if PRIMARY_PIN_COOKIE in request.COOKIES:
+            return False
+        try:
+            view = resolve(request.path_info).func
+        except Resolver404:
+            return False
+        view_class = getattr(view, "view_class", None)
+        return getattr(view_class, "read_from_replica", False)
+
+    @staticmethod
+    def pinned(user_id):
+        return user_id is not None and cache.get(primary_pin_key(user_id)) is not None
+
+    @staticmethod
+    def pin(request, response):
+        if not settings.DATABASE_REPLICAS or request.method in SAFE_METHODS:
+            return
+        # Set by DRF (or the session middleware) once the view authenticated
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(primary_pin_key(user.pk), 1, settings.REPLICA_STICKY_SECONDS)
+        if "Authorization" not in request.headers:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+
+class RequestTimingMiddleware:
+    """
+    Time a sample of requests: query count and database time (through an
+    ``execute_wrapper`` on every connection), serializer time and total
+    view time. They are sent as a ``Server-Timing`` header and logged as
+    one line on the ``Elmosliga.timing`` logger.
+
+    Disabled unless REQUEST_TIMING is on, in which case Django drops the
+    middleware at startup; unsampled requests only pay for one random().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        instrument()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with measuring() as timings:
+            response = self.get_response(request)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with measuring() as timings:
+            response = await self.get_response(request)
+        return self.report(request, response, timings)
+
+    @staticmethod
+    def sampled():
+        return random.random() < settings.REQUEST_TIMING_SAMPLE_RATE
+
+    @staticmethod
+    def report(request, response, timings):
+        response["Server-Timing"] = timings.server_timing()
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **timings.as_dict(),
+        }
+        timing_logger.info(
+            " ".join(f"{key}={value}" for key, value in fields.items()),
+            extra={"timing": fields},
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Attribute slow queries to the view serving the request. The query
+    logging itself is installed at startup, so management commands and
+    other background work are logged too; this middleware only names the
+    caller, and Django drops it when SLOW_QUERY_MS is 0.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with serving(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with serving(request):
+            return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Count every request for the Prometheus metrics: requests and server
+    errors by route, method and status, and latency and query count
+    histograms. Routes are URL patterns, not paths, to keep the number of
+    series bounded. Django drops the middleware unless METRICS_ENABLED.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        instrument()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with measuring() as timings:
+            response = self.get_response(request)
+        self.observe(request, response, timings, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with measuring() as timings:
+            response = await self.get_response(request)
+        self.observe(request, response, timings, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def observe(request, response, timings, duration):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "<unmatched>"
+        status = str(response.status_code)
+        metrics.REQUESTS.labels(route, request.method, status).inc()
+        metrics.LATENCY.labels(route, request.method).observe(duration)
+        metrics.QUERIES.labels(route).observe(timings.queries)
+        if response.status_code >= 500:
+            metrics.ERRORS.labels(route, request.method, status).inc()
+
+
+class ProfilingMiddleware:
+    """
+    Run a single request under cProfile when a staff user asks for it
+    with an ``X-Profile`` header or ``?profile`` parameter. The stats and a
+    collapsed-stack rendering are stored as a RequestProfile, listed in the
+    admin, and its id is returned in the ``X-Profile-Id`` header.
+
+    For async views only the event loop thread is profiled. Other requests
+    pay for one header lookup; Django drops the middleware unless
+    REQUEST_PROFILING is on.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = profiling.requested(request) and profiling.staff_user(request)
+        if not user:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.store(request, response, profiler, user, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        user = profiling.requested(request) and await sync_to_async(profiling.staff_user)(request)
+        if not user:
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+        return await sync_to_async(self.store)(request, response, profiler, user, duration)
+
+    @staticmethod
+    def store(request, response, profiler, user, duration):
+        record = profiling.save(request, response, profiler, user, duration)
+        response["X-Profile-Id"] = str(record.pk)
+        return response
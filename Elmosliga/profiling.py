@@ -0,0 +1,114 @@
+import marshal
+import os
+import sysconfig
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from League.authentication import authenticate
+
+# Header or query parameter a staff user sets to profile one request
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAM = "profile"
+
+# Deepest stack written to the collapsed output
+MAX_DEPTH = 64
+
+# Paths below this share of a microsecond are dropped from the collapsed output
+MIN_SECONDS = 1e-6
+
+
+def requested(request):
+    return PROFILE_HEADER in request.headers or PROFILE_PARAM in request.GET
+
+
+def staff_user(request):
+    """The staff user making ``request``, by session or API credentials, or None"""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            user, _ = authenticate(request)
+        except APIException:
+            return None
+    return user if user.is_staff else None
+
+
+def frame_label(func):
+    """pstats ``(file, line, name)`` as a short ``name (file:line)`` frame"""
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    if "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        for root in (str(settings.BASE_DIR), sysconfig.get_paths()["stdlib"]):
+            if filename.startswith(root):
+                filename = os.path.relpath(filename, root)
+                break
+    return f"{name} ({filename}:{lineno})"
+
+
+def collapsed_stacks(stats):
+    """
+    Approximate call stacks from pstats data, as collapsed
+    ``frame;frame;frame microseconds`` lines of self time.
+
+    cProfile records caller -> callee edges, not whole stacks, so time is
+    pushed down each edge in proportion to the callee's time spent under
+    that caller.
+    """
+    callees = defaultdict(list)
+    roots = []
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees[caller].append((func, edge_cumulative))
+
+    lines = Counter()
+
+    def walk(func, stack, share):
+        stack = (*stack, func)
+        own_time = stats[func][2] * share
+        if own_time >= MIN_SECONDS:
+            lines[";".join(frame_label(frame) for frame in stack)] += own_time
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge_cumulative in callees[func]:
+            callee_cumulative = stats[callee][3]
+            if callee in stack or not callee_cumulative:
+                continue
+            callee_share = share * edge_cumulative / callee_cumulative
+            if callee_share * callee_cumulative >= MIN_SECONDS:
+                walk(callee, stack, callee_share)
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return "".join(
+        f"{stack} {round(seconds * 1_000_000)}\n" for stack, seconds in lines.items()
+    )
+
+
+def save(request, response, profiler, user, duration):
+    """Store a finished profile with its request; returns the RequestProfile"""
+    from League.models import RequestProfile
+
+    profiler.create_stats()
+    record = RequestProfile(
+        user=user,
+        method=request.method,
+        path=request.get_full_path()[:2048],
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+    )
+    name = f"{timezone.now():%Y%m%d-%H%M%S}-{record.method.lower()}"
+    # The same format cProfile's dump_stats() writes
+    record.stats.save(f"{name}.prof", ContentFile(marshal.dumps(profiler.stats)), save=False)
+    record.collapsed.save(
+        f"{name}.collapsed", ContentFile(collapsed_stacks(profiler.stats)), save=False
+    )
+    record.save()
+    return record
@@ -0,0 +1,98 @@
+"""
+JSON renderer and parser for DRF on orjson, falling back to the stdlib.
+
+Output matches DRF's ``JSONRenderer``: anything orjson can't encode
+natively (Decimals, lazy translation strings, querysets, ...) goes through
+DRF's ``JSONEncoder.default``, datetimes in UTC end in ``Z`` and U+2028/9
+are escaped. Indented output, as the browsable API asks for, and values
+orjson rejects outright (e.g. integers over 64 bits) use the stdlib.
+
+The one difference is non-finite floats: orjson writes NaN and the
+infinities as ``null``, where DRF's strict renderer (and the stdlib
+fallback here) raises ValueError. Finding them first would mean walking
+every payload in Python, which costs more than the encoding saves.
+"""
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+# U+2028 and U+2029 in UTF-8, which JavaScript does not allow in strings
+_LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+def _stdlib_dumps(data):
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes for ``data``, as DRF's JSONRenderer writes them"""
+    if orjson is None:
+        content = _stdlib_dumps(data)
+    else:
+        try:
+            content = orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            content = _stdlib_dumps(data)
+    for raw, escaped in _LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` on ``dumps``"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` on orjson; request bodies must be UTF-8"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    JSON for views that can answer with parallel arrays instead of a list
+    of objects; clients ask for it with ``?format=columnar`` or its media
+    type in Accept. The view shapes the data, see
+    ``League.services.leaderboard.columnar``.
+    """
+    media_type = "application/vnd.elmosliga.columnar+json"
+    format = "columnar"
+
+
+def wants_columnar(request):
+    """Whether a plain Django request negotiates ColumnarJSONRenderer"""
+    return (
+        request.GET.get("format") == ColumnarJSONRenderer.format
+        or ColumnarJSONRenderer.media_type in request.headers.get("Accept", "")
+    )
@@ -0,0 +1,46 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Replica alias the current request reads from; None reads from the primary
+_replica = ContextVar("replica", default=None)
+
+
+def pick_replica():
+    """A random configured replica alias, or None when there are none"""
+    return random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else None
+
+
+@contextmanager
+def reading_from(alias):
+    """Route reads inside the block to ``alias`` (None for the primary)"""
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to a replica only inside
+    ``reading_from()``, which ReplicaRoutingMiddleware opens for the
+    read-only endpoints; everything else (writes, admin, commands, signal
+    handlers) reads from the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get() or "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so objects may relate across them
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db == "default"
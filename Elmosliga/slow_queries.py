@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import random
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from Elmosliga import instrumentation
+from Elmosliga.instrumentation import wrap_all_connections
+
+logger = logging.getLogger("Elmosliga.slow_queries")
+
+# Project frames kept in an entry's stack summary, innermost last
+STACK_FRAMES = 8
+
+# Only statements the backends can EXPLAIN without running them
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# Execute wrappers, left out of stack summaries
+WRAPPER_FILES = (__file__, instrumentation.__file__)
+
+# The request being served, for the calling view of a slow query
+_request = ContextVar("slow_query_request", default=None)
+
+# Set while a plan is captured, so the EXPLAIN is not itself logged
+_explaining = ContextVar("slow_query_explaining", default=False)
+
+
+@contextmanager
+def serving(request):
+    """Attribute slow queries in the block, and its sync_to_async calls, to ``request``"""
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def _log_slow_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection; logs queries over SLOW_QUERY_MS"""
+    threshold = settings.SLOW_QUERY_MS
+    if not threshold or _explaining.get():
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - started) * 1000
+    if duration >= threshold:
+        _report(context["connection"], sql, params, many, duration)
+    return result
+
+
+def _report(connection, sql, params, many, duration):
+    request = _request.get()
+    match = getattr(request, "resolver_match", None)
+    entry = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "duration_ms": round(duration, 1),
+        "database": connection.alias,
+        "sql": sql,
+        # executemany parameters may be a generator that is already spent
+        "params": None if many else params,
+        "many": many,
+        "view": (match.view_name or match.route) if match else None,
+        "path": request.path if request else None,
+        "stack": _stack_summary(),
+        "plan": None,
+    }
+    if not many and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+        entry["plan"] = explain(connection, sql, params)
+    logger.warning(
+        "slow query %.1fms on %s: %s",
+        duration,
+        connection.alias,
+        sql[:200],
+        extra={"slow_query": entry},
+    )
+
+
+def _stack_summary():
+    """The innermost project frames that led to the query"""
+    root = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(root)
+        and "site-packages" not in frame.filename
+        and frame.filename not in WRAPPER_FILES
+    ]
+    return [
+        f"{os.path.relpath(frame.filename, root)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-STACK_FRAMES:]
+    ]
+
+
+def explain(connection, sql, params):
+    """
+    The query plan as a list of lines, without running the query:
+    ``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` elsewhere. None if the
+    statement can't be explained.
+    """
+    if sql.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    token = _explaining.set(True)
+    try:
+        # A failed EXPLAIN must not abort the transaction the query ran in
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    except DatabaseError as exc:
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        _explaining.reset(token)
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """One slow query entry per line"""
+
+    def format(self, record):
+        return json.dumps(record.slow_query, default=str)
+
+
+def log_to_file(path):
+    """Write entries to a rotating JSON-lines file at ``path``; None stops writing"""
+    for handler in logger.handlers[:]:
+        if isinstance(handler.formatter, JSONLinesFormatter):
+            logger.removeHandler(handler)
+            handler.close()
+    if path:
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+            delay=True,
+        )
+        handler.setFormatter(JSONLinesFormatter())
+        logger.addHandler(handler)
+
+
+def install():
+    """Log slow queries from every connection to SLOW_QUERY_LOG_FILE"""
+    log_to_file(settings.SLOW_QUERY_LOG_FILE)
+    wrap_all_connections(_log_slow_query, "slow-query-log")
+
+
+def read_entries(path):
+    """Entries from the log at ``path`` and its rotated backups, oldest first"""
+    paths = [f"{path}.{n}" for n in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1)]
+    for name in [*paths, path]:
+        if not os.path.exists(name):
+            continue
+        with open(name) as log:
+            for line in log:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def normalize(sql):
+    """Collapse whitespace and IN lists so one query shape groups together"""
+    sql = " ".join(sql.split())
+    return re.sub(r"\((?:%s, )*%s\)", "(...)", sql)
+
+
+def top_offenders(entries, sort="total", limit=10):
+    """
+    Group entries by query shape, slowest ``sort`` ("total", "max" or
+    "count") first, each with its timings, the views issuing it and the
+    latest captured plan.
+    """
+    groups = {}
+    for entry in entries:
+        sql = normalize(entry["sql"])
+        group = groups.setdefault(sql, {
+            "sql": sql,
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "views": Counter(),
+            "stack": entry["stack"],
+            "plan": None,
+        })
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+        if entry["duration_ms"] >= group["max_ms"]:
+            group["max_ms"] = entry["duration_ms"]
+            group["stack"] = entry["stack"]
+        if entry["view"]:
+            group["views"][entry["view"]] += 1
+        if entry["plan"]:
+            group["plan"] = entry["plan"]
+
+    key = {"total": "total_ms", "max": "max_ms", "count": "count"}[sort]
+    ranked = sorted(groups.values(), key=lambda group: group[key], reverse=True)
+    for group in ranked:
+        group["mean_ms"] = group["total_ms"] / group["count"]
+    return ranked[:limit]
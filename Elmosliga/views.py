@@ -0,0 +1,85 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from Elmosliga import memory
+from Elmosliga.metrics import registry
+
+
+def metrics(request):
+    """
+    Prometheus text exposition of the metrics, summed over every worker.
+
+    Only served when METRICS_ENABLED is on, and the scraper must send
+    METRICS_TOKEN as a bearer token; without a token it is only served
+    under DEBUG.
+    """
+    if not settings.METRICS_ENABLED or not (settings.METRICS_TOKEN or settings.DEBUG):
+        raise Http404
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            response = HttpResponse(status=401)
+            response["WWW-Authenticate"] = "Bearer"
+            return response
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+class MemoryTraceView(APIView):
+    """
+    Staff-only tracemalloc control for the worker serving the request.
+
+    GET reports the tracing status. POST runs one ``action``: ``start``,
+    ``stop``, ``snapshot`` (optional ``name``) or ``compare`` (snapshot
+    names ``first`` and ``second``, optional ``limit``).
+
+    Every worker traces on its own and answers with its ``pid``. With
+    several workers, send the pid ``start`` reported with later actions:
+    one that lands on another worker is refused with a 409 and can be
+    retried. ``manage.py trace_memory`` needs no live workers at all.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(memory.status())
+
+    def post(self, request, *args, **kwargs):
+        pid = request.data.get("pid")
+        if pid is not None and str(pid) != str(os.getpid()):
+            return Response(
+                {"error": f"Served by worker {os.getpid()}, not {pid}; retry.", "pid": os.getpid()},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        action = request.data.get("action")
+        try:
+            if action == "start":
+                memory.start()
+            elif action == "stop":
+                memory.stop()
+            elif action == "snapshot":
+                memory.snapshot(request.data.get("name"))
+            elif action == "compare":
+                limit = int(request.data.get("limit", 20))
+                sites = memory.compare(
+                    request.data.get("first"), request.data.get("second"), limit
+                )
+                return Response({"pid": memory.status()["pid"], "sites": sites})
+            else:
+                return Response(
+                    {"error": "action must be one of start, stop, snapshot or compare."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        except memory.TracingError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(memory.status())
@@ -1,7 +1,92 @@
 from django.contrib import admin
-from League.models import League, Team, Prediction, LeagueResult
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from League.models import (
+    League,
+    Team,
+    Prediction,
+    LeagueResult,
+    PositionPoints,
+    Standing,
+    ProbabilitySet,
+    RequestProfile,
+)
 
-admin.site.register(League)
+
+class ExtraPositionInline(admin.TabularInline):
+    """Positions beyond sixth; 1st-6th are edited through the legacy columns"""
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(
+            position__gt=len(League.PLACE_POINTS_FIELDS)
+        )
+
+
+class PositionPointsInline(ExtraPositionInline):
+    model = PositionPoints
+
+
+class StandingInline(ExtraPositionInline):
+    model = Standing
+
+
+class LeagueAdmin(admin.ModelAdmin):
+    inlines = (PositionPointsInline, StandingInline)
+
+
+admin.site.register(League, LeagueAdmin)
 admin.site.register(Team)
 admin.site.register(Prediction)
 admin.site.register(LeagueResult)
+admin.site.register(ProbabilitySet)
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles recorded by Elmosliga.middleware.ProfilingMiddleware"""
+    list_display = ("created_at", "method", "path", "status_code", "duration_ms", "user", "downloads")
+    list_filter = ("method", "status_code")
+    search_fields = ("path", "user__email")
+    DOWNLOADS = ("stats", "collapsed")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/<str:kind>/",
+                self.admin_site.admin_view(self.download),
+                name="League_requestprofile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    def download(self, request, pk, kind):
+        """Serve a profile file through the admin, whatever serves MEDIA_ROOT"""
+        record = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, record):
+            raise PermissionDenied
+        if kind not in self.DOWNLOADS:
+            raise Http404
+        field = getattr(record, kind)
+        return FileResponse(
+            field.open("rb"), as_attachment=True, filename=field.name.rsplit("/", 1)[-1]
+        )
+
+    @admin.display(description="Download")
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">.prof</a> | <a href="{}">collapsed</a>',
+            reverse("admin:League_requestprofile_download", args=[obj.pk, "stats"]),
+            reverse("admin:League_requestprofile_download", args=[obj.pk, "collapsed"]),
+        )
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
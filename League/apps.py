@@ -1,8 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 class LeagueConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "League"
 
     def ready(self):
-        import League.signals
\ No newline at end of file
+        import League.signals
+
+        if settings.SLOW_QUERY_MS:
+            from Elmosliga.slow_queries import install
+            install()
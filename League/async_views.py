@@ -0,0 +1,134 @@
+"""
+Async counterparts of the read-heavy League views.
+
+They answer exactly like the DRF views in ``League.views`` but run on the
+event loop under ASGI, using the async ORM and ``aauthenticate``, so a
+slow query holds a coroutine instead of a sync thread. ``League.urls``
+serves them instead of the sync views when ``LEAGUE_ASYNC_VIEWS`` is on.
+"""
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+from .models import League, Team, Prediction
+from .serializers import LeagueSerializer, TeamSerializer, PredictionSerializer
+from Elmosliga.renderers import ColumnarJSONRenderer, dumps, wants_columnar
+from League.authentication import aauthenticate
+from League.services.leaderboard import (
+    aglobal_board,
+    aglobal_columns,
+    aleague_board,
+    aleague_columns,
+)
+
+
+class AsyncReadView(View):
+    """
+    Authenticate like ``IsAuthenticated``, then answer as JSON with what the
+    view's ``read(request, profile_id, *args, **kwargs)`` coroutine returns.
+    """
+    http_method_names = ["get"]
+    read_from_replica = True
+    # Views that implement read_columnar() also answer in the columnar format
+    columnar = False
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user, profile_id = await aauthenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            return self.unauthorized(request, exc.detail)
+        if not user.is_authenticated:
+            return self.unauthorized(request, exceptions.NotAuthenticated.default_detail)
+
+        if self.columnar and wants_columnar(request):
+            data = await self.read_columnar(request, *args, **kwargs)
+            return HttpResponse(dumps(data), content_type=ColumnarJSONRenderer.media_type)
+        data = await self.read(request, profile_id, *args, **kwargs)
+        return HttpResponse(dumps(data), content_type="application/json")
+
+    @staticmethod
+    def unauthorized(request, detail):
+        if not isinstance(detail, dict):
+            detail = {"detail": detail}
+        response = HttpResponse(
+            dumps(detail), content_type="application/json", status=status.HTTP_401_UNAUTHORIZED
+        )
+        # Same challenge DRF sends: the first configured authenticator's
+        response["WWW-Authenticate"] = api_settings.DEFAULT_AUTHENTICATION_CLASSES[
+            0
+        ]().authenticate_header(request)
+        return response
+
+
+class LeagueListView(AsyncReadView):
+    """List all active leagues with their teams"""
+
+    async def read(self, request, profile_id, *args, **kwargs):
+        leagues = League.objects.filter(is_active=True).prefetch_related("teams")
+        leagues = [league async for league in leagues.aiterator(chunk_size=100)]
+        return LeagueSerializer(leagues, many=True, context={"request": request}).data
+
+
+class TeamListView(AsyncReadView):
+    """List teams for a specific league"""
+
+    async def read(self, request, profile_id, league_id, *args, **kwargs):
+        teams = [team async for team in Team.objects.filter(league_id=league_id).aiterator()]
+        return TeamSerializer(teams, many=True, context={"request": request}).data
+
+
+class PredictionListView(AsyncReadView):
+    """List all predictions for the current user"""
+
+    async def read(self, request, profile_id, *args, **kwargs):
+        if profile_id is None:
+            return []
+        predictions = Prediction.objects.filter(profile_id=profile_id).select_related(
+            "league",
+            "predicted_team",
+        )
+        predictions = [prediction async for prediction in predictions.aiterator()]
+        return PredictionSerializer(predictions, many=True).data
+
+
+class CheckPredictionView(AsyncReadView):
+    """Check if user has already predicted for a league"""
+
+    async def read(self, request, profile_id, league_id, *args, **kwargs):
+        if profile_id is None:
+            return {"has_predicted": False}
+
+        prediction = await Prediction.objects.filter(
+            profile_id=profile_id,
+            league_id=league_id,
+            is_predicted=True,
+        ).select_related("league", "predicted_team").afirst()
+
+        if prediction:
+            return {
+                "has_predicted": True,
+                "prediction": PredictionSerializer(prediction).data,
+            }
+        return {"has_predicted": False}
+
+
+class LeaderboardView(AsyncReadView):
+    """Get leaderboard showing all users ranked by total points"""
+    columnar = True
+
+    async def read(self, request, profile_id, *args, **kwargs):
+        return await aglobal_board()
+
+    async def read_columnar(self, request, *args, **kwargs):
+        return await aglobal_columns()
+
+
+class LeagueLeaderboardView(AsyncReadView):
+    """Get leaderboard for a specific league"""
+    columnar = True
+
+    async def read(self, request, profile_id, league_id, *args, **kwargs):
+        return await aleague_board(league_id)
+
+    async def read_columnar(self, request, league_id, *args, **kwargs):
+        return await aleague_columns(league_id)
@@ -0,0 +1,160 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _profile_id(user):
+    profile = getattr(user, 'profile', None) if user.is_authenticated else None
+    return profile.pk if profile else None
+
+
+def _credentials(request):
+    """(keyword, credential) from the Authorization header, or (None, None)"""
+    parts = request.headers.get("Authorization", "").split()
+    return tuple(parts) if len(parts) == 2 else (None, None)
+
+
+def _jwt_user_id(credential):
+    try:
+        token = JWTAuthentication().get_validated_token(credential.encode())
+    except InvalidToken:
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def credential_user_id(request):
+    """
+    Id of the user a request's API credentials name, or None.
+
+    Cheaper than ``authenticate``: the user is not loaded, a JWT's claim is
+    read once its signature checks out and a token costs one key lookup.
+    """
+    keyword, credential = _credentials(request)
+    if keyword in jwt_settings.AUTH_HEADER_TYPES:
+        return _jwt_user_id(credential)
+    if keyword is not None and keyword.lower() == TokenAuthentication.keyword.lower():
+        tokens = TokenAuthentication().get_model().objects.filter(key=credential)
+        return tokens.values_list("user_id", flat=True).first()
+    return None
+
+
+async def acredential_user_id(request):
+    keyword, credential = _credentials(request)
+    if keyword in jwt_settings.AUTH_HEADER_TYPES:
+        return _jwt_user_id(credential)
+    if keyword is not None and keyword.lower() == TokenAuthentication.keyword.lower():
+        tokens = TokenAuthentication().get_model().objects.filter(key=credential)
+        return await tokens.values_list("user_id", flat=True).afirst()
+    return None
+
+
+def authenticate(request):
+    """Run the API's authenticators outside DRF; returns (user, profile id)"""
+    user = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    ).user
+    return user, _profile_id(user)
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with the user lookup on the async ORM"""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return await self.aget_user(self.get_validated_token(raw_token))
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = await (
+            self.user_model.objects.select_related("profile")
+            .filter(**{jwt_settings.USER_ID_FIELD: user_id})
+            .afirst()
+        )
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise exceptions.AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication with the key lookup on the async ORM"""
+
+    async def aauthenticate(self, request):
+        auth = request.headers.get("Authorization", "").split()
+        if not auth or auth[0].lower() != self.keyword.lower():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain spaces.")
+            )
+
+        token = await (
+            self.get_model().objects.select_related("user__profile")
+            .filter(key=auth[1])
+            .afirst()
+        )
+        if token is None:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return token.user
+
+
+ASYNC_AUTHENTICATORS = {
+    TokenAuthentication: AsyncTokenAuthentication,
+    JWTAuthentication: AsyncJWTAuthentication,
+}
+
+
+async def aauthenticate(request):
+    """
+    ``authenticate`` for async views, without a hop to the sync thread.
+
+    The configured authenticators run in order, each through its async
+    counterpart; an authenticator without one sends the whole request
+    through the sync path instead.
+
+    Returns:
+        tuple: (user, profile id)
+    """
+    authenticators = []
+    for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        async_auth = ASYNC_AUTHENTICATORS.get(auth)
+        if async_auth is None:
+            return await sync_to_async(authenticate)(request)
+        authenticators.append(async_auth())
+
+    for authenticator in authenticators:
+        user = await authenticator.aauthenticate(request)
+        if user is not None:
+            return user, _profile_id(user)
+    return AnonymousUser(), None
@@ -0,0 +1,91 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request latency with a new database connection per "
+        "request against the configured persistent or pooled connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per mode")
+        parser.add_argument(
+            "--path",
+            default=reverse("league-list"),
+            help="Endpoint to request (default: the league list)",
+        )
+        parser.add_argument("--email", help="User to authenticate as (default: first active user)")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1")
+
+        users = get_user_model().objects.filter(is_active=True).order_by("pk")
+        if options["email"]:
+            users = users.filter(email=options["email"])
+        user = users.first()
+        if user is None:
+            raise CommandError("No active user to authenticate as")
+        client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+
+        configured = connection.settings_dict["CONN_MAX_AGE"]
+        pooled = bool(connection.settings_dict.get("OPTIONS", {}).get("pool"))
+        label = "pooled" if pooled else f"CONN_MAX_AGE={configured}"
+        self.stdout.write(f"{connection.vendor} database, {options['requests']} requests to {options['path']}")
+
+        if pooled:
+            # A pool makes every close a check-in, so there is no unpooled run
+            # here; benchmark again without DB_POOL for the baseline
+            modes = [(label, 0)]
+        else:
+            modes = [("per-request", 0)]
+            if configured != 0:
+                modes.append((label, configured))
+        # The test client's host, which deployments do not list
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for mode, max_age in modes:
+                self._bench(mode, max_age, client, options)
+
+    def _bench(self, mode, max_age, client, options):
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        original = connection.settings_dict["CONN_MAX_AGE"]
+        connection.settings_dict["CONN_MAX_AGE"] = max_age
+        connection.close()
+        connection_created.connect(count)
+        latencies = []
+        try:
+            for _ in range(options["requests"]):
+                # What the request handler does around every request; the
+                # test client disconnects it, so it is called explicitly
+                started = time.perf_counter()
+                close_old_connections()
+                response = client.get(options["path"])
+                close_old_connections()
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f"{options['path']} answered {response.status_code}")
+        finally:
+            connection_created.disconnect(count)
+            connection.settings_dict["CONN_MAX_AGE"] = original
+
+        latencies.sort()
+        self.stdout.write(
+            f"{mode:>20}: mean {statistics.mean(latencies) * 1000:7.2f}ms  "
+            f"p50 {statistics.median(latencies) * 1000:7.2f}ms  "
+            f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:7.2f}ms  "
+            f"connections opened {len(opened)}"
+        )
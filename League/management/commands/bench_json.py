@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from Elmosliga import renderers
+from League.models import League
+from League.serializers import LeagueSerializer
+from League.services.leaderboard import global_board, global_columns
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare render time and size of DRF's stdlib JSONRenderer and the "
+        "orjson renderer on the leaderboard (rows and columnar) and league "
+        "catalog payloads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200, help="Renders per payload and renderer")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+        if renderers.orjson is None:
+            self.stdout.write(
+                self.style.WARNING("orjson is not installed; the fast renderer falls back to the stdlib")
+            )
+
+        request = RequestFactory().get("/")
+        leagues = League.objects.filter(is_active=True).prefetch_related("teams")
+        payloads = {
+            "LeaderboardView": global_board(),
+            "LeaderboardView ?format=columnar": global_columns(),
+            "LeagueListView": LeagueSerializer(
+                leagues, many=True, context={"request": request}
+            ).data,
+        }
+        for view, data in payloads.items():
+            rows = data["count"] if isinstance(data, dict) else len(data)
+            self.stdout.write(f"{view}: {rows} rows")
+            baseline = None
+            for renderer in (JSONRenderer(), renderers.FastJSONRenderer()):
+                seconds, size = self._bench(renderer, data, options["repeat"])
+                baseline = baseline or seconds
+                self.stdout.write(
+                    f"  {type(renderer).__name__:>17}: {seconds * 1000:8.3f}ms per render  "
+                    f"{size:>9} bytes  {baseline / seconds:5.1f}x"
+                )
+
+    @staticmethod
+    def _bench(renderer, data, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            content = renderer.render(data, "application/json")
+        return (time.perf_counter() - started) / repeat, len(content)
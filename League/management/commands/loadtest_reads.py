@@ -0,0 +1,122 @@
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+DEFAULT_PATHS = ["leagues/", "predictions/", "leaderboard/"]
+
+
+def _fetch(url, token):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the read-heavy League endpoints: concurrent GETs against a "
+        "running server, or against uvicorn serving the sync views and then "
+        "the async views"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server's League API (e.g. http://127.0.0.1:8000/league/); "
+                 "by default uvicorn is started once per view mode",
+        )
+        parser.add_argument("--email", help="User to authenticate as (default: first active user)")
+        parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="Paths under the base URL")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+        parser.add_argument("--requests", type=int, default=500, help="Requests per path")
+        parser.add_argument("--port", type=int, default=8765, help="Port for the uvicorn runs")
+        parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be at least 1")
+        token = self._token(options["email"])
+
+        if options["url"]:
+            self._run("server", options["url"], token, options)
+            return
+
+        if importlib.util.find_spec("uvicorn") is None:
+            raise CommandError("uvicorn is not installed; install it or pass --url")
+        for mode, async_views in (("sync", "False"), ("async", "True")):
+            with self._uvicorn(options["port"], options["workers"], async_views):
+                self._run(mode, f"http://127.0.0.1:{options['port']}/league/", token, options)
+
+    def _token(self, email):
+        users = get_user_model().objects.filter(is_active=True).order_by("pk")
+        if email:
+            users = users.filter(email=email)
+        user = users.first()
+        if user is None:
+            raise CommandError("No active user to authenticate as")
+        return str(AccessToken.for_user(user))
+
+    def _run(self, mode, base_url, token, options):
+        base_url = base_url.rstrip("/") + "/"
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            for path in options["paths"]:
+                url = base_url + path.lstrip("/")
+                started = time.perf_counter()
+                results = list(pool.map(lambda _: _fetch(url, token), range(options["requests"])))
+                elapsed = time.perf_counter() - started
+
+                latencies = sorted(latency for _, latency in results)
+                errors = sum(not ok for ok, _ in results)
+                p50 = statistics.median(latencies) * 1000
+                p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000
+                self.stdout.write(
+                    f"{mode:>6} {path:<24} {len(results) / elapsed:8.1f} req/s  "
+                    f"p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  errors {errors}"
+                )
+
+    @contextmanager
+    def _uvicorn(self, port, workers, async_views):
+        process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "Elmosliga.asgi:application",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(workers), "--log-level", "warning",
+            ],
+            env={**os.environ, "LEAGUE_ASYNC_VIEWS": async_views},
+        )
+        try:
+            self._wait_for_port(port, process)
+            yield process
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    @staticmethod
+    def _wait_for_port(port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError("uvicorn exited before accepting connections")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"uvicorn did not listen on port {port} within {timeout}s")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from League.models import ProbabilitySet
+from League.services.projection import store_projection
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the projection for the newest probability set, taking in "
+        "predictions made since it was uploaded"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Only run if the newest set has not been projected yet",
+        )
+
+    def handle(self, *args, **options):
+        probability_set = ProbabilitySet.objects.defer("projection").first()
+        if probability_set is None:
+            raise CommandError("No probability set has been uploaded yet.")
+        if options["pending"] and probability_set.projected_at is not None:
+            self.stdout.write(f"{probability_set} is already projected")
+            return
+
+        projection = store_projection(probability_set)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Projected {len(projection)} profiles for {probability_set}"
+            )
+        )
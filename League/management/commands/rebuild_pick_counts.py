@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from League.services.popularity import rebuild_pick_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-team pick counters from the predictions table"
+
+    def handle(self, *args, **options):
+        total = rebuild_pick_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt pick counters for {total} picks"))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from League.services.leaderboard import publish
+from League.services.reconciliation import reconcile, repair_league
+
+
+class Command(BaseCommand):
+    help = "Report predictions whose stored points drifted from the standings, optionally repairing them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--leagues",
+            nargs="+",
+            type=int,
+            help="Only check these league ids",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite drifted points after reporting them",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Predictions repaired per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        reports = reconcile(options["leagues"])
+        drifted = [report for report in reports if report["mismatches"]]
+
+        for report in drifted:
+            self.stdout.write(
+                f"  league {report['league']}: {report['mismatches']} of "
+                f"{report['predictions']} predictions off by {report['drift']} points"
+            )
+
+        if not drifted:
+            self.stdout.write(
+                self.style.SUCCESS(f"All {len(reports)} league(s) reconcile")
+            )
+            return
+
+        if not options["repair"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(drifted)} league(s) drifted; rerun with --repair to fix"
+                )
+            )
+            return
+
+        repaired = sum(
+            repair_league(report["league"], options["batch_size"]) for report in drifted
+        )
+        publish([report["league"] for report in drifted])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repaired {repaired} predictions across {len(drifted)} league(s)"
+            )
+        )
@@ -0,0 +1,137 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from League.models import League
+from League.services.leaderboard import publish
+from League.services.scoring import score_league
+
+
+def _init_worker():
+    """Give every worker process its own database connections"""
+    django.setup()
+    connections.close_all()
+
+
+def _rescore_league(league_id):
+    """Rescore one league in its own transaction"""
+    started = time.perf_counter()
+    with transaction.atomic():
+        updated = score_league(league_id)
+    return league_id, updated, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Rescore every league's predictions, fanning leagues out across a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--leagues",
+            nargs="+",
+            type=int,
+            help="Only rescore these league ids",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help=(
+                "Worker processes; 0 rescores inline in this process. Defaults "
+                "to the CPU count, or 0 on SQLite, which takes one writer at a time"
+            ),
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(settings.BASE_DIR, ".rescore_all.checkpoint"),
+            help="File recording finished league ids",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip leagues already recorded in the checkpoint file",
+        )
+
+    def handle(self, *args, **options):
+        workers = self._workers(options["workers"])
+
+        league_ids = League.objects.order_by("id").values_list("id", flat=True)
+        if options["leagues"]:
+            league_ids = league_ids.filter(id__in=options["leagues"])
+        league_ids = list(league_ids)
+
+        checkpoint = options["checkpoint"]
+        done = self._read_checkpoint(checkpoint) if options["resume"] else set()
+        if not options["resume"] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        pending = [league_id for league_id in league_ids if league_id not in done]
+        if not pending:
+            # An interrupted run can finish every league but never publish
+            if done:
+                os.remove(checkpoint)
+                publish(league_ids)
+            self.stdout.write("Nothing to rescore")
+            return
+
+        self.stdout.write(
+            f"Rescoring {len(pending)} league(s), {len(done)} already done"
+        )
+        started = time.perf_counter()
+        total = 0
+
+        with open(checkpoint, "a") as checkpoint_file:
+            for league_id, updated, elapsed in self._run(pending, workers):
+                checkpoint_file.write(f"{league_id}\n")
+                checkpoint_file.flush()
+                total += updated
+                self.stdout.write(
+                    f"  league {league_id}: {updated} predictions in {elapsed:.2f}s"
+                )
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        os.remove(checkpoint)
+        # Leagues finished before a --resume were never published either
+        publish(league_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rescored {total} predictions across {len(pending)} league(s) "
+                f"in {elapsed:.2f}s ({rate:.0f} predictions/sec)"
+            )
+        )
+
+    @staticmethod
+    def _workers(requested):
+        sqlite = connections[DEFAULT_DB_ALIAS].vendor == "sqlite"
+        if requested is None:
+            return 0 if sqlite else os.cpu_count() or 1
+        if requested < 0:
+            raise CommandError("--workers must be 0 or greater")
+        if requested and sqlite:
+            # Parallel writers only fail with "database is locked"
+            raise CommandError("--workers must be 0 on SQLite")
+        return requested
+
+    def _run(self, league_ids, workers):
+        if workers == 0:
+            for league_id in league_ids:
+                yield _rescore_league(league_id)
+            return
+
+        # Forked children must not share the parent's open sockets
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_rescore_league, league_id) for league_id in league_ids]
+            for future in as_completed(futures):
+                yield future.result()
+
+    @staticmethod
+    def _read_checkpoint(path):
+        if not os.path.exists(path):
+            return set()
+        with open(path) as checkpoint_file:
+            return {int(line) for line in checkpoint_file if line.strip()}
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Elmosliga.slow_queries import read_entries, top_offenders
+
+
+class Command(BaseCommand):
+    help = "Show the queries that spent the most time in the slow-query log"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=settings.SLOW_QUERY_LOG_FILE,
+            help="Slow-query log to read; its rotated backups are read too",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of query shapes to show",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["total", "max", "count"],
+            default="total",
+            help="Rank by total time, slowest single run or number of runs",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Show the latest captured query plan for each",
+        )
+
+    def handle(self, *args, **options):
+        if options["top"] < 1:
+            raise CommandError("--top must be at least 1")
+        if not options["file"]:
+            raise CommandError("No slow-query log; set SLOW_QUERY_LOG_FILE or pass --file")
+
+        offenders = top_offenders(
+            read_entries(options["file"]), options["sort"], options["top"]
+        )
+        if not offenders:
+            self.stdout.write(self.style.SUCCESS("No slow queries logged"))
+            return
+
+        for rank, offender in enumerate(offenders, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rank}. {offender['count']} run(s), {offender['total_ms']:.1f}ms total, "
+                f"{offender['mean_ms']:.1f}ms mean, {offender['max_ms']:.1f}ms max"
+            ))
+            self.stdout.write(f"  {offender['sql']}")
+            for view, count in offender["views"].most_common(3):
+                self.stdout.write(f"  view {view} ({count})")
+            for frame in offender["stack"][-3:]:
+                self.stdout.write(f"  at {frame}")
+            if options["plans"] and offender["plan"]:
+                for line in offender["plan"]:
+                    self.stdout.write(f"    {line}")
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from Elmosliga import memory
+
+
+class Command(BaseCommand):
+    help = (
+        "Request an endpoint repeatedly under tracemalloc and show the League "
+        "and accounts lines whose allocations grew; for live workers use the "
+        "staff-only debug/memory/ endpoint instead"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=reverse("leaderboard-global"),
+            help="Endpoint to request (default: the global leaderboard)",
+        )
+        parser.add_argument("--requests", type=int, default=50, help="Requests between the snapshots")
+        parser.add_argument("--email", help="User to authenticate as (default: first active user)")
+        parser.add_argument("--top", type=int, default=15, help="Allocation sites to show")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["top"] < 1:
+            raise CommandError("--requests and --top must be at least 1")
+
+        users = get_user_model().objects.filter(is_active=True).order_by("pk")
+        if options["email"]:
+            users = users.filter(email=options["email"])
+        user = users.first()
+        if user is None:
+            raise CommandError("No active user to authenticate as")
+        client = Client(headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"})
+
+        was_tracing = memory.status()["tracing"]
+        # The test client's host, which deployments do not list
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            # One untraced request first, so import-time and cache warm-up
+            # allocations do not show up as growth
+            self._get(client, options["path"])
+            memory.start()
+            try:
+                before = memory.snapshot("before")
+                for _ in range(options["requests"]):
+                    self._get(client, options["path"])
+                after = memory.snapshot("after")
+                sites = memory.compare(before, after, options["top"])
+                peak = memory.status()["peak_kb"]
+            finally:
+                if not was_tracing:
+                    memory.stop()
+
+        self.stdout.write(
+            f"{options['requests']} requests to {options['path']}, traced peak {peak:.1f} KiB"
+        )
+        if not sites:
+            self.stdout.write(self.style.SUCCESS("No League or accounts allocations retained"))
+            return
+        for site in sites:
+            self.stdout.write(
+                f"{site['size_diff_kb']:+10.1f} KiB {site['count_diff']:+7d} blocks  "
+                f"{site['size_kb']:10.1f} KiB total  {site['site']}"
+            )
+
+    @staticmethod
+    def _get(client, path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f"{path} answered {response.status_code}")
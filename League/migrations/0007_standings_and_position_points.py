@@ -0,0 +1,77 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+PLACE_FIELDS = (
+    "first_place",
+    "second_place",
+    "third_place",
+    "fourth_place",
+    "fifth_place",
+    "sixth_place",
+)
+
+
+def copy_columns_to_rows(apps, schema_editor):
+    """Seed the normalized tables from the existing per-position columns"""
+    League = apps.get_model("League", "League")
+    LeagueResult = apps.get_model("League", "LeagueResult")
+    PositionPoints = apps.get_model("League", "PositionPoints")
+    Standing = apps.get_model("League", "Standing")
+
+    PositionPoints.objects.bulk_create(
+        PositionPoints(
+            league_id=league.id,
+            position=position,
+            points=getattr(league, f"{field}_points"),
+        )
+        for league in League.objects.all()
+        for position, field in enumerate(PLACE_FIELDS, start=1)
+    )
+    Standing.objects.bulk_create(
+        Standing(
+            league_id=result.league_id,
+            position=position,
+            team_id=getattr(result, f"{field}_id"),
+        )
+        for result in LeagueResult.objects.all()
+        for position, field in enumerate(PLACE_FIELDS, start=1)
+        if getattr(result, f"{field}_id")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('League', '0006_add_is_predicted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PositionPoints',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('points', models.IntegerField(default=0)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='position_points', to='League.league')),
+            ],
+            options={
+                'ordering': ('league', 'position'),
+                'unique_together': {('league', 'position')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='League.league')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='League.team')),
+            ],
+            options={
+                'ordering': ('league', 'position'),
+                'unique_together': {('league', 'position'), ('league', 'team')},
+            },
+        ),
+        migrations.RunPython(copy_columns_to_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_existing_picks(apps, schema_editor):
+    Prediction = apps.get_model("League", "Prediction")
+    TeamPickCount = apps.get_model("League", "TeamPickCount")
+
+    TeamPickCount.objects.bulk_create(
+        TeamPickCount(league_id=league_id, team_id=team_id, pick_count=picks)
+        for league_id, team_id, picks in (
+            Prediction.objects.filter(predicted_team__isnull=False)
+            .values_list("league_id", "predicted_team_id")
+            .annotate(picks=models.Count("id"))
+            .order_by()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('League', '0008_probability_set'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamPickCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pick_count', models.PositiveIntegerField(default=0)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pick_counts', to='League.league')),
+                ('team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pick_count', to='League.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['league', 'team'], name='League_team_league__ebafc7_idx')],
+            },
+        ),
+        migrations.RunPython(count_existing_picks, migrations.RunPython.noop),
+    ]
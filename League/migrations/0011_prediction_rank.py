@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+
+def rank_existing_predictions(apps, schema_editor):
+    Prediction = apps.get_model("League", "Prediction")
+
+    ranked = Prediction.objects.annotate(
+        new_rank=Window(Rank(), partition_by=F("league_id"), order_by=F("points").desc())
+    ).only("id")
+    updates = []
+    for prediction in ranked.iterator(chunk_size=2000):
+        prediction.rank = prediction.new_rank
+        updates.append(prediction)
+    Prediction.objects.bulk_update(updates, ["rank"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('League', '0010_leaderboard_generations'),
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['league', 'rank'], name='League_pred_league__19ece0_idx'),
+        ),
+        migrations.RunPython(rank_existing_predictions, migrations.RunPython.noop),
+    ]
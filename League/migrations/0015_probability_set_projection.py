@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('League', '0014_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='probabilityset',
+            name='projected_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='probabilityset',
+            name='projection',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('League', '0015_probability_set_projection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaderboardchangeset',
+            name='previous_version',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
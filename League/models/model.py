@@ -1,9 +1,22 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from accounts.models import Profile
 
 
 class League(models.Model):
+    # Legacy per-position columns, in finishing order. They are mirrored into
+    # PositionPoints rows on save; positions beyond sixth live only as rows.
+    PLACE_POINTS_FIELDS = (
+        "first_place_points",
+        "second_place_points",
+        "third_place_points",
+        "fourth_place_points",
+        "fifth_place_points",
+        "sixth_place_points",
+    )
+
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to="leagues/", blank=True, null=True)
     is_active = models.BooleanField(default=True)
@@ -15,10 +28,64 @@ class League(models.Model):
     fifth_place_points = models.IntegerField(default=5)
     sixth_place_points = models.IntegerField(default=3)
 
+    def save(self, *args, **kwargs):
+        from League.services.scoring import rescore_positions
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            changed = self.sync_position_points()
+            if changed:
+                # Only predictions on teams sitting at a repriced position move
+                rescore_positions(self.pk, changed)
+
+    def sync_position_points(self):
+        """
+        Upsert the PositionPoints rows for positions 1-6 from the columns.
+
+        Returns:
+            list: positions whose points value changed
+        """
+        current = dict(
+            self.position_points.filter(
+                position__lte=len(self.PLACE_POINTS_FIELDS)
+            ).values_list("position", "points")
+        )
+        rows = [
+            PositionPoints(league=self, position=position, points=getattr(self, field))
+            for position, field in enumerate(self.PLACE_POINTS_FIELDS, start=1)
+            if current.get(position) != getattr(self, field)
+        ]
+        if not rows:
+            return []
+
+        PositionPoints.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["league", "position"],
+            update_fields=["points"],
+        )
+        return [row.position for row in rows]
+
     def __str__(self):
         return self.name
 
 
+class PositionPoints(models.Model):
+    """Points awarded for a team finishing at ``position`` in a league"""
+    league = models.ForeignKey(
+        League, related_name="position_points", on_delete=models.CASCADE
+    )
+    position = models.PositiveSmallIntegerField()
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("league", "position")
+        ordering = ("league", "position")
+
+    def __str__(self):
+        return f"{self.league.name} #{self.position}: {self.points} pts"
+
+
 class Team(models.Model):
     league = models.ForeignKey(League, related_name="teams", on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
@@ -29,6 +96,17 @@ class Team(models.Model):
 
 
 class LeagueResult(models.Model):
+    # Legacy per-position columns, in finishing order. They are mirrored into
+    # Standing rows on save so scoring only ever reads the standings table.
+    PLACE_FIELDS = (
+        "first_place",
+        "second_place",
+        "third_place",
+        "fourth_place",
+        "fifth_place",
+        "sixth_place",
+    )
+
     league = models.OneToOneField(
         League, related_name="result", on_delete=models.CASCADE
     )
@@ -89,12 +167,68 @@ class LeagueResult(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        # Standings are written before the row itself so post_save receivers
+        # already see the new table when they rescore.
+        with transaction.atomic():
+            self.sync_standings()
+            super().save(*args, **kwargs)
+
+    def sync_standings(self):
+        """Replace the league's top-six Standing rows with the columns"""
+        placed = [
+            (position, getattr(self, f"{field}_id"))
+            for position, field in enumerate(self.PLACE_FIELDS, start=1)
+        ]
+        placed = [(position, team_id) for position, team_id in placed if team_id]
+        team_ids = [team_id for _, team_id in placed]
+
+        Standing.objects.filter(
+            Q(position__lte=len(self.PLACE_FIELDS)) | Q(team_id__in=team_ids),
+            league_id=self.league_id,
+        ).delete()
+        Standing.objects.bulk_create(
+            Standing(league_id=self.league_id, position=position, team_id=team_id)
+            for position, team_id in placed
+        )
 
     def __str__(self):
         return f"Result - {self.league.name}"
 
 
+class Standing(models.Model):
+    """A team's finishing position in a league"""
+    league = models.ForeignKey(
+        League, related_name="standings", on_delete=models.CASCADE
+    )
+    position = models.PositiveSmallIntegerField()
+    team = models.ForeignKey(
+        Team, related_name="standings", on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = (("league", "position"), ("league", "team"))
+        ordering = ("league", "position")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored team so post_save can rescore it when it moves
+        instance._loaded_team_id = dict(zip(field_names, values)).get("team_id")
+        return instance
+
+    def clean(self):
+        # Missing team/league are reported as field errors by full_clean()
+        if not (self.team_id and self.league_id):
+            return
+        if self.team.league_id != self.league_id:
+            raise ValidationError(
+                f"Team {self.team.name} must belong to {self.league.name}"
+            )
+
+    def __str__(self):
+        return f"{self.league.name} #{self.position}: {self.team.name}"
+
+
 class Prediction(models.Model):
     profile = models.ForeignKey(
         Profile, related_name="predictions", on_delete=models.CASCADE
@@ -110,12 +244,17 @@ class Prediction(models.Model):
         blank=True,
     )
     points = models.IntegerField(default=0)
+    # Competition rank within the league, refreshed with the points
+    rank = models.PositiveIntegerField(null=True, blank=True)
     is_predicted = models.BooleanField(default=False)  # NEW FIELD
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("profile", "league")
+        indexes = [
+            models.Index(fields=["league", "rank"]),
+        ]
 
     def clean(self):
         # Ensure the predicted team belongs to the selected league
@@ -124,12 +263,211 @@ class Prediction(models.Model):
                 f"Team {self.predicted_team.name} must belong to {self.league.name}"
             )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored pick so post_save can move the pick counters
+        instance._loaded_team_id = dict(zip(field_names, values)).get(
+            "predicted_team_id"
+        )
+        return instance
+
     def save(self, *args, **kwargs):
         self.full_clean()
         # Set is_predicted to True when predicted_team is set
         if self.predicted_team:
             self.is_predicted = True
-        super().save(*args, **kwargs)
+        if self._state.adding and self.rank is None:
+            # A new prediction has no points yet: tied with everyone else on 0
+            self.rank = (
+                Prediction.objects.filter(
+                    league_id=self.league_id, points__gt=self.points
+                ).count()
+                + 1
+            )
+        # post_save updates the pick counters in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.profile.user.email} - {self.league.name}: {self.predicted_team.name if self.predicted_team else 'No prediction'} ({self.points} pts)"
+
+
+class TeamPickCount(models.Model):
+    """How many predictions picked a team, kept in step with Prediction writes"""
+    league = models.ForeignKey(
+        League, related_name="pick_counts", on_delete=models.CASCADE
+    )
+    team = models.OneToOneField(
+        Team, related_name="pick_count", on_delete=models.CASCADE
+    )
+    pick_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["league", "team"]),
+        ]
+
+    @classmethod
+    def adjust(cls, league_id, team_id, delta):
+        """
+        Atomically add ``delta`` to a team's counter, creating it if needed.
+        A counter already at zero is not decremented.
+        """
+        cls.objects.bulk_create(
+            [cls(league_id=league_id, team_id=team_id)], ignore_conflicts=True
+        )
+        counters = cls.objects.filter(team_id=team_id)
+        if delta < 0:
+            counters = counters.filter(pick_count__gte=-delta)
+        counters.update(pick_count=models.F("pick_count") + delta)
+
+    def __str__(self):
+        return f"{self.team.name}: {self.pick_count} picks"
+
+
+class ProbabilitySet(models.Model):
+    """
+    Per-team finishing probabilities used to project final scores.
+
+    ``data`` maps league id -> team id -> list of probabilities, one per
+    finishing position starting at first place. ``projection`` is filled in
+    once the set has been simulated; the newest projected set is current and
+    its primary key is the version projections are cached under.
+    """
+    data = models.JSONField()
+    simulations = models.PositiveIntegerField(default=1000)
+    projection = models.JSONField(null=True, blank=True, editable=False)
+    projected_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"Probability set #{self.pk} ({len(self.data)} leagues)"
+
+
+class LeaderboardGeneration(models.Model):
+    """
+    One fully built leaderboard for a scope ("global" or "league:<id>").
+
+    Generations are written off to the side and only become visible once
+    the scope's LeaderboardPointer is swapped to them.
+    """
+    scope = models.CharField(max_length=32, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.scope} generation #{self.pk}"
+
+
+class LeaderboardEntry(models.Model):
+    generation = models.ForeignKey(
+        LeaderboardGeneration, related_name="entries", on_delete=models.CASCADE
+    )
+    profile = models.ForeignKey(
+        Profile, related_name="leaderboard_entries", on_delete=models.CASCADE
+    )
+    rank = models.PositiveIntegerField()
+    points = models.IntegerField()
+    # League scopes only: the team the profile picked
+    predicted_team = models.ForeignKey(
+        Team,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["generation", "rank"]),
+            models.Index(fields=["generation", "profile"]),
+        ]
+
+
+class LeaderboardPointer(models.Model):
+    """The published generation for a scope, swapped in a single UPDATE"""
+    scope = models.CharField(max_length=32, unique=True)
+    generation = models.ForeignKey(
+        LeaderboardGeneration, related_name="+", on_delete=models.CASCADE
+    )
+    published_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.scope} -> #{self.generation_id}"
+
+
+class RankSnapshot(models.Model):
+    """
+    Global ranks and totals after one scoring run, packed into one blob.
+
+    ``data`` holds a little-endian (rank, total_points) int32 pair for every
+    profile id from ``base_profile_id`` to ``base_profile_id + size - 1``;
+    a profile's record sits at a fixed offset, with rank 0 meaning absent.
+    """
+    generation = models.ForeignKey(
+        LeaderboardGeneration,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    base_profile_id = models.BigIntegerField()
+    size = models.PositiveIntegerField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"Rank snapshot #{self.pk} ({self.size} slots)"
+
+
+class LeaderboardChangeSet(models.Model):
+    """Profiles whose global total changed in one published version"""
+    # The global LeaderboardGeneration id; generations are pruned, versions are not reused
+    version = models.BigIntegerField(unique=True)
+    # The version this one was diffed against; None for the first publish
+    previous_version = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Leaderboard version {self.version}"
+
+
+class LeaderboardChange(models.Model):
+    change_set = models.ForeignKey(
+        LeaderboardChangeSet, related_name="changes", on_delete=models.CASCADE
+    )
+    profile = models.ForeignKey(
+        Profile, related_name="+", on_delete=models.CASCADE
+    )
+
+
+class RequestProfile(models.Model):
+    """A request a staff user ran under cProfile; see Elmosliga.profiling"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=2048)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    # Raw pstats data, for snakeviz or ``python -m pstats``
+    stats = models.FileField(upload_to="profiles/")
+    # "frame;frame;frame microseconds" lines, for flamegraph.pl or speedscope
+    collapsed = models.FileField(upload_to="profiles/")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from League.models import League, Team, Prediction, LeagueResult
+from League.models import League, Team, Prediction, LeagueResult, Standing, ProbabilitySet
 
 
 class TeamSerializer(serializers.ModelSerializer):
@@ -43,11 +43,12 @@ class PredictionSerializer(serializers.ModelSerializer):
             "predicted_team",
             "predicted_team_name",
             "points",
+            "rank",
             "is_predicted",  # NEW FIELD
             "created_at",
             "updated_at",
         )
-        read_only_fields = ("points", "is_predicted", "created_at", "updated_at")
+        read_only_fields = ("points", "rank", "is_predicted", "created_at", "updated_at")
 
     def validate(self, attrs):
         league = attrs.get("league")
@@ -114,25 +115,26 @@ class PredictionSerializer(serializers.ModelSerializer):
         return prediction
 
 
+class StandingSerializer(serializers.ModelSerializer):
+    team_name = serializers.CharField(source="team.name", read_only=True)
+
+    class Meta:
+        model = Standing
+        fields = ("position", "team", "team_name")
+
+
 class LeagueResultSerializer(serializers.ModelSerializer):
-    first_place_name = serializers.CharField(
-        source="first_place.name", read_only=True
-    )
-    second_place_name = serializers.CharField(
-        source="second_place.name", read_only=True
-    )
-    third_place_name = serializers.CharField(
-        source="third_place.name", read_only=True
-    )
-    fourth_place_name = serializers.CharField(
-        source="fourth_place.name", read_only=True
-    )
-    fifth_place_name = serializers.CharField(
-        source="fifth_place.name", read_only=True
-    )
-    sixth_place_name = serializers.CharField(
-        source="sixth_place.name", read_only=True
-    )
+    """
+    The six place columns are the writable surface; names are read back from
+    the standings table, which list views prefetch with ``league__standings__team``.
+    """
+    first_place_name = serializers.SerializerMethodField()
+    second_place_name = serializers.SerializerMethodField()
+    third_place_name = serializers.SerializerMethodField()
+    fourth_place_name = serializers.SerializerMethodField()
+    fifth_place_name = serializers.SerializerMethodField()
+    sixth_place_name = serializers.SerializerMethodField()
+    standings = serializers.SerializerMethodField()
     league_name = serializers.CharField(source="league.name", read_only=True)
 
     class Meta:
@@ -153,9 +155,49 @@ class LeagueResultSerializer(serializers.ModelSerializer):
             "fifth_place_name",
             "sixth_place",
             "sixth_place_name",
+            "standings",
             "updated_at",
         )
 
+    def _standings(self, obj):
+        # Cache per instance so the six name fields share one lookup
+        cache = getattr(obj, "_standings_cache", None)
+        if cache is None:
+            league = obj.league
+            if "standings" in getattr(league, "_prefetched_objects_cache", {}):
+                cache = list(league.standings.all())
+            else:
+                cache = list(league.standings.select_related("team"))
+            obj._standings_cache = cache
+        return cache
+
+    def _place_name(self, obj, position):
+        for standing in self._standings(obj):
+            if standing.position == position:
+                return standing.team.name
+        return None
+
+    def get_first_place_name(self, obj):
+        return self._place_name(obj, 1)
+
+    def get_second_place_name(self, obj):
+        return self._place_name(obj, 2)
+
+    def get_third_place_name(self, obj):
+        return self._place_name(obj, 3)
+
+    def get_fourth_place_name(self, obj):
+        return self._place_name(obj, 4)
+
+    def get_fifth_place_name(self, obj):
+        return self._place_name(obj, 5)
+
+    def get_sixth_place_name(self, obj):
+        return self._place_name(obj, 6)
+
+    def get_standings(self, obj):
+        return StandingSerializer(self._standings(obj), many=True).data
+
     def validate(self, attrs):
         league = attrs.get("league", self.instance.league if self.instance else None)
         first = attrs.get("first_place", self.instance.first_place if self.instance else None)
@@ -189,4 +231,73 @@ class LeagueResultSerializer(serializers.ModelSerializer):
                 "All six teams must be different"
             )
 
-        return attrs
\ No newline at end of file
+        return attrs
+
+class WhatIfStandingsSerializer(serializers.Serializer):
+    """Hypothetical top-six standings, posted in the same shape as a result"""
+    league = serializers.PrimaryKeyRelatedField(queryset=League.objects.all())
+    first_place = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    second_place = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    third_place = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    fourth_place = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    fifth_place = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    sixth_place = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all())
+    top = serializers.IntegerField(default=10, min_value=1, max_value=100)
+
+    def validate(self, attrs):
+        league = attrs["league"]
+        teams = [attrs[field] for field in LeagueResult.PLACE_FIELDS]
+
+        for team in teams:
+            if team.league_id != league.id:
+                raise serializers.ValidationError(
+                    f"Team {team.name} must belong to {league.name}"
+                )
+
+        if len(set(teams)) != len(teams):
+            raise serializers.ValidationError("All six teams must be different")
+
+        attrs["team_ids"] = [team.id for team in teams]
+        return attrs
+
+
+class ProbabilitySetSerializer(serializers.ModelSerializer):
+    """
+    Upload of finishing probabilities, shaped as
+    ``{"<league id>": {"<team id>": [p_1st, p_2nd, ...]}}``.
+    """
+
+    class Meta:
+        model = ProbabilitySet
+        fields = ("id", "data", "simulations", "created_at")
+        read_only_fields = ("created_at",)
+
+    def validate_simulations(self, value):
+        if not 1 <= value <= 10000:
+            raise serializers.ValidationError("Simulations must be between 1 and 10000")
+        return value
+
+    def validate_data(self, data):
+        if not isinstance(data, dict) or not data:
+            raise serializers.ValidationError("Probabilities must map league ids to teams")
+
+        for league_id, teams in data.items():
+            if not str(league_id).isdigit() or not isinstance(teams, dict):
+                raise serializers.ValidationError(
+                    f"League {league_id} must map team ids to probability lists"
+                )
+            known = set(
+                Team.objects.filter(league_id=league_id).values_list("id", flat=True)
+            )
+            for team_id, probabilities in teams.items():
+                if not str(team_id).isdigit() or int(team_id) not in known:
+                    raise serializers.ValidationError(
+                        f"Team {team_id} does not belong to league {league_id}"
+                    )
+                if not isinstance(probabilities, list) or not all(
+                    isinstance(p, (int, float)) and 0 <= p <= 1 for p in probabilities
+                ):
+                    raise serializers.ValidationError(
+                        f"Team {team_id} probabilities must be numbers between 0 and 1"
+                    )
+        return data
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from League.models import RankSnapshot
+from League.services.history import record_in
+
+# Comment line sent on idle streams so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+# How often each worker checks the shared events file for other workers' events
+POLL_SECONDS = 1
+
+# Events buffered per subscriber; a client that falls further behind misses
+# events and catches up through the changes feed on reconnect
+QUEUE_SIZE = 16
+
+RETRY_MILLISECONDS = 5000
+
+_lock = threading.Lock()
+_subscribers = set()
+_followers = {}
+
+
+def _origin():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        pass
+
+
+def _deliver(event, records):
+    """Hand an event to every subscriber in this process, from any thread"""
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscription in subscribers:
+        try:
+            subscription.loop.call_soon_threadsafe(
+                _offer, subscription.queue, (event, records)
+            )
+        except RuntimeError:
+            # The subscriber's event loop has shut down
+            with _lock:
+                _subscribers.discard(subscription)
+
+
+def _snapshot_records(snapshot):
+    if snapshot is None:
+        return None
+    return bytes(snapshot.data), snapshot.base_profile_id, snapshot.size
+
+
+def announce(league_ids, generation, snapshot=None):
+    """
+    Tell live subscribers that leagues were rescored into a new version.
+
+    Subscribers in this process are woken directly. When
+    ``LEADERBOARD_EVENTS_FILE`` is set the event is also appended there, so
+    the other worker processes following that file fan it out too; the file
+    is rotated once it reaches ``LEADERBOARD_EVENTS_MAX_BYTES``.
+    """
+    event = {"leagues": list(league_ids), "version": generation.pk}
+    _deliver(event, _snapshot_records(snapshot))
+
+    path = settings.LEADERBOARD_EVENTS_FILE
+    if path:
+        line = json.dumps(
+            {**event, "snapshot": snapshot.pk if snapshot else None, "origin": _origin()}
+        )
+        _rotate(path)
+        with open(path, "a") as events_file:
+            events_file.write(line + "\n")
+
+
+def _rotate(path):
+    """
+    Move a full events file aside to ``<path>.1``, replacing the previous one.
+
+    Followers reopen the file on every poll and start over from the top
+    when it shrinks, so they carry on with the new file.
+    """
+    try:
+        if os.path.getsize(path) < settings.LEADERBOARD_EVENTS_MAX_BYTES:
+            return
+        os.replace(path, f"{path}.1")
+    except FileNotFoundError:
+        # Not written yet, or rotated by another process
+        pass
+
+
+def _load_snapshot(snapshot_id):
+    return _snapshot_records(
+        RankSnapshot.objects.filter(pk=snapshot_id).first() if snapshot_id else None
+    )
+
+
+async def _follow(path, offset):
+    """
+    Relay events other processes appended to the shared file.
+
+    Only the file size is checked while nothing happens; a new event costs
+    one snapshot query per worker, however many clients it is connected to.
+    """
+    while True:
+        await asyncio.sleep(POLL_SECONDS)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            offset = 0
+            continue
+        if size < offset:
+            # Truncated or rotated
+            offset = 0
+        if size == offset:
+            continue
+
+        with open(path, "rb") as events_file:
+            events_file.seek(offset)
+            chunk = events_file.read(size - offset)
+        # Leave a partially written last line for the next poll
+        complete = chunk.rfind(b"\n") + 1
+        offset += complete
+
+        for line in chunk[:complete].splitlines():
+            event = json.loads(line)
+            if event.pop("origin") == _origin():
+                continue
+            records = await sync_to_async(_load_snapshot)(event.pop("snapshot"))
+            _deliver(event, records)
+
+
+class Subscription:
+    """One client's queue of events, bound to the event loop serving it"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def __enter__(self):
+        path = settings.LEADERBOARD_EVENTS_FILE
+        with _lock:
+            _subscribers.add(self)
+            if path and self.loop not in _followers:
+                offset = os.path.getsize(path) if os.path.exists(path) else 0
+                _followers[self.loop] = self.loop.create_task(_follow(path, offset))
+        return self
+
+    def __exit__(self, *exc_info):
+        with _lock:
+            _subscribers.discard(self)
+            if not any(other.loop is self.loop for other in _subscribers):
+                follower = _followers.pop(self.loop, None)
+                if follower is not None:
+                    follower.cancel()
+
+    async def get(self, timeout=KEEPALIVE_SECONDS):
+        """Next (event, records) message, or None after ``timeout`` idle seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def format_event(message, profile_id=None):
+    """Render a message as an SSE frame carrying the profile's own rank"""
+    event, records = message
+    record = None
+    if records is not None and profile_id is not None:
+        record = record_in(*records, profile_id)
+    rank, total_points = record or (None, None)
+    data = json.dumps({**event, "rank": rank, "total_points": total_points})
+    return f"event: rescored\nid: {event['version']}\ndata: {data}\n\n"
+
+
+async def event_stream(profile_id=None, keepalive=KEEPALIVE_SECONDS):
+    """
+    SSE frames for one connection.
+
+    Waiting clients only hold a queue: no database queries are made until
+    a league is rescored.
+    """
+    with Subscription() as subscription:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while True:
+            message = await subscription.get(keepalive)
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_event(message, profile_id)
@@ -0,0 +1,117 @@
+import struct
+import sys
+from array import array
+
+from django.db.models import BinaryField, Max, Min
+from django.db.models.functions import Substr
+from League.models import LeaderboardEntry, RankSnapshot
+
+RECORD = struct.Struct("<ii")
+
+# Snapshots kept for movement history; each is 8 bytes per profile id
+KEEP_SNAPSHOTS = 30
+
+
+def take_snapshot(generation):
+    """
+    Pack a published global generation into a RankSnapshot.
+
+    Returns:
+        RankSnapshot or None when the generation is empty
+    """
+    entries = LeaderboardEntry.objects.filter(generation=generation)
+    bounds = entries.aggregate(low=Min("profile_id"), high=Max("profile_id"))
+    if bounds["low"] is None:
+        return None
+
+    base = bounds["low"]
+    size = bounds["high"] - base + 1
+    records = array("i", bytes(RECORD.size * size))
+    for profile_id, rank, points in entries.values_list(
+        "profile_id", "rank", "points"
+    ).iterator(chunk_size=5000):
+        slot = 2 * (profile_id - base)
+        records[slot] = rank
+        records[slot + 1] = points
+    if sys.byteorder == "big":
+        records.byteswap()
+
+    snapshot = RankSnapshot.objects.create(
+        generation=generation,
+        base_profile_id=base,
+        size=size,
+        data=records.tobytes(),
+    )
+    stale = RankSnapshot.objects.order_by("-id")[KEEP_SNAPSHOTS:]
+    RankSnapshot.objects.filter(pk__in=list(stale.values_list("pk", flat=True))).delete()
+    return snapshot
+
+
+def record_in(data, base, size, profile_id):
+    """Read one profile's (rank, points) record from an in-memory snapshot blob"""
+    slot = profile_id - base
+    if not 0 <= slot < size:
+        return None
+    rank, points = RECORD.unpack_from(data, slot * RECORD.size)
+    return (rank, points) if rank else None
+
+
+def _record_at(profile_id, snapshot_id, base, size):
+    """Read one profile's (rank, points) record by offset, without the full blob"""
+    slot = profile_id - base
+    if not 0 <= slot < size:
+        return None
+
+    raw = (
+        RankSnapshot.objects.filter(pk=snapshot_id)
+        .annotate(
+            record=Substr(
+                "data", slot * RECORD.size + 1, RECORD.size, output_field=BinaryField()
+            )
+        )
+        .values_list("record", flat=True)
+        .first()
+    )
+    # Pruned since it was listed
+    if raw is None:
+        return None
+    rank, points = RECORD.unpack(bytes(raw))
+    return (rank, points) if rank else None
+
+
+def rank_movement(profile_id):
+    """
+    Diff a profile between the two latest snapshots.
+
+    Returns:
+        dict or None when there is no snapshot containing the profile yet
+    """
+    snapshots = list(
+        RankSnapshot.objects.order_by("-id").values_list(
+            "id", "base_profile_id", "size", "created_at"
+        )[:2]
+    )
+    if not snapshots:
+        return None
+
+    latest_id, base, size, taken_at = snapshots[0]
+    current = _record_at(profile_id, latest_id, base, size)
+    if current is None:
+        return None
+
+    previous = None
+    if len(snapshots) > 1:
+        previous = _record_at(profile_id, *snapshots[1][:3])
+
+    rank, points = current
+    return {
+        "rank": rank,
+        "total_points": points,
+        "previous_rank": previous[0] if previous else None,
+        "previous_total_points": previous[1] if previous else None,
+        # Positive when the profile climbed
+        "movement": previous[0] - rank if previous else 0,
+        "points_delta": points - previous[1] if previous else 0,
+        "snapshot": latest_id,
+        "snapshot_at": taken_at,
+    }
@@ -0,0 +1,393 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from django.db.models import Exists, F, OuterRef, Sum, Value, Window
+from django.db.models.functions import Coalesce, Rank
+from accounts.models import Profile
+from League.models import (
+    LeaderboardChange,
+    LeaderboardChangeSet,
+    LeaderboardEntry,
+    LeaderboardGeneration,
+    LeaderboardPointer,
+    Prediction,
+)
+from League.services.events import announce
+from League.services.history import take_snapshot
+
+GLOBAL_SCOPE = "global"
+
+# The published generation plus the one before it, for readers mid-request
+KEEP_GENERATIONS = 2
+
+# Versions a client may lag behind before the change feed asks for a resync
+KEEP_CHANGE_SETS = 50
+
+
+def league_scope(league_id):
+    return f"league:{league_id}"
+
+
+def global_ranking():
+    """Profiles with their total points and competition rank"""
+    return Profile.objects.annotate(
+        total_points=Coalesce(Sum("predictions__points"), Value(0)),
+        rank=Window(Rank(), order_by=F("total_points").desc()),
+    ).order_by("rank", "id")
+
+
+def league_ranking(league_id):
+    """A league's predictions in stored rank order (an index range scan)"""
+    return Prediction.objects.filter(league_id=league_id).order_by("rank", "id")
+
+
+def _insert_select(model, queryset):
+    """
+    Run ``INSERT INTO <model table> (...) SELECT ...`` for a queryset.
+
+    The queryset is a ``values()`` query whose field and annotation names
+    match ``model`` fields, so the rows are copied entirely inside the
+    database.
+    """
+    queryset = queryset.order_by()
+    # Compiled SELECT lists model fields first, then annotations
+    names = list(queryset.query.values_select) + list(queryset.query.annotation_select)
+    columns = [
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in names
+    ]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} "
+            f"({', '.join(columns)}) {sql}",
+            params,
+        )
+
+
+def _build(scope, rows, on_publish=None):
+    """
+    Write a new generation for ``scope`` and swap the pointer to it.
+
+    Publishes of a scope are serialized on its pointer row, and
+    ``on_publish(generation, previous_id)`` runs in the transaction that
+    swaps it.
+    """
+    with transaction.atomic():
+        previous_id = (
+            LeaderboardPointer.objects.select_for_update()
+            .filter(scope=scope)
+            .values_list("generation_id", flat=True)
+            .first()
+        )
+        generation = LeaderboardGeneration.objects.create(scope=scope)
+        _insert_select(LeaderboardEntry, rows(generation.pk))
+
+        if previous_id is None:
+            LeaderboardPointer.objects.create(scope=scope, generation=generation)
+        else:
+            LeaderboardPointer.objects.filter(scope=scope).update(
+                generation=generation, published_at=timezone.now()
+            )
+        if on_publish is not None:
+            on_publish(generation, previous_id)
+
+        stale = LeaderboardGeneration.objects.filter(scope=scope).order_by("-id")[
+            KEEP_GENERATIONS:
+        ]
+        LeaderboardGeneration.objects.filter(
+            pk__in=list(stale.values_list("pk", flat=True))
+        ).delete()
+    return generation
+
+
+def record_changes(generation, previous_id):
+    """
+    Log the profiles whose total differs from the previous global generation.
+
+    The new generation id is the change set's version. Only the latest
+    KEEP_CHANGE_SETS versions are retained; older clients must resync. Runs
+    in the publish transaction, so a version is never visible without its
+    changes.
+    """
+    change_set = LeaderboardChangeSet.objects.create(
+        version=generation.pk, previous_version=previous_id
+    )
+    unchanged = LeaderboardEntry.objects.filter(
+        generation_id=previous_id,
+        profile_id=OuterRef("profile_id"),
+        points=OuterRef("points"),
+    )
+    _insert_select(
+        LeaderboardChange,
+        LeaderboardEntry.objects.filter(generation=generation)
+        .filter(~Exists(unchanged))
+        .values("profile", change_set=Value(change_set.pk)),
+    )
+
+    stale = LeaderboardChangeSet.objects.order_by("-version")[KEEP_CHANGE_SETS:]
+    LeaderboardChangeSet.objects.filter(
+        pk__in=list(stale.values_list("pk", flat=True))
+    ).delete()
+    return change_set
+
+
+def build_global():
+    def rows(generation_id):
+        return global_ranking().values(
+            "rank",
+            generation=Value(generation_id),
+            profile=F("id"),
+            points=F("total_points"),
+        )
+
+    return _build(GLOBAL_SCOPE, rows, record_changes)
+
+
+def build_league(league_id):
+    def rows(generation_id):
+        return league_ranking(league_id).values(
+            "profile",
+            "points",
+            "predicted_team",
+            "rank",
+            generation=Value(generation_id),
+        )
+
+    return _build(league_scope(league_id), rows)
+
+
+def _join(scope, profile_id, points=0, predicted_team_id=None):
+    """
+    Add one entry to the published generation of ``scope`` in place.
+
+    Sign-ups and new predictions join the boards this way rather than by
+    publishing: no new generation, rank snapshot, change set or event, all
+    of which only follow scoring. The entry takes the competition rank its
+    points hold in that generation. Serialized with publishes on the
+    pointer row; an entry a publish already wrote is left alone.
+    """
+    with transaction.atomic():
+        generation_id = (
+            LeaderboardPointer.objects.select_for_update()
+            .filter(scope=scope)
+            .values_list("generation_id", flat=True)
+            .first()
+        )
+        # Before the first publish readers get the live ranking
+        if generation_id is None:
+            return None
+        entries = LeaderboardEntry.objects.filter(generation_id=generation_id)
+        if entries.filter(profile_id=profile_id).exists():
+            return None
+        rank = entries.filter(points__gt=points).count() + 1
+        entries.filter(points__lt=points).update(rank=F("rank") + 1)
+        return LeaderboardEntry.objects.create(
+            generation_id=generation_id,
+            profile_id=profile_id,
+            points=points,
+            rank=rank,
+            predicted_team_id=predicted_team_id,
+        )
+
+
+def join_global_board(profile_id):
+    """Place a new profile on the published global board with no points"""
+    return _join(GLOBAL_SCOPE, profile_id)
+
+
+def join_league_board(league_id, profile_id, points, predicted_team_id):
+    """Place a new prediction on its league's published board"""
+    return _join(league_scope(league_id), profile_id, points, predicted_team_id)
+
+
+def publish(league_ids=()):
+    """
+    Rebuild the given leagues' boards and the global board, then publish.
+
+    Each board is built into a fresh generation and made visible with one
+    pointer UPDATE, so readers always see a complete ranking and never wait
+    on a scoring transaction. The new global ranking is also kept as a
+    rank history snapshot and announced to live event streams.
+    """
+    for league_id in league_ids:
+        build_league(league_id)
+    generation = build_global()
+    snapshot = take_snapshot(generation)
+    announce(league_ids, generation, snapshot)
+    return generation
+
+
+def schedule_publish(league_id=None):
+    """
+    Publish once the surrounding transaction has committed; only the global
+    board is rebuilt without a league.
+    """
+    league_ids = [] if league_id is None else [league_id]
+    transaction.on_commit(lambda: publish(league_ids))
+
+
+def published_generation(scope):
+    """Id of the published generation for a scope, or None if never built"""
+    return _pointer(scope).first()
+
+
+async def apublished_generation(scope):
+    return await _pointer(scope).afirst()
+
+
+def _pointer(scope):
+    return LeaderboardPointer.objects.filter(scope=scope).values_list(
+        "generation_id", flat=True
+    )
+
+
+# Model fields before annotations, the order values() returns them in
+GLOBAL_KEYS = ("id", "user__email", "first_name", "last_name", "image", "total_points", "rank")
+
+LEAGUE_KEYS = (
+    "profile__id",
+    "profile__user__email",
+    "profile__first_name",
+    "profile__last_name",
+    "points",
+    "predicted_team__name",
+    "rank",
+)
+
+
+def _global_rows(generation):
+    """Global board rows for a generation (or live), columns in GLOBAL_KEYS order"""
+    if generation is None:
+        return global_ranking().values(*GLOBAL_KEYS)
+    return _global_entry_rows(LeaderboardEntry.objects.filter(generation_id=generation))
+
+
+def _global_entry_rows(entries):
+    # values() rather than values_list(): its iterator stays lazy under aiterator()
+    return entries.order_by("rank", "profile_id").values(
+        "profile_id",
+        "profile__user__email",
+        "profile__first_name",
+        "profile__last_name",
+        "profile__image",
+        "points",
+        "rank",
+    )
+
+
+def _league_rows(league_id, generation):
+    """League board rows (dicts with LEAGUE_KEYS) for a generation, or live"""
+    if generation is None:
+        return league_ranking(league_id).values(*LEAGUE_KEYS)
+    return (
+        LeaderboardEntry.objects.filter(generation_id=generation)
+        .order_by("rank", "profile_id")
+        .values(*LEAGUE_KEYS)
+    )
+
+
+def _global_entries(entries):
+    """Global entries shaped like the live ranking rows"""
+    return [dict(zip(GLOBAL_KEYS, row.values())) for row in _global_entry_rows(entries)]
+
+
+def global_board():
+    """The published global leaderboard, or a live ranking before the first publish"""
+    rows = _global_rows(published_generation(GLOBAL_SCOPE))
+    return [dict(zip(GLOBAL_KEYS, row.values())) for row in rows]
+
+
+async def aglobal_board():
+    rows = _global_rows(await apublished_generation(GLOBAL_SCOPE))
+    return [dict(zip(GLOBAL_KEYS, row.values())) async for row in rows.aiterator()]
+
+
+def league_board(league_id):
+    """The published leaderboard for a league, or a live ranking before the first publish"""
+    return list(_league_rows(league_id, published_generation(league_scope(league_id))))
+
+
+async def aleague_board(league_id):
+    generation = await apublished_generation(league_scope(league_id))
+    return [row async for row in _league_rows(league_id, generation).aiterator()]
+
+
+def columnar(rows, keys, rank_by):
+    """
+    Board rows (tuples in ``keys`` order) as one array per key.
+
+    Rows are in rank order and ranks are competition ranks of ``rank_by``,
+    so the rank column is dropped: a row's rank is its position (from 1),
+    or the rank of the row above when their ``rank_by`` values are equal.
+    It is only kept if the stored ranks don't follow that rule.
+    """
+    columns = dict(zip(keys, map(list, zip(*rows)))) if rows else {key: [] for key in keys}
+    ranks, values = columns["rank"], columns[rank_by]
+    for position, rank in enumerate(ranks):
+        tied = position and values[position] == values[position - 1]
+        if rank != (ranks[position - 1] if tied else position + 1):
+            break
+    else:
+        del columns["rank"]
+    return {"count": len(rows), "rank_by": rank_by, "columns": columns}
+
+
+def global_columns():
+    """``global_board`` in the columnar format"""
+    rows = _global_rows(published_generation(GLOBAL_SCOPE))
+    return columnar([tuple(row.values()) for row in rows], GLOBAL_KEYS, "total_points")
+
+
+async def aglobal_columns():
+    rows = _global_rows(await apublished_generation(GLOBAL_SCOPE))
+    rows = [tuple(row.values()) async for row in rows.aiterator()]
+    return columnar(rows, GLOBAL_KEYS, "total_points")
+
+
+def league_columns(league_id):
+    """``league_board`` in the columnar format"""
+    rows = _league_rows(league_id, published_generation(league_scope(league_id)))
+    return columnar([tuple(row.values()) for row in rows], LEAGUE_KEYS, "points")
+
+
+async def aleague_columns(league_id):
+    generation = await apublished_generation(league_scope(league_id))
+    rows = _league_rows(league_id, generation)
+    rows = [tuple(row.values()) async for row in rows.aiterator()]
+    return columnar(rows, LEAGUE_KEYS, "points")
+
+
+def changes_since(version):
+    """
+    Global entries whose total changed after ``version``.
+
+    Returns:
+        dict: current version, whether the client must resync, and entries
+        (the full board when resyncing)
+    """
+    current = published_generation(GLOBAL_SCOPE)
+    oldest = (
+        LeaderboardChangeSet.objects.order_by("version")
+        .values_list("version", "previous_version")
+        .first()
+    )
+    # Versions from the one the oldest retained change set was diffed against
+    # can be served; league generations share the id sequence, so that is not
+    # simply its version minus one
+    if current is None or oldest is None or version is None:
+        return {"version": current, "full_resync": True, "entries": global_board()}
+    oldest_version, previous_version = oldest
+    if version < (oldest_version if previous_version is None else previous_version):
+        return {"version": current, "full_resync": True, "entries": global_board()}
+
+    changed = LeaderboardChange.objects.filter(
+        change_set__version__gt=version, change_set__version__lte=current
+    ).values("profile_id")
+    entries = LeaderboardEntry.objects.filter(
+        generation_id=current, profile_id__in=changed
+    )
+    return {
+        "version": current,
+        "full_resync": False,
+        "entries": _global_entries(entries),
+    }
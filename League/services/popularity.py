@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+from League.models import Prediction, TeamPickCount
+
+
+def pick_distribution(league_id):
+    """
+    Share of predictions that picked each team in a league.
+
+    Reads the maintained counters (one indexed query) instead of grouping
+    every prediction.
+
+    Returns:
+        dict: league id, total picks and per-team counts and percentages
+    """
+    counts = list(
+        TeamPickCount.objects.filter(league_id=league_id, pick_count__gt=0)
+        .order_by("-pick_count", "team_id")
+        .values("team_id", "team__name", "pick_count")
+    )
+    total = sum(entry["pick_count"] for entry in counts)
+    for entry in counts:
+        entry["percentage"] = round(100 * entry["pick_count"] / total, 2)
+
+    return {"league": league_id, "total": total, "teams": counts}
+
+
+def rebuild_pick_counts():
+    """
+    Recompute every counter from the predictions table.
+
+    Returns:
+        int: Total picks counted
+    """
+    picks = (
+        Prediction.objects.filter(predicted_team__isnull=False)
+        .values_list("league_id", "predicted_team_id")
+        .annotate(picks=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        TeamPickCount.objects.all().delete()
+        TeamPickCount.objects.bulk_create(
+            TeamPickCount(league_id=league_id, team_id=team_id, pick_count=count)
+            for league_id, team_id, count in picks
+        )
+    return TeamPickCount.objects.aggregate(total=Sum("pick_count"))["total"] or 0
@@ -0,0 +1,237 @@
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from accounts.models import Profile
+from Elmosliga.metrics import cache_lookup
+from League.models import PositionPoints, Prediction, ProbabilitySet
+
+# A stored projection never changes once computed, see store_projection
+PROJECTION_CACHE_TIMEOUT = None
+
+
+def _projection_key(version):
+    return f"leaderboard:projection:{version}"
+
+
+def _positions(sorted_ids, values):
+    """Index of each value in ``sorted_ids``, and a mask of the values found"""
+    index = np.searchsorted(sorted_ids, values)
+    if not len(sorted_ids):
+        return index, np.zeros(len(values), dtype=bool)
+    found = sorted_ids[np.minimum(index, len(sorted_ids) - 1)] == values
+    return index, found
+
+
+def sample_team_points(probabilities, position_points, simulations, rng):
+    """
+    Sample finishing orders for one league and score every team.
+
+    Positions are filled in order; at each one a team is drawn among those
+    not yet placed, weighted by its probability of finishing there.
+
+    Args:
+        probabilities: (teams, positions) array of finishing probabilities
+        position_points: (positions,) array of points per position
+        simulations: number of seasons to sample
+        rng: numpy Generator
+
+    Returns:
+        (simulations, teams) int32 array of points per team
+    """
+    teams = probabilities.shape[0]
+    team_points = np.zeros((simulations, teams), dtype=np.int32)
+    unplaced = np.ones((simulations, teams), dtype=bool)
+    rows = np.arange(simulations)
+
+    for position, points in enumerate(position_points):
+        weights = unplaced * probabilities[:, position]
+        totals = weights.sum(axis=1)
+        draws = rng.random(simulations) * totals
+        chosen = (weights.cumsum(axis=1) < draws[:, None]).sum(axis=1)
+        chosen = np.minimum(chosen, teams - 1)
+
+        placed = totals > 0
+        team_points[rows[placed], chosen[placed]] += points
+        unplaced[rows[placed], chosen[placed]] = False
+
+    return team_points
+
+
+def _league_inputs(league_id, teams):
+    """Probability matrix and points vector for one league's uploaded data"""
+    position_points = np.array(
+        list(
+            PositionPoints.objects.filter(league_id=league_id)
+            .order_by("position")
+            .values_list("points", flat=True)
+        ),
+        dtype=np.int32,
+    )
+    team_ids = np.array(sorted(int(team_id) for team_id in teams), dtype=np.int64)
+    probabilities = np.zeros((len(team_ids), len(position_points)))
+    for row, team_id in enumerate(team_ids):
+        values = teams[str(team_id)][: len(position_points)]
+        probabilities[row, : len(values)] = values
+    return team_ids, probabilities, position_points
+
+
+def _competition_ranks(totals):
+    """Rank every profile in every simulation: 1 + number strictly ahead"""
+    ranks = np.empty_like(totals)
+    count = totals.shape[1]
+    for row, scores in enumerate(totals):
+        ordered = np.sort(scores)
+        ranks[row] = count - np.searchsorted(ordered, scores, side="right") + 1
+    return ranks
+
+
+def _simulate_totals(
+    probability_set, simulated, profile_ids, base, simulations, rng, chunk_size
+):
+    """
+    Sample ``simulations`` seasons and total every profile's points in each.
+
+    The prediction matrix (profiles x leagues -> team) is read one chunk of
+    leagues at a time.
+
+    Returns:
+        (simulations, profiles) int32 array of total points
+    """
+    totals = np.tile(base, (simulations, 1))
+
+    for start in range(0, len(simulated), chunk_size):
+        chunk = simulated[start:start + chunk_size]
+        picks = np.array(
+            list(
+                Prediction.objects.filter(
+                    league_id__in=chunk, predicted_team__isnull=False
+                ).values_list("league_id", "profile_id", "predicted_team_id")
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+
+        for league_id in chunk:
+            team_ids, probabilities, position_points = _league_inputs(
+                league_id, probability_set.data[str(league_id)]
+            )
+            if not len(team_ids) or not len(position_points):
+                continue
+            team_points = sample_team_points(
+                probabilities, position_points, simulations, rng
+            )
+
+            league_picks = picks[picks[:, 0] == league_id]
+            team_index, known_team = _positions(team_ids, league_picks[:, 2])
+            profile_index, known_profile = _positions(profile_ids, league_picks[:, 1])
+            known = known_team & known_profile
+            # One prediction per profile and league, so plain fancy-index add is safe
+            totals[:, profile_index[known]] += team_points[:, team_index[known]]
+
+    return totals
+
+
+def project(probability_set, chunk_size=5, batch_size=250):
+    """
+    Monte Carlo projection of every profile's final total and rank.
+
+    Seasons are simulated ``batch_size`` at a time, reading the predictions
+    one chunk of leagues at a time, and only each batch's ranks are kept:
+    memory is bounded by ``simulations x profiles`` ranks in the narrowest
+    integer type plus one batch of totals. Leagues outside the probability
+    set count with their stored points. Profiles created while it runs are
+    left out.
+
+    Returns:
+        list of dicts ordered by expected points, highest first
+    """
+    rng = np.random.default_rng(probability_set.pk)
+    simulations = probability_set.simulations
+    simulated = sorted(int(league_id) for league_id in probability_set.data)
+
+    profiles = list(
+        Profile.objects.order_by("id").values(
+            "id", "user__email", "first_name", "last_name", "image"
+        )
+    )
+    profile_ids = np.array([profile["id"] for profile in profiles], dtype=np.int64)
+
+    settled = dict(
+        Prediction.objects.exclude(league_id__in=simulated)
+        .values_list("profile_id")
+        .annotate(points=Sum("points"))
+        .order_by()
+    )
+    base = np.array([settled.get(pk, 0) for pk in profile_ids], dtype=np.int32)
+
+    ranks = np.empty(
+        (simulations, len(profiles)), dtype=np.min_scalar_type(len(profiles))
+    )
+    points_sum = np.zeros(len(profiles), dtype=np.int64)
+    for start in range(0, simulations, batch_size):
+        batch = min(batch_size, simulations - start)
+        totals = _simulate_totals(
+            probability_set, simulated, profile_ids, base, batch, rng, chunk_size
+        )
+        ranks[start:start + batch] = _competition_ranks(totals)
+        points_sum += totals.sum(axis=0)
+
+    expected_points = points_sum / simulations
+    expected_rank = ranks.mean(axis=0)
+    p10, p50, p90 = np.percentile(ranks, [10, 50, 90], axis=0, method="nearest")
+    win_probability = (ranks == 1).mean(axis=0)
+
+    for index, profile in enumerate(profiles):
+        profile.update(
+            expected_points=round(float(expected_points[index]), 2),
+            expected_rank=round(float(expected_rank[index]), 2),
+            rank_p10=int(p10[index]),
+            rank_p50=int(p50[index]),
+            rank_p90=int(p90[index]),
+            win_probability=round(float(win_probability[index]), 4),
+        )
+    profiles.sort(key=lambda profile: profile["expected_points"], reverse=True)
+    return profiles
+
+
+def store_projection(probability_set):
+    """
+    Run the projection for ``probability_set`` and store it on the set.
+
+    Only ever run by the ``project_scores`` command, outside any request:
+    a full simulation outlasts the web workers' request timeout.
+    """
+    projection = project(probability_set)
+    ProbabilitySet.objects.filter(pk=probability_set.pk).update(
+        projection=projection, projected_at=timezone.now()
+    )
+    cache.set(_projection_key(probability_set.pk), projection, PROJECTION_CACHE_TIMEOUT)
+    return projection
+
+
+def current_projection():
+    """
+    Projection of the newest probability set that has been simulated.
+
+    Never simulates on the caller's behalf: a set is only served once
+    store_projection has run for it.
+
+    Returns:
+        tuple: (probability set or None, list of projected entries or None
+        while no uploaded set has been simulated yet)
+    """
+    sets = ProbabilitySet.objects.defer("data", "projection")
+    probability_set = sets.filter(projected_at__isnull=False).first()
+    if probability_set is None:
+        return sets.first(), None
+
+    key = _projection_key(probability_set.pk)
+    projection = cache_lookup("projection", cache.get(key))
+    if projection is None:
+        projection = (
+            ProbabilitySet.objects.filter(pk=probability_set.pk)
+            .values_list("projection", flat=True)
+            .get()
+        )
+        cache.set(key, projection, PROJECTION_CACHE_TIMEOUT)
+    return probability_set, projection
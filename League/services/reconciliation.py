@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce
+from League.models import League, Prediction
+from League.services.scoring import prediction_points, refresh_ranks
+
+
+def drifted_predictions(league_id):
+    """Predictions in a league whose stored points disagree with the standings"""
+    return (
+        Prediction.objects.filter(league_id=league_id)
+        .annotate(expected=prediction_points())
+        .filter(~Q(points=F("expected")))
+    )
+
+
+def league_drift(league_id):
+    """
+    Compare stored and expected points for a league in one aggregate query.
+
+    Returns:
+        dict: league id, predictions, mismatches and total absolute drift
+    """
+    report = (
+        Prediction.objects.filter(league_id=league_id)
+        .annotate(expected=prediction_points())
+        .aggregate(
+            predictions=Count("id"),
+            mismatches=Count("id", filter=~Q(points=F("expected"))),
+            drift=Coalesce(Sum(Abs(F("points") - F("expected"))), Value(0)),
+        )
+    )
+    report["league"] = league_id
+    return report
+
+
+def reconcile(league_ids=None):
+    """Drift report for every league (or the given ones), one query each"""
+    leagues = League.objects.order_by("id").values_list("id", flat=True)
+    if league_ids:
+        leagues = leagues.filter(id__in=league_ids)
+    return [league_drift(league_id) for league_id in leagues]
+
+
+def repair_league(league_id, batch_size=1000):
+    """
+    Rewrite drifted points in batches, entirely inside the database.
+
+    Each batch is an ``UPDATE ... WHERE id IN (SELECT ... LIMIT n)`` in its
+    own transaction, so large repairs never hold one long write lock.
+
+    Returns:
+        int: Number of predictions repaired
+    """
+    repaired = 0
+    while True:
+        batch = drifted_predictions(league_id).values("pk")[:batch_size]
+        with transaction.atomic():
+            updated = Prediction.objects.filter(pk__in=Subquery(batch)).update(
+                points=prediction_points()
+            )
+        repaired += updated
+        if updated < batch_size:
+            break
+
+    if repaired:
+        refresh_ranks(league_id)
+    return repaired
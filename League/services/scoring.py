@@ -1,32 +1,195 @@
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery, Value, Window
+from django.db.models.functions import Coalesce, Rank
+from Elmosliga.metrics import PREDICTIONS_RESCORED, SCORING_DURATION
+from League.models import League, LeagueResult, PositionPoints, Prediction, Standing
+from League.services.leaderboard import publish, schedule_publish
+
+
+def standing_points(league_ref="league_id", team_ref=None):
+    """
+    Standings annotated with the points their position is worth.
+
+    The standings table is joined to the league's points table on
+    (league, position), so a team's score is one lookup regardless of how
+    many positions the league awards.
+
+    Args:
+        league_ref: expression (or OuterRef) selecting the league
+        team_ref: optional expression (or OuterRef) selecting one team
+
+    Returns:
+        QuerySet of Standing rows with a ``points`` annotation
+    """
+    points = PositionPoints.objects.filter(
+        league_id=OuterRef("league_id"), position=OuterRef("position")
+    ).values("points")[:1]
+
+    standings = Standing.objects.filter(league_id=league_ref)
+    if team_ref is not None:
+        standings = standings.filter(team_id=team_ref)
+    return standings.annotate(points=Coalesce(Subquery(points), Value(0)))
+
+
+def prediction_points():
+    """
+    Expression for the points a Prediction row should hold.
+
+    The points of the standing its predicted team holds in its league, or 0
+    without one. Scoring writes it and reconciliation checks against it.
+    """
+    points = standing_points(OuterRef("league_id"), OuterRef("predicted_team_id"))
+    return Coalesce(Subquery(points.values("points")[:1]), Value(0))
+
+
+def points_table(result):
+    """
+    Return the compiled ``{team_id: points}`` map for a league result.
+
+    The map is built from one standings/points query, so scoring a whole
+    league never lazily loads a Team. It is deliberately not cached: only a
+    shared, write-versioned cache could stay correct across workers, and
+    the bulk scoring paths never call it.
+
+    Args:
+        result: LeagueResult object
+
+    Returns:
+        dict: team id -> points for every team with a scoring position
+    """
+    return dict(standing_points(result.league_id).values_list("team_id", "points"))
+
+
 def calculate_points(prediction, result):
     """
     Calculate points for a prediction based on the league result.
-    User predicts one team, and points are awarded based on where that team finished (1st-6th place).
-    Points come from the league settings which are unique per league.
-    
+    User predicts one team, and points are awarded based on where that team finished.
+    Points come from the league's points table, which is unique per league.
+
     Args:
         prediction: Prediction object with predicted_team
-        result: LeagueResult object with first_place through sixth_place
-    
+        result: LeagueResult object for the prediction's league
+
+    Returns:
+        int: Total points earned (0 if the team has no scoring position)
+    """
+    return points_table(result).get(prediction.predicted_team_id, 0)
+
+
+def score_league(league_id, team_ids=None):
+    """
+    Rescore every prediction in a league with a single UPDATE statement.
+
+    Args:
+        league_id: league to rescore
+        team_ids: optional iterable or subquery limiting the predicted teams
+
+    Returns:
+        int: Number of predictions updated
+    """
+    predictions = Prediction.objects.filter(league_id=league_id)
+    if team_ids is not None:
+        predictions = predictions.filter(predicted_team_id__in=team_ids)
+
+    with SCORING_DURATION.time(), transaction.atomic():
+        updated = predictions.update(points=prediction_points())
+        refresh_ranks(league_id)
+    PREDICTIONS_RESCORED.inc(updated)
+    return updated
+
+
+def _updates_from():
+    """Whether the backend runs ``UPDATE ... FROM`` (PostgreSQL, SQLite 3.33+)"""
+    if connection.vendor == "postgresql":
+        return True
+    return (
+        connection.vendor == "sqlite"
+        and connection.Database.sqlite_version_info >= (3, 33)
+    )
+
+
+def refresh_ranks(league_id):
+    """
+    Recompute the stored competition rank of every prediction in a league.
+
+    One ``UPDATE ... FROM (SELECT id, RANK() OVER (...))`` statement, run by
+    the scoring paths in the same transaction that changes the points, that
+    only writes the rows whose rank moved. Backends without ``UPDATE ...
+    FROM`` get the moved ranks written back with bulk_update instead.
+
+    Returns:
+        int: Number of ranks changed
+    """
+    ranking = (
+        Prediction.objects.filter(league_id=league_id)
+        .annotate(new_rank=Window(Rank(), order_by=F("points").desc()))
+        .order_by()
+    )
+    if not _updates_from():
+        moved = [
+            Prediction(pk=pk, rank=new_rank)
+            for pk, rank, new_rank in ranking.values_list("id", "rank", "new_rank")
+            if rank != new_rank
+        ]
+        Prediction.objects.bulk_update(moved, ["rank"], batch_size=1000)
+        return len(moved)
+
+    sql, params = ranking.values("id", "new_rank").query.sql_with_params()
+    table = connection.ops.quote_name(Prediction._meta.db_table)
+    distinct = "IS DISTINCT FROM" if connection.vendor == "postgresql" else "IS NOT"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET "rank" = ranked."new_rank" FROM ({sql}) AS ranked '
+            f'WHERE {table}."id" = ranked."id" '
+            f'AND {table}."rank" {distinct} ranked."new_rank"',
+            params,
+        )
+        return cursor.rowcount
+
+
+def rescore_positions(league_id, positions):
+    """
+    Rescore only the predictions on teams standing at ``positions``.
+
+    Used when a league's points table is edited: predictions on teams whose
+    position kept its value are left untouched.
+
+    Returns:
+        int: Number of predictions updated
+    """
+    team_ids = Standing.objects.filter(
+        league_id=league_id, position__in=positions
+    ).values("team_id")
+    updated = score_league(league_id, team_ids=team_ids)
+    schedule_publish(league_id)
+    return updated
+
+
+def reset_league(league_id):
+    """
+    Clear a league's scoring after its result is removed.
+
+    Derived standings are dropped and every
+    scored prediction is zeroed (and its rank reset) with one UPDATE, all
+    in one transaction.
+
     Returns:
-        int: Total points earned (0 if team didn't finish in top 6)
-    """
-    league = prediction.league
-    predicted_team = prediction.predicted_team
-    
-    # Check which position the predicted team finished in
-    if predicted_team == result.first_place:
-        return league.first_place_points
-    elif predicted_team == result.second_place:
-        return league.second_place_points
-    elif predicted_team == result.third_place:
-        return league.third_place_points
-    elif predicted_team == result.fourth_place:
-        return league.fourth_place_points
-    elif predicted_team == result.fifth_place:
-        return league.fifth_place_points
-    elif predicted_team == result.sixth_place:
-        return league.sixth_place_points
-    else:
-        # Team didn't finish in top 6
-        return 0
\ No newline at end of file
+        int: Number of predictions reset
+    """
+    with transaction.atomic():
+        # The result went with its league: nothing is left to reset or publish
+        if not League.objects.filter(pk=league_id).exists():
+            return 0
+        # A replacement result saved in the same transaction has already rescored
+        if LeagueResult.objects.filter(league_id=league_id).exists():
+            return 0
+
+        Standing.objects.filter(league_id=league_id).delete()
+        # With everyone on zero, everyone shares first place
+        reset = (
+            Prediction.objects.filter(league_id=league_id)
+            .exclude(points=0, rank=1)
+            .update(points=0, rank=1)
+        )
+    publish([league_id])
+    return reset
@@ -0,0 +1,104 @@
+from django.db.models import Case, Count, IntegerField, Value, When
+from League.models import PositionPoints, Prediction
+
+
+def pick_histogram(league_id):
+    """
+    Number of predictions per predicted team, from one GROUP BY query.
+
+    Returns:
+        dict: team id -> pick count (None for predictions without a team)
+    """
+    return dict(
+        Prediction.objects.filter(league_id=league_id)
+        .values_list("predicted_team_id")
+        .annotate(picks=Count("id"))
+        .order_by()
+    )
+
+
+def simulate_standings(league_id, team_ids, top=10):
+    """
+    Preview a league's scores for hypothetical standings without saving them.
+
+    Every prediction picks one team, so scores only depend on how many
+    profiles picked each team: the distribution is derived from the pick
+    histogram and costs the same however many users have predicted. The
+    top-N query only reads predictions on teams whose points can reach the
+    top N.
+
+    Args:
+        league_id: league to simulate
+        team_ids: team ids in finishing order (1st first)
+        top: number of leaderboard entries to return
+
+    Returns:
+        dict: prediction count, points distribution and top-N leaderboard
+    """
+    position_points = dict(
+        PositionPoints.objects.filter(
+            league_id=league_id, position__lte=len(team_ids)
+        ).values_list("position", "points")
+    )
+    team_points = {
+        team_id: position_points.get(position, 0)
+        for position, team_id in enumerate(team_ids, start=1)
+    }
+
+    distribution = {}
+    for team_id, picks in pick_histogram(league_id).items():
+        points = team_points.get(team_id, 0)
+        distribution[points] = distribution.get(points, 0) + picks
+    distribution = sorted(distribution.items(), reverse=True)
+
+    # Competition rank of a score is one plus everyone strictly above it;
+    # the top-N entries all score at least ``cutoff``
+    ranks, above, cutoff = {}, 0, 0
+    for points, count in distribution:
+        ranks[points] = above + 1
+        above += count
+        if above - count < top:
+            cutoff = points
+
+    predictions = Prediction.objects.filter(league_id=league_id)
+    if cutoff > 0:
+        # Only predictions on teams that can reach the top are sorted
+        predictions = predictions.filter(
+            predicted_team_id__in=[
+                team_id for team_id, points in team_points.items() if points >= cutoff
+            ]
+        )
+    leaderboard = list(
+        predictions
+        .annotate(
+            points_if=Case(
+                *[
+                    When(predicted_team_id=team_id, then=Value(points))
+                    for team_id, points in team_points.items()
+                ],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("-points_if", "id")
+        .values(
+            "profile__id",
+            "profile__user__email",
+            "profile__first_name",
+            "profile__last_name",
+            "predicted_team__name",
+            "points_if",
+        )[:top]
+    )
+    for entry in leaderboard:
+        entry["points"] = entry.pop("points_if")
+        entry["rank"] = ranks[entry["points"]]
+
+    return {
+        "league": league_id,
+        "predictions": above,
+        "distribution": [
+            {"points": points, "count": count} for points, count in distribution
+        ],
+        "leaderboard": leaderboard,
+    }
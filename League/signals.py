@@ -1,22 +1,150 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from League.models import LeagueResult, Prediction
-from League.services.scoring import calculate_points
+from accounts.models import Profile
+from League.models import (
+    League,
+    LeagueResult,
+    PositionPoints,
+    Prediction,
+    RequestProfile,
+    Standing,
+    TeamPickCount,
+)
+from League.services.leaderboard import (
+    join_global_board,
+    join_league_board,
+    schedule_publish,
+)
+from League.services.scoring import (
+    rescore_positions,
+    reset_league,
+    score_league,
+)
 
 @receiver(post_save, sender=LeagueResult)
 def recalculate_points(sender, instance, **kwargs):
     """
     Recalculate points for all predictions when league result is saved.
-    Uses bulk_update for better performance.
+    Runs as one set-based UPDATE joined against the standings table; the
+    leaderboards are republished once it commits.
     """
-    predictions = Prediction.objects.filter(league=instance.league).select_related(
-        'predicted_team'
-    )
-
-    predictions_to_update = []
-    for prediction in predictions:
-        prediction.points = calculate_points(prediction, instance)
-        predictions_to_update.append(prediction)
-    
-    if predictions_to_update:
-        Prediction.objects.bulk_update(predictions_to_update, ['points'])
+    score_league(instance.league_id)
+    schedule_publish(instance.league_id)
+
+
+@receiver(post_delete, sender=LeagueResult)
+def reset_points(sender, instance, **kwargs):
+    """Zero the league's points once the result deletion has committed"""
+    league_id = instance.league_id
+    transaction.on_commit(lambda: reset_league(league_id))
+
+
+@receiver(post_save, sender=PositionPoints)
+def rescore_repriced_position(sender, instance, raw=False, **kwargs):
+    """A points row edited directly (e.g. positions beyond sixth in the admin)"""
+    if not raw:
+        rescore_positions(instance.league_id, [instance.position])
+
+
+@receiver(post_delete, sender=PositionPoints)
+def rescore_unpriced_position(sender, instance, **kwargs):
+    """A points row deleted: predictions on that position now score nothing"""
+    league_id, position = instance.league_id, instance.position
+
+    def rescore():
+        # Nothing to do when the row went with its league
+        if League.objects.filter(pk=league_id).exists():
+            rescore_positions(league_id, [position])
+
+    transaction.on_commit(rescore)
+
+
+@receiver(post_save, sender=Standing)
+def rescore_placed_team(sender, instance, raw=False, **kwargs):
+    """A standing edited directly (e.g. positions beyond sixth in the admin)"""
+    if raw:
+        return
+    team_ids = {instance.team_id, getattr(instance, "_loaded_team_id", None)} - {None}
+    score_league(instance.league_id, team_ids=list(team_ids))
+    schedule_publish(instance.league_id)
+
+
+@receiver(post_delete, sender=Standing)
+def rescore_unplaced_team(sender, instance, origin=None, **kwargs):
+    """A standing deleted directly: predictions on its team now score nothing"""
+    # Bulk deletes come from LeagueResult.sync_standings, whose result save
+    # rescores the whole league, or from a cascade that removes the predictions
+    if origin is instance:
+        score_league(instance.league_id, team_ids=[instance.team_id])
+        schedule_publish(instance.league_id)
+
+
+@receiver(post_save, sender=Prediction)
+def count_pick(sender, instance, raw=False, **kwargs):
+    """Move the pick counters when a prediction's team is set or changed"""
+    previous = getattr(instance, "_loaded_team_id", None)
+    current = instance.predicted_team_id
+    if raw or previous == current:
+        return
+
+    if previous is not None:
+        TeamPickCount.adjust(instance.league_id, previous, -1)
+    if current is not None:
+        TeamPickCount.adjust(instance.league_id, current, 1)
+    instance._loaded_team_id = current
+
+
+@receiver(post_save, sender=Prediction)
+def join_new_prediction(sender, instance, created, raw=False, **kwargs):
+    """A new prediction joins its league's published board once it commits"""
+    if created and not raw:
+        entry = (
+            instance.league_id,
+            instance.profile_id,
+            instance.points,
+            instance.predicted_team_id,
+        )
+        transaction.on_commit(lambda: join_league_board(*entry))
+
+
+@receiver(post_save, sender=Profile)
+def join_new_profile(sender, instance, created, raw=False, **kwargs):
+    """A new profile joins the published global board once it commits"""
+    if created and not raw:
+        profile_id = instance.pk
+        transaction.on_commit(lambda: join_global_board(profile_id))
+
+
+@receiver(post_delete, sender=Prediction)
+def uncount_pick(sender, instance, **kwargs):
+    """Release the pick when a prediction is deleted"""
+    team_id = getattr(instance, "_loaded_team_id", instance.predicted_team_id)
+    if team_id is not None:
+        TeamPickCount.objects.filter(team_id=team_id, pick_count__gt=0).update(
+            pick_count=F("pick_count") - 1
+        )
+
+
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_files(sender, instance, **kwargs):
+    """Remove a deleted profile's files from storage once the delete commits"""
+    def delete_files():
+        for file in (instance.stats, instance.collapsed):
+            if file:
+                file.delete(save=False)
+
+    transaction.on_commit(delete_files)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Apply the SQLite profile's pragmas to every new connection when enabled"""
+    if connection.vendor != "sqlite" or not settings.SQLITE_TUNING:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
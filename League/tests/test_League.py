@@ -3,7 +3,7 @@ Tests for League models: League, Team, Prediction, LeagueResult
 """
 import pytest
 from django.core.exceptions import ValidationError
-from League.models import League, Team, Prediction, LeagueResult
+from League.models import League, Team, Prediction, LeagueResult, Standing, TeamPickCount
 
 
 @pytest.mark.unit
@@ -219,4 +219,68 @@ class TestLeagueResultModel:
 
     def test_league_result_str_representation(self, league_result):
         """Test result string representation"""
-        assert league_result.league.name in str(league_result)
\ No newline at end of file
+        assert league_result.league.name in str(league_result)
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestStandingModel:
+    """Test Standing validation"""
+
+    def test_missing_team_is_field_error(self, league):
+        """Test that a standing without a team reports the field, not a crash"""
+        with pytest.raises(ValidationError) as exc_info:
+            Standing(league=league, position=7).full_clean()
+
+        assert "team" in exc_info.value.message_dict
+
+    def test_team_from_other_league(self, league, league_with_custom_points, team_factory):
+        """Test that a team must belong to the standing's league"""
+        other = team_factory("Other Team", league_with_custom_points)
+
+        with pytest.raises(ValidationError):
+            Standing(league=league, position=7, team=other).full_clean()
+
+
+@pytest.mark.unit
+@pytest.mark.prediction
+class TestTeamPickCount:
+    """Test the pick counters maintained by prediction writes"""
+
+    def _count(self, team):
+        return TeamPickCount.objects.get(team=team).pick_count
+
+    def test_prediction_increments_counter(self, prediction, teams):
+        """Test that saving a prediction counts its team"""
+        assert self._count(teams[0]) == 1
+
+    def test_changing_team_moves_the_pick(self, prediction, teams):
+        """Test that changing the predicted team moves the count"""
+        prediction = Prediction.objects.get(pk=prediction.pk)
+        prediction.predicted_team = teams[1]
+        prediction.save()
+
+        assert self._count(teams[0]) == 0
+        assert self._count(teams[1]) == 1
+
+    def test_resaving_does_not_double_count(self, prediction, teams):
+        """Test that saving without changing the team leaves the counter alone"""
+        prediction.save()
+        Prediction.objects.get(pk=prediction.pk).save()
+
+        assert self._count(teams[0]) == 1
+
+    def test_drifted_counter_is_not_decremented_below_zero(self, prediction, teams):
+        """Test that moving a pick off a counter already at zero leaves it there"""
+        TeamPickCount.objects.filter(team=teams[0]).update(pick_count=0)
+        prediction = Prediction.objects.get(pk=prediction.pk)
+        prediction.predicted_team = teams[1]
+        prediction.save()
+
+        assert self._count(teams[0]) == 0
+        assert self._count(teams[1]) == 1
+
+    def test_deleting_prediction_releases_pick(self, prediction, teams):
+        """Test that deleting a prediction decrements its team"""
+        prediction.delete()
+
+        assert self._count(teams[0]) == 0
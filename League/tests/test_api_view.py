@@ -4,8 +4,11 @@ Tests for League API endpoints.
 import pytest
 from django.urls import reverse
 from rest_framework import status
+from django.db import connection
 from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 from League.models import Prediction, LeagueResult
+from League.services.simulation import simulate_standings
 
 
 @pytest.mark.integration
@@ -42,6 +45,47 @@ class TestLeagueListAPI:
         assert response.data[0]["name"] == league.name
 
 
+@pytest.mark.integration
+@pytest.mark.prediction
+class TestPickDistributionAPI:
+    """Test the per-league pick popularity endpoint"""
+
+    def test_pick_distribution(
+        self, authenticated_client, multiple_predictions, league, teams
+    ):
+        """Test that each picked team reports its share of predictions"""
+        url = reverse("pick-distribution", kwargs={"league_id": league.id})
+        response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == 2
+        assert {entry["team_id"]: entry["percentage"] for entry in response.data["teams"]} == {
+            teams[0].id: 50.0,
+            teams[1].id: 50.0,
+        }
+
+    def test_pick_distribution_counts_api_predictions(
+        self, authenticated_client, league, teams
+    ):
+        """Test that predictions made through the API are counted"""
+        authenticated_client.post(
+            reverse("prediction-create"),
+            {"league": league.id, "predicted_team": teams[2].id},
+        )
+
+        url = reverse("pick-distribution", kwargs={"league_id": league.id})
+        response = authenticated_client.get(url)
+
+        assert response.data["teams"] == [
+            {
+                "team_id": teams[2].id,
+                "team__name": teams[2].name,
+                "pick_count": 1,
+                "percentage": 100.0,
+            }
+        ]
+
+
 @pytest.mark.integration
 @pytest.mark.prediction
 class TestPredictionAPI:
@@ -184,6 +228,146 @@ class TestLeagueResultAPI:
         assert league_result.first_place == teams[1]
 
 
+@pytest.mark.integration
+@pytest.mark.league
+class TestWhatIfStandingsAPI:
+    """Test the admin what-if standings simulator"""
+
+    def _payload(self, league, teams, **extra):
+        data = {
+            "league": league.id,
+            "first_place": teams[1].id,
+            "second_place": teams[0].id,
+            "third_place": teams[2].id,
+            "fourth_place": teams[3].id,
+            "fifth_place": teams[4].id,
+            "sixth_place": teams[5].id,
+        }
+        data.update(extra)
+        return data
+
+    def test_simulate_distribution_and_leaderboard(
+        self, admin_client, multiple_predictions, league, teams
+    ):
+        """Test that hypothetical standings are scored without saving"""
+        url = reverse("result-simulate")
+        response = admin_client.post(url, self._payload(league, teams))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["predictions"] == 2
+        assert response.data["distribution"] == [
+            {"points": 20, "count": 1},
+            {"points": 15, "count": 1},
+        ]
+        leaderboard = response.data["leaderboard"]
+        assert [entry["points"] for entry in leaderboard] == [20, 15]
+        assert [entry["rank"] for entry in leaderboard] == [1, 2]
+        assert leaderboard[0]["predicted_team__name"] == teams[1].name
+
+        # Nothing was persisted
+        assert not LeagueResult.objects.filter(league=league).exists()
+        assert set(Prediction.objects.values_list("points", flat=True)) == {0}
+
+    def test_simulate_ties_share_rank(
+        self, admin_client, multiple_predictions, league, teams
+    ):
+        """Test that predictions on the same team share a rank"""
+        Prediction.objects.filter(pk=multiple_predictions[1].pk).update(
+            predicted_team=teams[0]
+        )
+
+        url = reverse("result-simulate")
+        response = admin_client.post(url, self._payload(league, teams, top=1))
+
+        assert response.data["distribution"] == [{"points": 15, "count": 2}]
+        assert len(response.data["leaderboard"]) == 1
+        assert response.data["leaderboard"][0]["rank"] == 1
+
+    def test_simulate_leaderboard_reads_top_teams_only(
+        self, multiple_predictions, league, teams
+    ):
+        """Test that the top-N query is limited to teams that can reach the top"""
+        order = [team.id for team in teams]
+
+        with CaptureQueriesContext(connection) as queries:
+            simulation = simulate_standings(league.id, order, top=1)
+
+        top_query = queries.captured_queries[-1]["sql"]
+        assert '"predicted_team_id" IN' in top_query
+        assert [entry["points"] for entry in simulation["leaderboard"]] == [20]
+
+    def test_simulate_rejects_duplicate_teams(self, admin_client, league, teams):
+        """Test that the same validation as results applies"""
+        url = reverse("result-simulate")
+        payload = self._payload(league, teams, second_place=teams[1].id)
+        response = admin_client.post(url, payload)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_simulate_as_regular_user(self, authenticated_client, league, teams):
+        """Test that regular users cannot simulate standings"""
+        url = reverse("result-simulate")
+        response = authenticated_client.post(url, self._payload(league, teams))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestPointsReconciliationAPI:
+    """Test the admin points reconciliation endpoint"""
+
+    def test_reconcile_lists_drifted_leagues(
+        self, admin_client, multiple_predictions, league_result
+    ):
+        """Test that only leagues with mismatches are reported"""
+        Prediction.objects.filter(pk=multiple_predictions[1].pk).update(points=0)
+
+        response = admin_client.get(reverse("points-reconcile"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert response.data[0]["league"] == league_result.league_id
+        assert response.data[0]["mismatches"] == 1
+
+    def test_reconcile_repair(self, admin_client, multiple_predictions, league_result):
+        """Test that POST repairs drifted points"""
+        Prediction.objects.update(points=0)
+
+        response = admin_client.post(reverse("points-reconcile"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["repaired"] == {league_result.league_id: 2}
+
+    def test_reconcile_league_filter(
+        self, admin_client, multiple_predictions, league_result, league_with_custom_points
+    ):
+        """Test that ?leagues limits the report to those leagues"""
+        Prediction.objects.update(points=0)
+
+        response = admin_client.get(
+            reverse("points-reconcile"), {"leagues": str(league_with_custom_points.id)}
+        )
+
+        assert response.status_code == 200
+        assert response.data == []
+
+    @pytest.mark.parametrize("leagues", ["", "1,abc", "1,,2", "-1"])
+    def test_reconcile_malformed_leagues(self, admin_client, leagues):
+        """Test that malformed league ids are rejected, not read as every league"""
+        get = admin_client.get(reverse("points-reconcile"), {"leagues": leagues})
+        post = admin_client.post(reverse("points-reconcile") + f"?leagues={leagues}")
+
+        assert get.status_code == post.status_code == 400
+        assert "error" in get.data
+
+    def test_reconcile_as_regular_user(self, authenticated_client):
+        """Test that regular users cannot reconcile points"""
+        response = authenticated_client.get(reverse("points-reconcile"))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
 @pytest.mark.integration
 @pytest.mark.league
 class TestLeaderboardAPI:
@@ -0,0 +1,89 @@
+"""
+Tests for the async read views.
+"""
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from League import async_views
+from League.services.leaderboard import publish
+
+
+def call_async(view, url, headers=None, **kwargs):
+    request = AsyncRequestFactory().get(url, headers=headers)
+    return async_to_sync(view.as_view())(request, **kwargs)
+
+
+READ_VIEWS = [
+    ("LeagueListView", "league-list", False),
+    ("TeamListView", "team-list", True),
+    ("PredictionListView", "prediction-list", False),
+    ("CheckPredictionView", "prediction-check", True),
+    ("LeaderboardView", "leaderboard-global", False),
+    ("LeagueLeaderboardView", "leaderboard-league", True),
+]
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestAsyncReadViews:
+    """Test that the async views answer like their sync counterparts"""
+
+    @pytest.mark.parametrize("view_name, url_name, by_league", READ_VIEWS)
+    def test_matches_sync_view(
+        self, authenticated_client, bearer, user, multiple_predictions, league_result,
+        league, view_name, url_name, by_league,
+    ):
+        """Test that each async view returns the sync view's payload"""
+        publish([league.id])
+        kwargs = {"league_id": league.id} if by_league else {}
+        url = reverse(url_name, kwargs=kwargs)
+
+        expected = authenticated_client.get(url).json()
+        response = call_async(getattr(async_views, view_name), url, bearer(user), **kwargs)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content) == expected
+
+    def test_unpublished_leaderboard_is_live(
+        self, bearer, user, multiple_predictions, league_result
+    ):
+        """Test that the async global board falls back to a live ranking"""
+        response = call_async(async_views.LeaderboardView, "/", bearer(user))
+
+        entries = json.loads(response.content)
+        assert [entry["rank"] for entry in entries] == [1, 2]
+
+    def test_requires_authentication(self, db):
+        """Test that anonymous requests get DRF's 401 body and challenge"""
+        response = call_async(async_views.LeagueListView, "/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert json.loads(response.content) == {
+            "detail": "Authentication credentials were not provided."
+        }
+        assert response["WWW-Authenticate"] == "Token"
+
+    def test_invalid_token_rejected(self, db):
+        """Test that a malformed JWT is refused"""
+        response = call_async(
+            async_views.LeagueListView, "/", {"Authorization": "Bearer not-a-token"}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert json.loads(response.content)["code"] == "token_not_valid"
+
+    def test_drf_token_authentication(self, user, prediction):
+        """Test that DRF tokens authenticate through the async lookup"""
+        token = Token.objects.create(user=user)
+
+        response = call_async(
+            async_views.PredictionListView, "/", {"Authorization": f"Token {token.key}"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [entry["id"] for entry in json.loads(response.content)] == [prediction.id]
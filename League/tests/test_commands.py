@@ -0,0 +1,216 @@
+"""
+Tests for League management commands.
+"""
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from League.management.commands import rescore_all
+from League.models import Prediction, Standing, TeamPickCount
+
+
+def run_command(*args, **kwargs):
+    out = StringIO()
+    call_command(*args, stdout=out, **kwargs)
+    return out.getvalue()
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestRescoreAllCommand:
+    """Test the rescore_all command"""
+
+    def test_rescore_all_fixes_points(
+        self, multiple_predictions, league_result, tmp_path
+    ):
+        """Test that every league's predictions are rescored"""
+        Prediction.objects.update(points=0)
+
+        output = run_command(
+            "rescore_all", workers=0, checkpoint=str(tmp_path / "checkpoint")
+        )
+
+        points = sorted(Prediction.objects.values_list("points", flat=True))
+        assert points == [15, 20]
+        assert "predictions/sec" in output
+
+    def test_rescore_all_league_filter(
+        self, multiple_predictions, league_result, league_with_custom_points, tmp_path
+    ):
+        """Test that --leagues limits which leagues are rescored"""
+        output = run_command(
+            "rescore_all",
+            leagues=[league_with_custom_points.id],
+            workers=0,
+            checkpoint=str(tmp_path / "checkpoint"),
+        )
+
+        assert f"league {league_with_custom_points.id}:" in output
+        assert f"league {league_result.league_id}:" not in output
+
+    def test_rescore_all_resume_skips_finished_leagues(
+        self, multiple_predictions, league_result, tmp_path
+    ):
+        """Test that --resume skips leagues recorded in the checkpoint"""
+        checkpoint = tmp_path / "checkpoint"
+        checkpoint.write_text(f"{league_result.league_id}\n")
+        Prediction.objects.update(points=0)
+
+        output = run_command(
+            "rescore_all", workers=0, checkpoint=str(checkpoint), resume=True
+        )
+
+        assert output.strip() == "Nothing to rescore"
+        assert set(Prediction.objects.values_list("points", flat=True)) == {0}
+
+    def test_rescore_all_resume_publishes_finished_leagues(
+        self, multiple_predictions, league_result, league_with_custom_points,
+        tmp_path, monkeypatch,
+    ):
+        """Test that a resumed run also publishes leagues finished before it"""
+        published = []
+        monkeypatch.setattr(rescore_all, "publish", published.append)
+        checkpoint = tmp_path / "checkpoint"
+        checkpoint.write_text(f"{league_result.league_id}\n")
+
+        run_command("rescore_all", workers=0, checkpoint=str(checkpoint), resume=True)
+
+        assert published == [
+            sorted([league_result.league_id, league_with_custom_points.id])
+        ]
+        assert not checkpoint.exists()
+
+    def test_rescore_all_inline_on_sqlite(
+        self, multiple_predictions, league_result, tmp_path
+    ):
+        """Test that SQLite rescores inline by default and refuses workers"""
+        Prediction.objects.update(points=0)
+
+        run_command("rescore_all", checkpoint=str(tmp_path / "checkpoint"))
+
+        assert sorted(Prediction.objects.values_list("points", flat=True)) == [15, 20]
+        with pytest.raises(CommandError, match="SQLite"):
+            run_command("rescore_all", workers=2, checkpoint=str(tmp_path / "checkpoint"))
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestReconcilePointsCommand:
+    """Test the reconcile_points command"""
+
+    def test_reconcile_reports_clean_leagues(
+        self, multiple_predictions, league_result
+    ):
+        """Test that correctly scored leagues report no drift"""
+        output = run_command("reconcile_points")
+
+        assert "reconcile" in output
+        assert "drifted" not in output
+
+    def test_reconcile_reports_drift_without_repairing(
+        self, multiple_predictions, league_result
+    ):
+        """Test that drift is reported but left alone without --repair"""
+        Prediction.objects.filter(pk=multiple_predictions[0].pk).update(points=3)
+
+        output = run_command("reconcile_points")
+
+        assert "1 of 2 predictions off by 17 points" in output
+        multiple_predictions[0].refresh_from_db()
+        assert multiple_predictions[0].points == 3
+
+    def test_reconcile_repair_in_batches(self, multiple_predictions, league_result):
+        """Test that --repair rewrites every drifted prediction"""
+        Prediction.objects.update(points=0)
+
+        output = run_command("reconcile_points", repair=True, batch_size=1)
+
+        assert "Repaired 2 predictions" in output
+        points = sorted(Prediction.objects.values_list("points", flat=True))
+        assert points == [15, 20]
+
+    def test_reconcile_league_without_result_expects_zero(
+        self, multiple_predictions, league
+    ):
+        """Test that leagues without a result expect zero points"""
+        Prediction.objects.update(points=5)
+
+        run_command("reconcile_points", repair=True)
+
+        assert set(Prediction.objects.values_list("points", flat=True)) == {0}
+
+    def test_reconcile_agrees_with_scoring_without_result(
+        self, multiple_predictions, league, teams
+    ):
+        """Test that a standing entered without a result is not reported as drift"""
+        Standing.objects.create(league=league, position=1, team=teams[0])
+
+        output = run_command("reconcile_points")
+
+        assert Prediction.objects.filter(points=20).count() == 1
+        assert "drifted" not in output
+
+
+@pytest.mark.integration
+@pytest.mark.prediction
+class TestRebuildPickCountsCommand:
+    """Test the rebuild_pick_counts command"""
+
+    def test_rebuild_recovers_counts(self, multiple_predictions, teams):
+        """Test that counters are recomputed from predictions"""
+        TeamPickCount.objects.update(pick_count=7)
+
+        output = run_command("rebuild_pick_counts")
+
+        assert "2 picks" in output
+        counts = dict(TeamPickCount.objects.values_list("team_id", "pick_count"))
+        assert counts == {teams[0].id: 1, teams[1].id: 1}
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestLoadtestReadsCommand:
+    """Test the loadtest_reads command"""
+
+    def test_load_against_running_server(self, live_server, user, league, teams):
+        """Test that every path is hit and reported without errors"""
+        output = run_command(
+            "loadtest_reads",
+            url=f"{live_server.url}/league/",
+            email=user.email,
+            paths=["leagues/", "leaderboard/"],
+            requests=4,
+            concurrency=2,
+        )
+
+        lines = output.splitlines()
+        assert len(lines) == 2
+        assert all("req/s" in line and line.endswith("errors 0") for line in lines)
+
+    def test_uvicorn_required_to_serve(self, user, monkeypatch):
+        """Test that the serving mode needs uvicorn installed"""
+        monkeypatch.setattr(
+            "League.management.commands.loadtest_reads.importlib.util.find_spec",
+            lambda name: None,
+        )
+
+        with pytest.raises(CommandError, match="uvicorn"):
+            run_command("loadtest_reads")
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestBenchDbConnectionsCommand:
+    """Test the bench_db_connections command"""
+
+    def test_compares_connection_modes(self, user, league, teams):
+        """Test that per-request and persistent connections are both measured"""
+        output = run_command("bench_db_connections", requests=3, email=user.email)
+
+        assert "per-request: mean" in output
+        assert "CONN_MAX_AGE=600: mean" in output
+
+    def test_failing_endpoint_aborts(self, user):
+        """Test that a non-200 answer stops the benchmark"""
+        with pytest.raises(CommandError, match="404"):
+            run_command("bench_db_connections", requests=1, path="/league/missing/")
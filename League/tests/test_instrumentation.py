@@ -0,0 +1,89 @@
+"""
+Tests for per-request timing instrumentation.
+"""
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+from Elmosliga.middleware import RequestTimingMiddleware
+from League.models import Prediction
+
+
+@pytest.fixture
+def timed_client(settings, user):
+    """A fresh client, so its handler loads the middleware with timing on"""
+    settings.REQUEST_TIMING = True
+    settings.REQUEST_TIMING_SAMPLE_RATE = 1.0
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def server_timing(response):
+    """Server-Timing metrics as {name: (duration, description)}"""
+    metrics = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, duration, *desc = metric.split(";")
+        metrics[name] = (float(duration.split("=")[1]), desc[0] if desc else None)
+    return metrics
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestRequestTiming:
+    """Test the Server-Timing header and timing log line"""
+
+    def test_league_view_timed(self, timed_client, multiple_predictions, caplog):
+        """Test that queries, serializer and view time are reported"""
+        with caplog.at_level(logging.INFO, logger="Elmosliga.timing"):
+            response = timed_client.get(reverse("prediction-list"))
+
+        metrics = server_timing(response)
+        queries = int(re.search(r'"(\d+) queries"', metrics["db"][1]).group(1))
+        assert queries >= 1
+        assert metrics["view"][0] >= metrics["db"][0]
+        assert "serialize" in metrics
+
+        record = caplog.records[-1]
+        assert record.timing["path"] == reverse("prediction-list")
+        assert record.timing["queries"] == queries
+        assert "status=200" in record.getMessage()
+
+    def test_accounts_view_timed(self, timed_client):
+        """Test that views outside League are instrumented without changes"""
+        response = timed_client.get(reverse("accounts-v1:profile"))
+
+        assert "db" in server_timing(response)
+
+    def test_disabled_by_default(self, authenticated_client, league):
+        """Test that no header is added unless timing is enabled"""
+        response = authenticated_client.get(reverse("league-list"))
+
+        assert not response.has_header("Server-Timing")
+
+    def test_unsampled_requests_skipped(self, timed_client, settings, league):
+        """Test that requests outside the sample are not timed"""
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0.0
+
+        response = timed_client.get(reverse("league-list"))
+
+        assert not response.has_header("Server-Timing")
+
+    def test_async_queries_counted(self, settings, prediction):
+        """Test that async ORM queries are counted for async views"""
+        settings.REQUEST_TIMING = True
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1.0
+
+        async def view(request):
+            await Prediction.objects.filter(pk=prediction.pk).afirst()
+            return HttpResponse()
+
+        middleware = RequestTimingMiddleware(view)
+        response = async_to_sync(middleware)(AsyncRequestFactory().get("/"))
+
+        assert server_timing(response)["db"][1] == 'desc="1 queries"'
@@ -0,0 +1,575 @@
+"""
+Tests for published leaderboards.
+"""
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, AsyncRequestFactory
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework import status
+from accounts.models import Profile
+from League.models import (
+    LeaderboardChangeSet,
+    LeaderboardGeneration,
+    LeaderboardPointer,
+    Prediction,
+    RankSnapshot,
+)
+from League.services import events, history, leaderboard, scoring
+from League.services.events import event_stream
+from League.services.history import rank_movement
+from League.services.leaderboard import (
+    GLOBAL_SCOPE,
+    KEEP_CHANGE_SETS,
+    KEEP_GENERATIONS,
+    GLOBAL_KEYS,
+    changes_since,
+    columnar,
+    global_board,
+    join_global_board,
+    league_board,
+    league_scope,
+    publish,
+)
+from League.services.scoring import refresh_ranks
+from Elmosliga.renderers import ColumnarJSONRenderer
+from League import async_views
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestLeaderboardGenerations:
+    """Test double-buffered leaderboard publishing"""
+
+    def test_result_save_publishes_after_commit(
+        self, multiple_predictions, league, teams, django_capture_on_commit_callbacks
+    ):
+        """Test that saving a result publishes league and global boards"""
+        from League.models import LeagueResult
+
+        with django_capture_on_commit_callbacks(execute=True):
+            LeagueResult.objects.create(
+                league=league,
+                **{field: teams[i] for i, field in enumerate(LeagueResult.PLACE_FIELDS)},
+            )
+
+        scopes = set(LeaderboardPointer.objects.values_list("scope", flat=True))
+        assert scopes == {GLOBAL_SCOPE, league_scope(league.id)}
+
+    def test_readers_see_published_generation_only(
+        self, authenticated_client, multiple_predictions, league_result, league
+    ):
+        """Test that unpublished score changes stay invisible to readers"""
+        publish([league.id])
+        Prediction.objects.filter(pk=multiple_predictions[1].pk).update(points=50)
+        refresh_ranks(league.id)
+
+        response = authenticated_client.get(
+            reverse("leaderboard-league", kwargs={"league_id": league.id})
+        )
+        assert [entry["points"] for entry in response.data] == [20, 15]
+
+        publish([league.id])
+        response = authenticated_client.get(
+            reverse("leaderboard-league", kwargs={"league_id": league.id})
+        )
+        assert [entry["points"] for entry in response.data] == [50, 20]
+
+    def test_global_board_from_generation(
+        self, authenticated_client, multiple_predictions, league_result, league
+    ):
+        """Test that the global board is served with competition ranks"""
+        publish([league.id])
+
+        response = authenticated_client.get(reverse("leaderboard-global"))
+
+        assert response.status_code == status.HTTP_200_OK
+        top = response.data[0]
+        assert top["id"] == multiple_predictions[0].profile_id
+        assert top["total_points"] == 20
+        assert top["rank"] == 1
+        assert set(top) == {
+            "id",
+            "user__email",
+            "first_name",
+            "last_name",
+            "total_points",
+            "image",
+            "rank",
+        }
+
+    def test_new_profiles_and_predictions_join_published_boards(
+        self, multiple_predictions, league_result, league, teams,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test that sign-ups and new predictions join the boards without a publish"""
+        publish([league.id])
+        generations = LeaderboardGeneration.objects.count()
+        snapshots = RankSnapshot.objects.count()
+        change_sets = LeaderboardChangeSet.objects.count()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user = get_user_model().objects.create_user(
+                email="late@example.com", password="testpass123"
+            )
+        entries = {entry["id"]: entry for entry in global_board()}
+        assert entries[user.profile.pk]["total_points"] == 0
+        assert entries[user.profile.pk]["rank"] == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Prediction.objects.create(
+                profile=user.profile, league=league, predicted_team=teams[2]
+            )
+        board = league_board(league.id)
+        assert board[-1]["profile__id"] == user.profile.pk
+        assert board[-1]["rank"] == 3
+        assert board[-1]["predicted_team__name"] == teams[2].name
+
+        assert LeaderboardGeneration.objects.count() == generations
+        assert RankSnapshot.objects.count() == snapshots
+        assert LeaderboardChangeSet.objects.count() == change_sets
+
+    def test_join_skips_profiles_already_published(
+        self, multiple_predictions, league_result, league
+    ):
+        """Test that joining a board a publish already placed the profile on is a no-op"""
+        publish([league.id])
+
+        assert join_global_board(multiple_predictions[0].profile_id) is None
+        assert len(global_board()) == Profile.objects.count()
+
+    def test_old_generations_are_pruned(self, multiple_predictions, league_result, league):
+        """Test that only the newest generations are kept per scope"""
+        for _ in range(KEEP_GENERATIONS + 2):
+            publish([league.id])
+
+        assert (
+            LeaderboardGeneration.objects.filter(scope=GLOBAL_SCOPE).count()
+            == KEEP_GENERATIONS
+        )
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestStoredRanks:
+    """Test the rank column refreshed by scoring"""
+
+    def _ranks(self, predictions):
+        return [
+            Prediction.objects.get(pk=prediction.pk).rank for prediction in predictions
+        ]
+
+    def test_scoring_refreshes_ranks(self, multiple_predictions, league_result):
+        """Test that saving a result stores each prediction's league rank"""
+        assert self._ranks(multiple_predictions) == [1, 2]
+
+    def test_ties_share_rank(self, multiple_predictions, league_result, teams):
+        """Test competition ranking when two predictions score the same"""
+        Prediction.objects.filter(pk=multiple_predictions[1].pk).update(
+            predicted_team=teams[0]
+        )
+        league_result.save()
+
+        assert self._ranks(multiple_predictions) == [1, 1]
+
+    def test_only_moved_ranks_are_written(self, multiple_predictions, league_result, league):
+        """Test that a refresh rewrites only the predictions whose rank changed"""
+        assert refresh_ranks(league.id) == 0
+
+        Prediction.objects.filter(pk=multiple_predictions[1].pk).update(points=50)
+
+        assert refresh_ranks(league.id) == 2
+        assert self._ranks(multiple_predictions) == [2, 1]
+
+    def test_ranks_without_update_from(
+        self, monkeypatch, multiple_predictions, league_result, league
+    ):
+        """Test the bulk_update fallback for backends without UPDATE ... FROM"""
+        monkeypatch.setattr(scoring, "_updates_from", lambda: False)
+        Prediction.objects.filter(pk=multiple_predictions[1].pk).update(points=50)
+
+        assert refresh_ranks(league.id) == 2
+        assert self._ranks(multiple_predictions) == [2, 1]
+        assert refresh_ranks(league.id) == 0
+
+    def test_new_prediction_ranks_with_zero_scores(
+        self, multiple_predictions, league_result, league, teams, user_factory
+    ):
+        """Test that a late prediction is placed behind everyone who scored"""
+        late = Prediction.objects.create(
+            profile=user_factory().profile, league=league, predicted_team=teams[5]
+        )
+
+        assert late.rank == 3
+
+    def test_rank_exposed_on_predictions(
+        self, authenticated_client, multiple_predictions, league_result
+    ):
+        """Test that the user's per-league standing is returned with predictions"""
+        response = authenticated_client.get(reverse("prediction-list"))
+
+        assert response.data[0]["rank"] == 1
+
+    def test_league_board_reads_stored_rank(
+        self, authenticated_client, multiple_predictions, league_result, league
+    ):
+        """Test that the league leaderboard is a direct read of stored ranks"""
+        url = reverse("leaderboard-league", kwargs={"league_id": league.id})
+        response = authenticated_client.get(url)
+
+        assert [entry["rank"] for entry in response.data] == [1, 2]
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestRankHistory:
+    """Test packed rank snapshots and movement deltas"""
+
+    def test_publish_packs_snapshot(self, multiple_predictions, league_result, league):
+        """Test that each publish stores 8 bytes per profile id slot"""
+        publish([league.id])
+
+        snapshot = RankSnapshot.objects.get()
+        assert snapshot.size * 8 == len(bytes(snapshot.data))
+
+    def test_movement_between_snapshots(
+        self, authenticated_client, multiple_predictions, league_result, league, teams
+    ):
+        """Test that a user's rank change is reported after a rescore"""
+        publish([league.id])
+        league_result.first_place = teams[1]
+        league_result.second_place = teams[0]
+        league_result.save()
+        publish([league.id])
+
+        url = reverse("leaderboard-movement")
+        response = authenticated_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["rank"] == 2
+        assert response.data["previous_rank"] == 1
+        assert response.data["movement"] == -1
+        assert response.data["points_delta"] == -5
+
+    def test_movement_with_pruned_snapshot(
+        self, monkeypatch, multiple_predictions, league_result, league
+    ):
+        """Test that a snapshot pruned mid-read counts as no history"""
+        publish([league.id])
+        latest = publish([league.id])
+        read = history._record_at
+
+        def pruned(profile_id, snapshot_id, base, size):
+            RankSnapshot.objects.exclude(generation=latest).delete()
+            return read(profile_id, snapshot_id, base, size)
+
+        monkeypatch.setattr(history, "_record_at", pruned)
+        movement = rank_movement(multiple_predictions[0].profile_id)
+
+        assert movement["rank"] == 1
+        assert movement["previous_rank"] is None
+        assert movement["movement"] == 0
+
+    def test_movement_reads_only_the_profile_record(
+        self, multiple_predictions, league_result, league, django_assert_num_queries
+    ):
+        """Test that the delta is read by offset: one query per snapshot"""
+        publish([league.id])
+        publish([league.id])
+
+        with django_assert_num_queries(3):
+            movement = rank_movement(multiple_predictions[1].profile_id)
+
+        assert movement["rank"] == 2
+        assert movement["movement"] == 0
+
+    def test_movement_without_history(self, authenticated_client):
+        """Test that the endpoint 404s before any scoring run"""
+        response = authenticated_client.get(reverse("leaderboard-movement"))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestLeaderboardChanges:
+    """Test the changes-since-version delta feed"""
+
+    def test_first_request_resyncs(self, authenticated_client, multiple_predictions, league_result, league):
+        """Test that a client without a version gets the full board"""
+        generation = publish([league.id])
+
+        response = authenticated_client.get(reverse("leaderboard-changes"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["version"] == generation.pk
+        assert response.data["full_resync"] is True
+        assert len(response.data["entries"]) == 2
+
+    def test_only_changed_profiles_are_sent(
+        self, authenticated_client, multiple_predictions, league_result, league, teams
+    ):
+        """Test that a rescore only ships the profiles whose totals moved"""
+        first = publish([league.id])
+        league_result.first_place = teams[1]
+        league_result.second_place = teams[0]
+        league_result.save()
+        second = publish([league.id])
+
+        response = authenticated_client.get(
+            reverse("leaderboard-changes"), {"since": first.pk}
+        )
+
+        assert response.data["version"] == second.pk
+        assert response.data["full_resync"] is False
+        changed = {entry["id"] for entry in response.data["entries"]}
+        assert changed == {multiple_predictions[0].profile_id, multiple_predictions[1].profile_id}
+
+    def test_current_version_is_empty(self, multiple_predictions, league_result, league):
+        """Test that an up-to-date client receives no entries"""
+        generation = publish([league.id])
+
+        delta = changes_since(generation.pk)
+
+        assert delta["full_resync"] is False
+        assert delta["entries"] == []
+
+    def test_expired_version_resyncs(self, multiple_predictions, league_result, league):
+        """Test that versions older than the retained change sets force a resync"""
+        first = publish([league.id])
+        for _ in range(KEEP_CHANGE_SETS + 1):
+            publish([league.id])
+
+        assert LeaderboardChangeSet.objects.count() == KEEP_CHANGE_SETS
+        assert changes_since(first.pk - 1)["full_resync"] is True
+
+    def test_oldest_diffed_version_is_served(self, multiple_predictions, league_result, league):
+        """Test that the cutoff is the version the oldest change set was diffed against"""
+        for _ in range(KEEP_CHANGE_SETS + 1):
+            publish([league.id])
+        oldest = LeaderboardChangeSet.objects.order_by("version").first()
+        # League generations take ids between global versions
+        assert oldest.version - oldest.previous_version > 1
+
+        assert changes_since(oldest.previous_version)["full_resync"] is False
+        assert changes_since(oldest.previous_version - 1)["full_resync"] is True
+
+    def test_version_published_with_its_changes(
+        self, monkeypatch, multiple_predictions, league_result, league
+    ):
+        """Test that a failed change log leaves the previous version published"""
+        first = publish([league.id])
+
+        def fail(generation, previous_id):
+            raise RuntimeError("change log failed")
+
+        monkeypatch.setattr(leaderboard, "record_changes", fail)
+        with pytest.raises(RuntimeError):
+            publish()
+
+        assert changes_since(first.pk)["version"] == first.pk
+
+    def test_invalid_version(self, authenticated_client):
+        """Test that a non-numeric version is rejected"""
+        response = authenticated_client.get(reverse("leaderboard-changes"), {"since": "abc"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def as_rows(columns):
+    """Columnar board back to rows, with ranks derived from position"""
+    keys = list(columns["columns"])
+    rows = [dict(zip(keys, values)) for values in zip(*columns["columns"].values())]
+    for position, row in enumerate(rows):
+        tied = position and row[columns["rank_by"]] == rows[position - 1][columns["rank_by"]]
+        row["rank"] = rows[position - 1]["rank"] if tied else position + 1
+    return rows
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestColumnarLeaderboards:
+    """Test the columnar leaderboard format"""
+
+    @pytest.mark.parametrize("url_name, by_league", [
+        ("leaderboard-global", False),
+        ("leaderboard-league", True),
+    ])
+    def test_format_param(
+        self, authenticated_client, multiple_predictions, league_result, league, url_name, by_league
+    ):
+        """Test that ?format=columnar carries the same board in fewer bytes"""
+        publish([league.id])
+        url = reverse(url_name, kwargs={"league_id": league.id} if by_league else {})
+
+        rows = authenticated_client.get(url)
+        compact = authenticated_client.get(url, {"format": "columnar"})
+
+        assert compact["Content-Type"] == ColumnarJSONRenderer.media_type
+        assert compact.json()["count"] == 2
+        assert "rank" not in compact.json()["columns"]
+        assert as_rows(compact.json()) == [dict(row) for row in rows.json()]
+        assert len(compact.content) < len(rows.content)
+
+    def test_accept_header(self, authenticated_client, multiple_predictions, league_result):
+        """Test that the format is negotiated through Accept too"""
+        response = authenticated_client.get(
+            reverse("leaderboard-global"), headers={"Accept": ColumnarJSONRenderer.media_type}
+        )
+
+        assert list(response.json()["columns"]) == [key for key in GLOBAL_KEYS if key != "rank"]
+
+    def test_default_unchanged(self, authenticated_client, multiple_predictions, league_result):
+        """Test that clients that don't ask still get a list of rows"""
+        response = authenticated_client.get(reverse("leaderboard-global"))
+
+        assert isinstance(response.json(), list)
+
+    def test_async_view(self, user, multiple_predictions, league_result, league):
+        """Test that the async leaderboard negotiates the format the same way"""
+        publish([league.id])
+        url = reverse("leaderboard-global")
+        request = AsyncRequestFactory().get(
+            url, {"format": "columnar"}, headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+        )
+
+        response = async_to_sync(async_views.LeaderboardView.as_view())(request)
+
+        assert response["Content-Type"] == ColumnarJSONRenderer.media_type
+        assert json.loads(response.content)["count"] == 2
+
+    def test_ties_share_rank(self):
+        """Test that tied rows take the rank of the first of them"""
+        rows = [(1, 30, 1), (2, 20, 2), (3, 20, 2), (4, 10, 4)]
+
+        board = columnar(rows, ("id", "points", "rank"), "points")
+
+        assert board["columns"] == {"id": [1, 2, 3, 4], "points": [30, 20, 20, 10]}
+        assert [row["rank"] for row in as_rows(board)] == [1, 2, 2, 4]
+
+    def test_inconsistent_ranks_kept(self):
+        """Test that ranks which don't follow from position are sent explicitly"""
+        board = columnar([(1, 30, 1), (2, 20, 3)], ("id", "points", "rank"), "points")
+
+        assert board["columns"]["rank"] == [1, 3]
+
+    def test_empty_board(self):
+        """Test that an empty board still names its columns"""
+        board = columnar([], ("id", "points", "rank"), "points")
+
+        assert board == {"count": 0, "rank_by": "points", "columns": {"id": [], "points": []}}
+
+
+def _frame_data(frame):
+    return json.loads(frame.split("data: ", 1)[1])
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestLeaderboardEvents:
+    """Test the live rescoring event stream"""
+
+    def test_publish_reaches_subscriber(self, multiple_predictions, league_result, league):
+        """Test that a publish wakes the stream with the subscriber's own rank"""
+        profile_id = multiple_predictions[1].profile_id
+
+        async def scenario():
+            stream = event_stream(profile_id)
+            assert (await anext(stream)).startswith("retry:")
+            generation = await sync_to_async(publish)([league.id])
+            frame = await anext(stream)
+            await stream.aclose()
+            return generation, frame
+
+        generation, frame = async_to_sync(scenario)()
+
+        assert frame.startswith("event: rescored\n")
+        assert _frame_data(frame) == {
+            "leagues": [league.id],
+            "version": generation.pk,
+            "rank": 2,
+            "total_points": 15,
+        }
+
+    def test_idle_stream_makes_no_queries(self, db, django_assert_num_queries):
+        """Test that waiting connections only send keepalive comments"""
+
+        async def scenario():
+            stream = event_stream(keepalive=0.01)
+            frames = [await anext(stream), await anext(stream)]
+            await stream.aclose()
+            return frames
+
+        with django_assert_num_queries(0):
+            frames = async_to_sync(scenario)()
+
+        assert frames[1] == ": keepalive\n\n"
+
+    def test_events_relayed_through_file(
+        self, settings, tmp_path, monkeypatch, multiple_predictions, league_result, league
+    ):
+        """Test that events another worker appends to the shared file are delivered"""
+        generation = publish([league.id])
+        snapshot = RankSnapshot.objects.get()
+        path = tmp_path / "events.jsonl"
+        settings.LEADERBOARD_EVENTS_FILE = str(path)
+        monkeypatch.setattr(events, "POLL_SECONDS", 0.01)
+        line = json.dumps({
+            "leagues": [league.id],
+            "version": generation.pk,
+            "snapshot": snapshot.pk,
+            "origin": "other-host:1",
+        })
+
+        async def scenario():
+            stream = event_stream(multiple_predictions[0].profile_id)
+            await anext(stream)
+            path.write_text(line + "\n")
+            frame = await anext(stream)
+            await stream.aclose()
+            return frame
+
+        frame = async_to_sync(scenario)()
+
+        assert _frame_data(frame)["rank"] == 1
+        assert not events._followers
+
+    def test_stream_requires_authentication(self, client):
+        """Test that anonymous clients are rejected"""
+        response = client.get(reverse("leaderboard-events"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {"detail": "Authentication credentials were not provided."}
+        assert response.has_header("WWW-Authenticate")
+
+    def test_events_file_rotated(self, settings, tmp_path, multiple_predictions, league):
+        """Test that the relay file is moved aside once it reaches its size cap"""
+        path = tmp_path / "events.jsonl"
+        settings.LEADERBOARD_EVENTS_FILE = str(path)
+        settings.LEADERBOARD_EVENTS_MAX_BYTES = 1
+        publish([league.id])
+
+        publish([league.id])
+
+        assert len(path.read_text().splitlines()) == 1
+        assert len((tmp_path / "events.jsonl.1").read_text().splitlines()) == 1
+
+    def test_stream_response(self, user):
+        """Test that an authenticated client receives an event stream"""
+        token = AccessToken.for_user(user)
+
+        async def scenario():
+            response = await AsyncClient().get(
+                reverse("leaderboard-events"), headers={"Authorization": f"Bearer {token}"}
+            )
+            first = await anext(response.streaming_content)
+            await response.streaming_content.aclose()
+            return response, first
+
+        response, first = async_to_sync(scenario)()
+
+        assert response["Content-Type"] == "text/event-stream"
+        assert first.startswith(b"retry:")
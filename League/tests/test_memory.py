@@ -0,0 +1,131 @@
+"""
+Tests for the tracemalloc surface.
+"""
+import logging
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from Elmosliga import memory
+from Elmosliga.instrumentation import RequestTimings
+
+
+@pytest.fixture
+def tracing():
+    """Leave tracemalloc as the test found it (off)"""
+    yield
+    memory.stop()
+
+
+def trace(client, action, **data):
+    return client.post(reverse("memory-trace"), {"action": action, **data}, format="json")
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestMemoryTraceView:
+    """Test the staff-only tracemalloc endpoint"""
+
+    def test_staff_only(self, authenticated_client, tracing):
+        """Test that regular users cannot control tracing"""
+        assert trace(authenticated_client, "start").status_code == 403
+        assert not memory.status()["tracing"]
+
+    def test_snapshots_compared(self, admin_client, tracing):
+        """Test that growth between snapshots is attributed to the allocating line"""
+        assert trace(admin_client, "start").data["tracing"]
+        trace(admin_client, "snapshot", name="before")
+        retained = [bytearray(100_000) for _ in range(5)]
+        trace(admin_client, "snapshot", name="after")
+
+        response = trace(admin_client, "compare", first="before", second="after")
+
+        top = response.data["sites"][0]
+        assert top["site"].startswith("League/tests/test_memory.py:")
+        assert top["size_diff_kb"] >= 480
+        assert top["count_diff"] >= 5
+        assert len(retained) == 5
+
+    def test_status(self, admin_client, tracing):
+        """Test that GET reports the worker's tracing state and snapshots"""
+        trace(admin_client, "start")
+        trace(admin_client, "snapshot", name="first")
+
+        response = admin_client.get(reverse("memory-trace"))
+
+        assert response.data["tracing"]
+        assert response.data["snapshots"] == ["first"]
+
+    def test_snapshot_needs_tracing(self, admin_client, tracing):
+        """Test that snapshots are refused while tracing is off"""
+        response = trace(admin_client, "snapshot")
+
+        assert response.status_code == 400
+        assert "error" in response.data
+
+    def test_unknown_snapshot(self, admin_client, tracing):
+        """Test that comparing a missing snapshot is a client error"""
+        trace(admin_client, "start")
+
+        response = trace(admin_client, "compare", first="nope", second="nope")
+
+        assert response.status_code == 400
+
+    def test_other_worker_refused(self, admin_client, tracing):
+        """Test that an action meant for another worker's pid is not run here"""
+        response = trace(admin_client, "start", pid=os.getpid() + 1)
+
+        assert response.status_code == 409
+        assert response.data["pid"] == os.getpid()
+        assert not memory.status()["tracing"]
+        assert trace(admin_client, "start", pid=os.getpid()).data["tracing"]
+
+    def test_unknown_action(self, admin_client, tracing):
+        """Test that an unknown action is rejected"""
+        assert trace(admin_client, "dump").status_code == 400
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestMemoryAccounting:
+    """Test peak memory in the request timings and the trace_memory command"""
+
+    def test_peak_memory_timed(self, settings, user, league, tracing, caplog):
+        """Test that timed requests report their peak while tracing is on"""
+        settings.REQUEST_TIMING = True
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1.0
+        client = APIClient()
+        client.force_authenticate(user=user)
+        memory.start()
+
+        with caplog.at_level(logging.INFO, logger="Elmosliga.timing"):
+            response = client.get(reverse("league-list"))
+
+        assert 'mem;desc="peak ' in response["Server-Timing"]
+        assert caplog.records[-1].timing["peak_kb"] > 0
+
+    def test_overlapping_requests_report_no_peak(self, tracing):
+        """Test that the shared peak is only reported for a request that ran alone"""
+        memory.start()
+        first, second = RequestTimings(), RequestTimings()
+        second.finish()
+        first.finish()
+        alone = RequestTimings()
+        nested = RequestTimings(alone)
+        nested.finish()
+        alone.finish()
+
+        assert first.peak_memory is None and second.peak_memory is None
+        assert nested.peak_memory is not None and alone.peak_memory is not None
+
+    def test_trace_memory_command(self, user, multiple_predictions):
+        """Test that the command reports the traced requests and stops tracing"""
+        out = StringIO()
+
+        call_command("trace_memory", requests=3, stdout=out)
+
+        assert f"3 requests to {reverse('leaderboard-global')}" in out.getvalue()
+        assert not memory.status()["tracing"]
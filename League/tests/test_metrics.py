@@ -0,0 +1,149 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings as django_settings
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY, generate_latest
+from rest_framework.test import APIClient
+from Elmosliga import metrics
+from Elmosliga.middleware import MetricsMiddleware
+from League.models import ProbabilitySet
+from League.services.projection import current_projection
+from League.services.scoring import score_league
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def metrics_on(settings):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_TOKEN = None
+    return settings
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestRequestMetrics:
+    """Test the per-route request metrics"""
+
+    def test_request_counted(self, metrics_on, user, league):
+        """Test that a request counts towards its route's requests, latency and queries"""
+        labels = {"route": "league/leagues/", "method": "GET"}
+        requests = sample("elmosliga_http_requests_total", status="200", **labels)
+        latency = sample("elmosliga_http_request_duration_seconds_count", **labels)
+        queries = sample("elmosliga_http_request_queries_sum", route="league/leagues/")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        client.get(reverse("league-list"))
+
+        assert sample("elmosliga_http_requests_total", status="200", **labels) == requests + 1
+        assert sample("elmosliga_http_request_duration_seconds_count", **labels) == latency + 1
+        assert sample("elmosliga_http_request_queries_sum", route="league/leagues/") > queries
+
+    def test_server_error_counted(self, metrics_on):
+        """Test that 5xx responses count as errors"""
+        labels = {"route": "<unmatched>", "method": "GET", "status": "503"}
+        errors = sample("elmosliga_http_errors_total", **labels)
+
+        MetricsMiddleware(lambda request: HttpResponse(status=503))(RequestFactory().get("/"))
+
+        assert sample("elmosliga_http_errors_total", **labels) == errors + 1
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestDomainMetrics:
+    """Test the scoring and cache metrics"""
+
+    def test_scoring_counted(self, multiple_predictions, league_result):
+        """Test that a scoring run records its duration and predictions rescored"""
+        runs = sample("elmosliga_scoring_duration_seconds_count")
+        rescored = sample("elmosliga_predictions_rescored_total")
+
+        score_league(league_result.league_id)
+
+        assert sample("elmosliga_scoring_duration_seconds_count") == runs + 1
+        assert sample("elmosliga_predictions_rescored_total") == rescored + 2
+
+    def test_cache_hits_and_misses(self, db):
+        """Test that projection lookups count as hits or misses"""
+        ProbabilitySet.objects.create(
+            data={}, simulations=1, projection=[], projected_at=timezone.now()
+        )
+        misses = sample("elmosliga_cache_requests_total", cache="projection", result="miss")
+        hits = sample("elmosliga_cache_requests_total", cache="projection", result="hit")
+
+        current_projection()
+        current_projection()
+
+        assert sample(
+            "elmosliga_cache_requests_total", cache="projection", result="miss"
+        ) == misses + 1
+        assert sample(
+            "elmosliga_cache_requests_total", cache="projection", result="hit"
+        ) == hits + 1
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestMetricsEndpoint:
+    """Test the exposition endpoint"""
+
+    def test_exposition(self, metrics_on):
+        """Test that metrics are served in the Prometheus text format"""
+        metrics_on.DEBUG = True
+
+        response = Client().get(reverse("metrics"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        assert b"elmosliga_predictions_rescored_total" in response.content
+
+    def test_disabled(self, settings):
+        """Test that nothing is exposed unless metrics are enabled"""
+        settings.METRICS_ENABLED = False
+
+        assert Client().get(reverse("metrics")).status_code == 404
+
+    def test_not_public_without_token(self, metrics_on):
+        """Test that without a token metrics are only served under DEBUG"""
+        metrics_on.DEBUG = False
+
+        assert Client().get(reverse("metrics")).status_code == 404
+
+    def test_token_required(self, metrics_on):
+        """Test that a configured token must be presented"""
+        metrics_on.METRICS_TOKEN = "scrape-secret"
+
+        assert Client().get(reverse("metrics")).status_code == 401
+        response = Client().get(
+            reverse("metrics"), headers={"Authorization": "Bearer scrape-secret"}
+        )
+        assert response.status_code == 200
+
+    def test_workers_aggregated(self, tmp_path):
+        """Test that counts from separate worker processes are summed"""
+        worker = "from Elmosliga import metrics; metrics.PREDICTIONS_RESCORED.inc(3)"
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, "-c", worker],
+                cwd=django_settings.BASE_DIR,
+                env=env,
+                check=True,
+            )
+
+        exposition = generate_latest(metrics.registry(str(tmp_path))).decode()
+
+        assert "elmosliga_predictions_rescored_total 6.0" in exposition
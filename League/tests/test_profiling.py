@@ -0,0 +1,110 @@
+"""
+Tests for on-demand request profiling.
+"""
+import cProfile
+import pstats
+import time
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from Elmosliga.profiling import collapsed_stacks
+from League.models import RequestProfile
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.REQUEST_PROFILING = True
+    settings.MEDIA_ROOT = str(tmp_path)
+    return settings
+
+
+def inner():
+    time.sleep(0.01)
+
+
+def outer():
+    inner()
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestRequestProfiling:
+    """Test which requests are profiled and what is stored"""
+
+    def test_staff_request_profiled(self, profiling, admin_user, league, api_client, bearer):
+        """Test that a flagged staff request stores its stats and collapsed stacks"""
+        response = api_client.get(
+            reverse("league-list"), headers={**bearer(admin_user), "X-Profile": "1"}
+        )
+
+        record = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        assert record.user == admin_user
+        assert record.path == reverse("league-list")
+        assert record.status_code == 200
+        stats = pstats.Stats(record.stats.path)
+        assert stats.total_calls > 0
+        collapsed = record.collapsed.read().decode()
+        assert "(rest_framework/generics.py:" in collapsed
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+    def test_query_flag(self, profiling, admin_user, league, api_client, bearer):
+        """Test that ?profile works as well as the header"""
+        response = api_client.get(
+            reverse("league-list") + "?profile", headers=bearer(admin_user)
+        )
+
+        assert response.has_header("X-Profile-Id")
+
+    def test_non_staff_ignored(self, profiling, user, league, api_client, bearer):
+        """Test that other users cannot trigger profiling"""
+        response = api_client.get(
+            reverse("league-list"), headers={**bearer(user), "X-Profile": "1"}
+        )
+
+        assert response.status_code == 200
+        assert not response.has_header("X-Profile-Id")
+        assert not RequestProfile.objects.exists()
+
+    def test_unflagged_not_profiled(self, profiling, admin_user, league, api_client, bearer):
+        """Test that staff requests are only profiled when asked"""
+        response = api_client.get(reverse("league-list"), headers=bearer(admin_user))
+
+        assert not response.has_header("X-Profile-Id")
+
+    def test_admin_list_and_download(self, profiling, admin_user, league, api_client, bearer):
+        """Test that profiles are listed in the admin and downloadable"""
+        response = api_client.get(
+            reverse("league-list"), headers={**bearer(admin_user), "X-Profile": "1"}
+        )
+        pk = response["X-Profile-Id"]
+        client = Client()
+        client.force_login(admin_user)
+
+        listing = client.get(reverse("admin:League_requestprofile_changelist"))
+        download = client.get(
+            reverse("admin:League_requestprofile_download", args=[pk, "collapsed"])
+        )
+
+        assert reverse("league-list") in listing.content.decode()
+        assert download["Content-Disposition"].startswith("attachment")
+        assert b"(rest_framework/generics.py:" in b"".join(download.streaming_content)
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestCollapsedStacks:
+    """Test the collapsed-stack rendering"""
+
+    def test_nested_calls(self):
+        """Test that time lands on the full caller chain"""
+        profiler = cProfile.Profile()
+        profiler.runcall(outer)
+        profiler.create_stats()
+
+        lines = dict(line.rsplit(" ", 1) for line in collapsed_stacks(profiler.stats).splitlines())
+
+        stack = next(stack for stack in lines if stack.endswith("time.sleep>"))
+        assert "outer (League/tests/test_profiling.py:" in stack
+        assert "inner (League/tests/test_profiling.py:" in stack
+        assert int(lines[stack]) >= 10_000
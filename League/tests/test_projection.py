@@ -0,0 +1,199 @@
+"""
+Tests for the Monte Carlo projection engine.
+"""
+from io import StringIO
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from accounts.models import Profile
+from League.models import ProbabilitySet
+from League.services import projection
+from League.services.projection import project, sample_team_points
+
+
+def certain_order(teams):
+    """Probabilities where teams finish exactly in the given order"""
+    return {
+        str(team.id): [1.0 if position == i else 0.0 for position in range(6)]
+        for i, team in enumerate(teams)
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestSampling:
+    """Test vectorized standings sampling"""
+
+    def test_certain_probabilities_give_fixed_points(self):
+        """Test that a deterministic table always scores the same"""
+        probabilities = np.eye(3)
+        points = np.array([20, 15, 10])
+
+        team_points = sample_team_points(
+            probabilities, points, 50, np.random.default_rng(0)
+        )
+
+        assert team_points.shape == (50, 3)
+        assert (team_points == [20, 15, 10]).all()
+
+    def test_each_team_placed_at_most_once(self):
+        """Test that a team never occupies two positions in one season"""
+        probabilities = np.full((4, 3), 0.25)
+        points = np.array([1, 1, 1])
+
+        team_points = sample_team_points(
+            probabilities, points, 200, np.random.default_rng(1)
+        )
+
+        assert team_points.max() == 1
+        assert (team_points.sum(axis=1) == 3).all()
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestProjection:
+    """Test projected totals and ranks"""
+
+    def test_project_expected_points_and_ranks(
+        self, multiple_predictions, league, teams
+    ):
+        """Test projections against a table with a certain outcome"""
+        probability_set = ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=20
+        )
+
+        entries = {entry["id"]: entry for entry in project(probability_set)}
+        first = entries[multiple_predictions[0].profile_id]
+        second = entries[multiple_predictions[1].profile_id]
+
+        assert first["expected_points"] == 20
+        assert first["expected_rank"] == 1
+        assert first["win_probability"] == 1
+        assert second["expected_points"] == 15
+        assert second["rank_p50"] == 2
+
+    def test_simulation_batches_match_one_batch(
+        self, multiple_predictions, league, teams
+    ):
+        """Test that splitting the simulations into batches keeps the results"""
+        probability_set = ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=20
+        )
+
+        assert project(probability_set, batch_size=3) == project(
+            probability_set, batch_size=20
+        )
+
+    def test_profiles_created_mid_projection_are_skipped(
+        self, monkeypatch, multiple_predictions, league, teams
+    ):
+        """Test that predictions of profiles missing from the snapshot are ignored"""
+        late = multiple_predictions[1].profile_id
+        snapshot = Profile.objects.exclude(pk=late)
+        monkeypatch.setattr(
+            projection, "Profile", SimpleNamespace(objects=snapshot)
+        )
+        probability_set = ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=5
+        )
+
+        entries = project(probability_set)
+
+        assert [entry["id"] for entry in entries] == [multiple_predictions[0].profile_id]
+        assert entries[0]["expected_points"] == 20
+
+    def test_projection_endpoint(
+        self, authenticated_client, multiple_predictions, league, teams
+    ):
+        """Test that the endpoint serves the projection the command stored"""
+        probability_set = ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=10
+        )
+        call_command("project_scores", stdout=StringIO())
+
+        response = authenticated_client.get(
+            reverse("leaderboard-projection"), {"limit": 1}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["version"] == probability_set.pk
+        assert response.data["count"] == 2
+        assert len(response.data["results"]) == 1
+        assert response.data["results"][0]["expected_points"] == 20
+        assert response.data["next"]
+
+    def test_projection_endpoint_never_simulates(
+        self, authenticated_client, monkeypatch, multiple_predictions, league, teams
+    ):
+        """Test that a set not yet simulated is a 503, not a request-time run"""
+        ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=10
+        )
+        monkeypatch.setattr(projection, "project", None)
+
+        response = authenticated_client.get(reverse("leaderboard-projection"))
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"]
+
+    def test_project_scores_command(self, multiple_predictions, league, teams):
+        """Test that the command stores a projection for the newest set"""
+        probability_set = ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=5
+        )
+
+        call_command("project_scores", stdout=StringIO())
+
+        probability_set.refresh_from_db()
+        assert probability_set.projected_at is not None
+        assert len(probability_set.projection) == 2
+
+    def test_project_scores_pending_skips_projected_set(
+        self, monkeypatch, multiple_predictions, league, teams
+    ):
+        """Test that --pending leaves an already projected set alone"""
+        ProbabilitySet.objects.create(
+            data={str(league.id): certain_order(teams)}, simulations=5
+        )
+        call_command("project_scores", pending=True, stdout=StringIO())
+        monkeypatch.setattr(projection, "project", None)
+
+        output = StringIO()
+        call_command("project_scores", pending=True, stdout=output)
+
+        assert "already projected" in output.getvalue()
+
+    def test_projection_endpoint_without_probabilities(self, authenticated_client):
+        """Test that the endpoint 404s until probabilities are uploaded"""
+        response = authenticated_client.get(reverse("leaderboard-projection"))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_upload_probabilities_as_admin(
+        self, admin_client, league, teams, django_capture_on_commit_callbacks
+    ):
+        """Test uploading a probability set, which is not simulated in the request"""
+        url = reverse("probability-set-create")
+        data = {"data": {str(league.id): certain_order(teams)}, "simulations": 100}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(url, data, format="json")
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert ProbabilitySet.objects.get().projected_at is None
+
+    def test_upload_rejects_foreign_team(
+        self, admin_client, league, league_with_custom_points, team_factory
+    ):
+        """Test that teams must belong to the league they are listed under"""
+        other = team_factory("Other Team", league_with_custom_points)
+        url = reverse("probability-set-create")
+        data = {"data": {str(league.id): {str(other.id): [1.0]}}}
+
+        response = admin_client.post(url, data, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,121 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+import io
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from Elmosliga import renderers
+from Elmosliga.renderers import FastJSONParser, FastJSONRenderer
+
+
+PAYLOAD = {
+    "aware": datetime(2026, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc),
+    "naive": datetime(2026, 5, 1, 12, 30),
+    "decimal": Decimal("12.50"),
+    "lazy": gettext_lazy("Not found."),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "separator": "line\u2028break",
+    "unicode": "Barça",
+    1: [None, True, 1.5],
+}
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestFastJSONRenderer:
+    """Test that the fast renderer writes what DRF's renderer writes"""
+
+    def test_matches_drf(self):
+        """Test datetimes, Decimals, lazy strings, UUIDs and non-str keys"""
+        assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_stdlib_fallback(self, monkeypatch):
+        """Test that output is unchanged without orjson"""
+        monkeypatch.setattr(renderers, "orjson", None)
+
+        assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+    def test_big_integers_fall_back(self):
+        """Test that values orjson rejects are rendered by the stdlib"""
+        assert FastJSONRenderer().render({"big": 2**70}) == b'{"big":1180591620717411303424}'
+
+    def test_indented(self):
+        """Test that indentation, as the browsable API asks for, is honoured"""
+        media_type = "application/json; indent=4"
+
+        assert FastJSONRenderer().render([1], media_type) == JSONRenderer().render([1], media_type)
+
+    @pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+    def test_non_finite_floats(self, value, monkeypatch):
+        """Test that orjson writes non-finite floats as null, where DRF raises"""
+        assert FastJSONRenderer().render({"value": value}) == b'{"value":null}'
+        with pytest.raises(ValueError):
+            JSONRenderer().render({"value": value})
+
+        monkeypatch.setattr(renderers, "orjson", None)
+        with pytest.raises(ValueError):
+            FastJSONRenderer().render({"value": value})
+
+    def test_unencodable(self):
+        """Test that unknown types fail as they do with DRF's renderer"""
+        with pytest.raises(TypeError):
+            FastJSONRenderer().render({"value": object()})
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestFastJSONParser:
+    """Test the fast parser"""
+
+    def test_parses(self):
+        """Test that a body is parsed"""
+        body = io.BytesIO('{"team": 3, "name": "Barça"}'.encode())
+
+        assert FastJSONParser().parse(body) == {"team": 3, "name": "Barça"}
+
+    @pytest.mark.parametrize("body", [b"{", b'{"points": NaN}'])
+    def test_rejects_invalid(self, body):
+        """Test that malformed JSON and NaN are parse errors"""
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestFastJSONEndpoints:
+    """Test the renderer in the API and the benchmark"""
+
+    def test_default_renderer(self, authenticated_client, league):
+        """Test that API responses are rendered by the fast renderer"""
+        response = authenticated_client.get(reverse("league-list"))
+
+        assert isinstance(response.accepted_renderer, FastJSONRenderer)
+        assert response.json()[0]["name"] == league.name
+
+    def test_invalid_body(self, authenticated_client):
+        """Test that a malformed JSON body is a 400"""
+        response = authenticated_client.post(
+            reverse("prediction-create"), "{", content_type="application/json"
+        )
+
+        assert response.status_code == 400
+
+    def test_bench_json(self, multiple_predictions):
+        """Test that the benchmark reports both renderers for both payloads"""
+        out = StringIO()
+
+        call_command("bench_json", repeat=2, stdout=out)
+
+        output = out.getvalue()
+        assert "LeaderboardView" in output and "LeagueListView" in output
+        assert "LeaderboardView ?format=columnar" in output
+        assert output.count("FastJSONRenderer") == 3
@@ -0,0 +1,263 @@
+"""
+Tests for read replica routing.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from Elmosliga.middleware import (
+    PRIMARY_PIN_COOKIE,
+    ReplicaRoutingMiddleware,
+    primary_pin_key,
+)
+from Elmosliga.routers import reading_from
+from League.models import League, Prediction, Team
+
+
+def routed_read(request):
+    """Run the middleware around a view that reports where reads would go"""
+    seen = {}
+
+    def get_response(request):
+        seen["read"] = router.db_for_read(Prediction)
+        seen["write"] = router.db_for_write(Prediction)
+        return HttpResponse()
+
+    response = ReplicaRoutingMiddleware(get_response)(request)
+    return seen, response
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica0"]
+    settings.REPLICA_STICKY_SECONDS = 5
+    return settings.DATABASE_REPLICAS
+
+
+@pytest.fixture
+def sqlite_replica(db, settings, tmp_path):
+    """A real second SQLite file as replica0, holding only the league tables"""
+    alias = "replica0"
+    replica = {**connections.settings["default"], "NAME": str(tmp_path / "replica.sqlite3")}
+    connections[alias] = load_backend(replica["ENGINE"]).DatabaseWrapper(replica, alias)
+    settings.DATABASE_REPLICAS = [alias]
+    with connections[alias].schema_editor() as editor:
+        editor.create_model(League)
+        editor.create_model(Team)
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+
+
+def load_settings(**env):
+    """Import the settings module in a fresh interpreter with ``env`` set"""
+    environ = {key: value for key, value in os.environ.items() if key != "CACHE_URL"}
+    return subprocess.run(
+        [sys.executable, "-c", "import Elmosliga.settings"],
+        cwd=django_settings.BASE_DIR,
+        env={**environ, "DJANGO_SECRET_KEY": "x", **env},
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestPrimaryReplicaRouter:
+    """Test the router outside of requests"""
+
+    def test_reads_default_to_primary(self, replicas):
+        """Test that code outside a routed request reads the primary"""
+        assert router.db_for_read(Prediction) == "default"
+
+    def test_reading_from_replica(self, replicas):
+        """Test that reads follow the active replica while writes stay on the primary"""
+        with reading_from("replica0"):
+            assert router.db_for_read(Prediction) == "replica0"
+            assert router.db_for_write(Prediction) == "default"
+
+        assert router.db_for_read(Prediction) == "default"
+
+    def test_migrations_only_on_primary(self):
+        """Test that replicas never get migrated directly"""
+        assert router.allow_migrate("default", "League")
+        assert not router.allow_migrate("replica0", "League")
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestReplicaRoutingMiddleware:
+    """Test which requests read from a replica"""
+
+    def test_leaderboard_reads_from_replica(self, replicas):
+        """Test that a read-only endpoint is served from a replica"""
+        seen, _ = routed_read(RequestFactory().get(reverse("leaderboard-global")))
+
+        assert seen == {"read": "replica0", "write": "default"}
+
+    def test_unmarked_endpoint_reads_primary(self, replicas):
+        """Test that endpoints without read_from_replica stay on the primary"""
+        seen, _ = routed_read(RequestFactory().get(reverse("result-list")))
+
+        assert seen["read"] == "default"
+
+    def test_write_pins_client_to_primary(self, replicas):
+        """Test that a submission reads the primary and pins the client to it"""
+        seen, response = routed_read(RequestFactory().post(reverse("prediction-create")))
+
+        assert seen["read"] == "default"
+        assert response.cookies[PRIMARY_PIN_COOKIE]["max-age"] == 5
+
+    def test_pinned_client_reads_own_writes(self, replicas):
+        """Test that a read inside the sticky window goes to the primary"""
+        request = RequestFactory().get(reverse("prediction-list"))
+        request.COOKIES[PRIMARY_PIN_COOKIE] = "1"
+
+        seen, response = routed_read(request)
+
+        assert seen["read"] == "default"
+        assert PRIMARY_PIN_COOKIE not in response.cookies
+
+    def test_api_write_pins_user_not_cookie(self, replicas, user, second_user, bearer):
+        """Test that a JWT client is pinned by user id, for its next reads only"""
+        write = RequestFactory().post(
+            reverse("prediction-create"), headers=bearer(user)
+        )
+        write.user = user
+
+        _, response = routed_read(write)
+        own, _ = routed_read(
+            RequestFactory().get(reverse("prediction-list"), headers=bearer(user))
+        )
+        other, _ = routed_read(
+            RequestFactory().get(reverse("prediction-list"), headers=bearer(second_user))
+        )
+
+        assert PRIMARY_PIN_COOKIE not in response.cookies
+        assert own["read"] == "default"
+        assert other["read"] == "replica0"
+
+    def test_token_client_pinned(self, replicas, user):
+        """Test that DRF token clients are recognised by their key"""
+        token = Token.objects.create(user=user)
+        cache.set(primary_pin_key(user.pk), 1)
+
+        seen, _ = routed_read(
+            RequestFactory().get(
+                reverse("prediction-list"), headers={"Authorization": f"Token {token.key}"}
+            )
+        )
+
+        assert seen["read"] == "default"
+
+    def test_invalid_credentials_not_pinned(self, replicas):
+        """Test that unreadable credentials fall back to the replica"""
+        seen, _ = routed_read(
+            RequestFactory().get(
+                reverse("prediction-list"), headers={"Authorization": "Bearer nonsense"}
+            )
+        )
+
+        assert seen["read"] == "replica0"
+
+    def test_no_replicas_configured(self, settings):
+        """Test that without replicas nothing is routed or pinned"""
+        settings.DATABASE_REPLICAS = []
+
+        seen, response = routed_read(RequestFactory().post(reverse("prediction-create")))
+
+        assert seen["read"] == "default"
+        assert PRIMARY_PIN_COOKIE not in response.cookies
+
+    def test_async_request_routed(self, replicas):
+        """Test that async views read from the replica too"""
+        seen = {}
+
+        async def get_response(request):
+            seen["read"] = router.db_for_read(Prediction)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        async_to_sync(middleware)(AsyncRequestFactory().get(reverse("leaderboard-global")))
+
+        assert seen["read"] == "replica0"
+
+    def test_async_request_pinned(self, replicas, user, bearer):
+        """Test that async reads honour a user's pin too"""
+        seen = {}
+        cache.set(primary_pin_key(user.pk), 1)
+
+        async def get_response(request):
+            seen["read"] = router.db_for_read(Prediction)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        async_to_sync(middleware)(
+            AsyncRequestFactory().get(reverse("leaderboard-global"), headers=bearer(user))
+        )
+
+        assert seen["read"] == "default"
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestSQLiteReplica:
+    """Test routing against a real second database"""
+
+    def test_read_served_from_replica_file(self, sqlite_replica, authenticated_client):
+        """Test that a read-only endpoint returns the replica's rows, not the primary's"""
+        League.objects.create(name="Primary League")
+        # bulk_create: League.save would mirror points rows onto the primary
+        League.objects.using(sqlite_replica).bulk_create([League(name="Replica League")])
+
+        response = authenticated_client.get(reverse("league-list"))
+
+        assert [league["name"] for league in response.data] == ["Replica League"]
+
+    def test_pinned_read_served_from_primary(self, sqlite_replica, authenticated_client):
+        """Test that a client pinned after a write reads the primary's rows"""
+        League.objects.create(name="Primary League")
+        League.objects.using(sqlite_replica).bulk_create([League(name="Replica League")])
+        authenticated_client.cookies[PRIMARY_PIN_COOKIE] = "1"
+
+        response = authenticated_client.get(reverse("league-list"))
+
+        assert [league["name"] for league in response.data] == ["Primary League"]
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestReplicaSettings:
+    """Test that replicas are only enabled with a shared cache"""
+
+    def test_replicas_require_cache_url(self):
+        """Test that replicas without CACHE_URL are refused"""
+        result = load_settings(DATABASE_REPLICA_URLS="sqlite:////tmp/replica.sqlite3")
+
+        assert result.returncode != 0
+        assert "set CACHE_URL" in result.stderr
+
+    def test_replicas_with_cache_url(self):
+        """Test that a shared cache URL configures the default cache"""
+        result = load_settings(
+            DATABASE_REPLICA_URLS="sqlite:////tmp/replica.sqlite3",
+            CACHE_URL="memcached://127.0.0.1:11211",
+        )
+
+        assert result.returncode == 0, result.stderr
+
+    def test_unknown_cache_scheme(self):
+        """Test that an unsupported CACHE_URL scheme is refused"""
+        result = load_settings(CACHE_URL="ftp://cache")
+
+        assert "Unsupported CACHE_URL scheme: ftp" in result.stderr
@@ -2,8 +2,22 @@
 Tests for the scoring system.
 """
 import pytest
-from League.services.scoring import calculate_points
-from League.models import League, Team, Prediction, LeagueResult
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
+from accounts.models import Profile
+from League.services.leaderboard import league_scope
+from League.services.scoring import calculate_points, points_table, score_league
+from League.models import (
+    LeaderboardPointer,
+    League,
+    Team,
+    Prediction,
+    LeagueResult,
+    PositionPoints,
+    Standing,
+)
 
 
 @pytest.mark.unit
@@ -296,4 +310,312 @@ class TestScoringIntegration:
         assert pred1.points == 20
         
         # User 2's team finished 2nd
-        assert pred2.points == 15
\ No newline at end of file
+        assert pred2.points == 15
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestStandingsTable:
+    """Test scoring against the normalized standings and points tables"""
+
+    def test_result_save_writes_standings(self, league, teams, league_result):
+        """Test that the six place columns are mirrored into standings"""
+        standings = list(
+            Standing.objects.filter(league=league).values_list("position", "team_id")
+        )
+        assert standings == [(i + 1, team.id) for i, team in enumerate(teams)]
+
+    def test_league_save_writes_position_points(self, league):
+        """Test that the six points columns are mirrored into the points table"""
+        league.third_place_points = 11
+        league.save()
+
+        points = dict(league.position_points.values_list("position", "points"))
+        assert points == {1: 20, 2: 15, 3: 11, 4: 7, 5: 5, 6: 3}
+
+    def test_points_beyond_sixth_place(self, user_profile, league, teams):
+        """Test that a league can award points below sixth without schema changes"""
+        seventh = Team.objects.create(name="Team G", league=league)
+        PositionPoints.objects.create(league=league, position=7, points=1)
+        Standing.objects.create(league=league, position=7, team=seventh)
+
+        prediction = Prediction.objects.create(
+            profile=user_profile,
+            league=league,
+            predicted_team=seventh,
+        )
+        LeagueResult.objects.create(
+            league=league,
+            first_place=teams[0],
+            second_place=teams[1],
+            third_place=teams[2],
+            fourth_place=teams[3],
+            fifth_place=teams[4],
+            sixth_place=teams[5],
+        )
+
+        prediction.refresh_from_db()
+        assert prediction.points == 1
+
+    def test_team_moving_into_top_six_replaces_lower_standing(
+        self, league, teams, league_result
+    ):
+        """Test that a team listed below sixth can be promoted into the top six"""
+        seventh = Team.objects.create(name="Team G", league=league)
+        Standing.objects.create(league=league, position=7, team=seventh)
+
+        league_result.sixth_place = seventh
+        league_result.save()
+
+        assert Standing.objects.get(league=league, team=seventh).position == 6
+        assert not Standing.objects.filter(league=league, position=7).exists()
+
+    def test_points_table_is_one_query(
+        self, multiple_predictions, league_result, django_assert_num_queries
+    ):
+        """Test that the whole points map is built from a single query"""
+        with django_assert_num_queries(1):
+            table = points_table(league_result)
+
+        assert [
+            table.get(prediction.predicted_team_id, 0)
+            for prediction in multiple_predictions
+        ] == [20, 15]
+
+    def test_points_table_refreshed_when_league_points_change(
+        self, prediction, league, league_result
+    ):
+        """Test that editing the league's points is seen by the next lookup"""
+        assert calculate_points(prediction, league_result) == 20
+
+        league.first_place_points = 25
+        league.save()
+
+        assert calculate_points(prediction, league_result) == 25
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestPointsConfigurationRescore:
+    """Test rescoring when a league's points table is edited"""
+
+    def test_changed_position_is_rescored(
+        self, multiple_predictions, league, league_result
+    ):
+        """Test that predictions on a repriced position pick up the new value"""
+        league.second_place_points = 18
+        league.save()
+
+        multiple_predictions[1].refresh_from_db()
+        assert multiple_predictions[1].points == 18
+
+    def test_unchanged_positions_are_not_touched(
+        self, multiple_predictions, league, league_result
+    ):
+        """Test that only teams whose position's value changed are updated"""
+        # Simulate drift on the first-place prediction; it must survive
+        Prediction.objects.filter(pk=multiple_predictions[0].pk).update(points=99)
+
+        league.second_place_points = 18
+        league.save()
+
+        multiple_predictions[0].refresh_from_db()
+        assert multiple_predictions[0].points == 99
+
+    def test_non_points_edit_does_not_rescore(
+        self, league, league_result, django_assert_num_queries
+    ):
+        """Test that renaming a league skips the rescore entirely"""
+        league.name = "Renamed League"
+        # SAVEPOINT, UPDATE league, SELECT points table, RELEASE
+        with django_assert_num_queries(4):
+            league.save()
+
+    def test_extra_position_row_edit_rescores(
+        self, user_profile, league, teams, league_result
+    ):
+        """Test that editing a points row beyond sixth rescores that position"""
+        seventh = Team.objects.create(name="Team G", league=league)
+        Standing.objects.create(league=league, position=7, team=seventh)
+        prediction = Prediction.objects.create(
+            profile=user_profile, league=league, predicted_team=seventh
+        )
+
+        PositionPoints.objects.create(league=league, position=7, points=2)
+
+        prediction.refresh_from_db()
+        assert prediction.points == 2
+
+    def test_extra_standing_rescores(self, user_profile, league, teams, league_result):
+        """Test that adding and removing a standing beyond sixth rescores its team"""
+        seventh = Team.objects.create(name="Team G", league=league)
+        PositionPoints.objects.create(league=league, position=7, points=2)
+        prediction = Prediction.objects.create(
+            profile=user_profile, league=league, predicted_team=seventh
+        )
+
+        standing = Standing.objects.create(league=league, position=7, team=seventh)
+        prediction.refresh_from_db()
+        assert prediction.points == 2
+
+        standing.delete()
+        prediction.refresh_from_db()
+        assert prediction.points == 0
+
+    def test_standing_team_change_rescores_both_teams(
+        self, user_profile, second_user, league, league_result
+    ):
+        """Test that moving a standing to another team rescores the old and new team"""
+        seventh = Team.objects.create(name="Team G", league=league)
+        eighth = Team.objects.create(name="Team H", league=league)
+        PositionPoints.objects.create(league=league, position=7, points=2)
+        standing = Standing.objects.create(league=league, position=7, team=seventh)
+        on_seventh = Prediction.objects.create(
+            profile=user_profile, league=league, predicted_team=seventh
+        )
+        on_eighth = Prediction.objects.create(
+            profile=second_user.profile, league=league, predicted_team=eighth
+        )
+        score_league(league.id)
+
+        standing = Standing.objects.get(pk=standing.pk)
+        standing.team = eighth
+        standing.save()
+
+        on_seventh.refresh_from_db()
+        on_eighth.refresh_from_db()
+        assert (on_seventh.points, on_eighth.points) == (0, 2)
+
+    def test_deleted_position_row_rescores(
+        self, user_profile, league, teams, league_result,
+        django_capture_on_commit_callbacks,
+    ):
+        """Test that deleting a points row zeroes predictions on that position"""
+        seventh = Team.objects.create(name="Team G", league=league)
+        Standing.objects.create(league=league, position=7, team=seventh)
+        prediction = Prediction.objects.create(
+            profile=user_profile, league=league, predicted_team=seventh
+        )
+        row = PositionPoints.objects.create(league=league, position=7, points=2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            row.delete()
+
+        prediction.refresh_from_db()
+        assert prediction.points == 0
+
+    def test_league_deletion_skips_rescore(
+        self, league, league_result, django_capture_on_commit_callbacks
+    ):
+        """Test that points rows cascading with their league are not rescored"""
+        with django_capture_on_commit_callbacks(execute=True):
+            league.delete()
+
+        assert not PositionPoints.objects.exists()
+
+
+@pytest.fixture
+def crowded_league(league, teams):
+    """A scored league with a few hundred predictions spread over its teams"""
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(email=f"crowd{i}@example.com") for i in range(300)
+    )
+    profiles = Profile.objects.bulk_create(Profile(user=user) for user in users)
+    Prediction.objects.bulk_create(
+        Prediction(
+            profile=profile,
+            league=league,
+            predicted_team=teams[i % len(teams)],
+            is_predicted=True,
+        )
+        for i, profile in enumerate(profiles)
+    )
+    result = LeagueResult.objects.create(
+        league=league,
+        **{field: teams[i] for i, field in enumerate(LeagueResult.PLACE_FIELDS)},
+    )
+    return result
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestResultDeletion:
+    """Test resetting points when a league result is deleted"""
+
+    def test_delete_resets_points_with_one_update(
+        self, crowded_league, league, django_capture_on_commit_callbacks
+    ):
+        """Test that every prediction is zeroed by a single UPDATE after commit"""
+        assert Prediction.objects.filter(league=league, points__gt=0).count() == 300
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            crowded_league.delete()
+
+        # Nothing is reset until the deletion commits
+        assert Prediction.objects.filter(league=league, points__gt=0).exists()
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "League_prediction"')
+        ]
+        assert len(updates) == 1
+        assert not Prediction.objects.filter(league=league, points__gt=0).exists()
+
+    def test_delete_clears_standings(
+        self, crowded_league, league, django_capture_on_commit_callbacks
+    ):
+        """Test that derived standings are removed with the result"""
+        with django_capture_on_commit_callbacks(execute=True):
+            crowded_league.delete()
+
+        assert not Standing.objects.filter(league=league).exists()
+
+    def test_reset_is_atomic(
+        self, crowded_league, league, django_capture_on_commit_callbacks
+    ):
+        """Test that a failed reset leaves the standings and points together"""
+        def fail(**kwargs):
+            raise RuntimeError("reset interrupted")
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            crowded_league.delete()
+
+        post_delete.connect(fail, sender=Standing)
+        try:
+            with pytest.raises(RuntimeError):
+                for callback in callbacks:
+                    callback()
+        finally:
+            post_delete.disconnect(fail, sender=Standing)
+
+        assert Standing.objects.filter(league=league).exists()
+        assert Prediction.objects.filter(league=league, points__gt=0).exists()
+
+    def test_replacement_result_is_not_reset(
+        self, crowded_league, league, teams, django_capture_on_commit_callbacks
+    ):
+        """Test that a result recreated in the same transaction keeps its points"""
+        with django_capture_on_commit_callbacks(execute=True):
+            crowded_league.delete()
+            LeagueResult.objects.create(
+                league=league,
+                **{field: teams[i] for i, field in enumerate(LeagueResult.PLACE_FIELDS)},
+            )
+
+        assert Prediction.objects.filter(league=league, points=20).exists()
+
+    def test_deleted_league_is_not_published(
+        self, crowded_league, league, django_capture_on_commit_callbacks
+    ):
+        """Test that deleting the whole league skips the reset and its publish"""
+        scope = league_scope(league.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            league.delete()
+
+        assert not LeaderboardPointer.objects.filter(scope=scope).exists()
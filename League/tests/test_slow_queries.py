@@ -0,0 +1,129 @@
+"""
+Tests for the slow-query log.
+"""
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from Elmosliga.slow_queries import install, log_to_file, normalize, read_entries
+from League.models import Prediction
+
+
+@pytest.fixture
+def slow_log(settings, tmp_path):
+    """Log every query, with its plan, to a scratch file; returns the path"""
+    settings.SLOW_QUERY_MS = 0.001
+    settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE = 1.0
+    settings.SLOW_QUERY_LOG_FILE = str(tmp_path / "slow.jsonl")
+    install()
+    yield settings.SLOW_QUERY_LOG_FILE
+    log_to_file(None)
+
+
+def entry(sql, duration, view=None, plan=None):
+    return {
+        "sql": sql,
+        "duration_ms": duration,
+        "view": view,
+        "stack": ["League/views.py:1 in get"],
+        "plan": plan,
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestSlowQueryLog:
+    """Test which queries are logged and what is captured"""
+
+    def test_view_query_logged_with_plan(self, slow_log, user, multiple_predictions):
+        """Test that a view's queries carry the SQL, view, stack and plan"""
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        client.get(reverse("prediction-list"))
+
+        entries = [e for e in read_entries(slow_log) if "league_prediction" in e["sql"].lower()]
+        assert entries
+        logged = entries[-1]
+        assert logged["view"] == "prediction-list"
+        assert logged["path"] == reverse("prediction-list")
+        assert logged["params"] is not None
+        assert logged["plan"] and not logged["plan"][0].startswith("EXPLAIN failed")
+        assert any("test_slow_queries.py" in frame for frame in logged["stack"])
+
+    def test_background_query_has_no_view(self, slow_log, prediction):
+        """Test that queries outside a request are logged without a view"""
+        Prediction.objects.filter(pk=prediction.pk).exists()
+
+        logged = list(read_entries(slow_log))[-1]
+        assert logged["view"] is None
+        assert logged["stack"][-1].startswith("League/tests/test_slow_queries.py")
+
+    def test_fast_queries_skipped(self, prediction, slow_log, settings):
+        """Test that queries under the threshold are not logged"""
+        settings.SLOW_QUERY_MS = 10_000
+
+        Prediction.objects.count()
+
+        assert list(read_entries(slow_log)) == []
+
+    def test_explain_sampled(self, slow_log, settings, prediction):
+        """Test that plans are only captured for the sampled fraction"""
+        settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE = 0.0
+
+        Prediction.objects.count()
+
+        assert list(read_entries(slow_log))[-1]["plan"] is None
+
+    def test_rotated_backups_read(self, settings, slow_log, prediction):
+        """Test that the log rotates and read_entries reads the backups too"""
+        settings.SLOW_QUERY_LOG_MAX_BYTES = 2000
+        settings.SLOW_QUERY_LOG_BACKUPS = 50
+        log_to_file(slow_log)
+
+        for _ in range(10):
+            Prediction.objects.count()
+
+        assert len(list(read_entries(slow_log))) >= 10
+        assert os.path.exists(f"{slow_log}.1")
+
+
+@pytest.mark.unit
+@pytest.mark.league
+class TestSlowQueriesCommand:
+    """Test the slow_queries report"""
+
+    def test_top_offenders_grouped(self, tmp_path):
+        """Test that query shapes are grouped and ranked by total time"""
+        path = tmp_path / "slow.jsonl"
+        entries = [
+            entry('SELECT * FROM "a" WHERE "id" IN (%s, %s)', 30, "league-list"),
+            entry('SELECT * FROM "a" WHERE "id" IN (%s)', 40, "league-list", ["SCAN a"]),
+            entry('SELECT * FROM "b"', 50),
+        ]
+        path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+        out = StringIO()
+
+        call_command("slow_queries", file=str(path), plans=True, stdout=out)
+
+        report = out.getvalue()
+        assert report.index('FROM "a"') < report.index('FROM "b"')
+        assert "2 run(s), 70.0ms total, 35.0ms mean, 40.0ms max" in report
+        assert "view league-list (2)" in report
+        assert "SCAN a" in report
+
+    def test_empty_log(self, tmp_path):
+        """Test that a missing log reports nothing to show"""
+        out = StringIO()
+
+        call_command("slow_queries", file=str(tmp_path / "none.jsonl"), stdout=out)
+
+        assert "No slow queries logged" in out.getvalue()
+
+    def test_in_lists_normalized(self):
+        """Test that IN lists of any length normalize to one shape"""
+        assert normalize("SELECT 1\n  WHERE x IN (%s, %s, %s)") == "SELECT 1 WHERE x IN (...)"
@@ -0,0 +1,130 @@
+"""
+Tests for the opt-in SQLite tuning profile.
+"""
+import threading
+import time
+
+import pytest
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.utils import OperationalError
+
+
+@pytest.fixture
+def file_database(settings, tmp_path, db):
+    """
+    Factory for connections to a scratch file database, registered per
+    thread as "scratch" so ``transaction.atomic(using="scratch")`` works.
+    """
+    path = tmp_path / "scratch.sqlite3"
+
+    def connect(tuning=True, timeout=5):
+        settings.SQLITE_TUNING = tuning
+        options = {"timeout": timeout}
+        if tuning:
+            options["transaction_mode"] = "IMMEDIATE"
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, "NAME": str(path), "OPTIONS": options},
+            alias="scratch",
+        )
+        connections["scratch"] = wrapper
+        wrapper.ensure_connection()
+        return wrapper
+
+    setup = connect(tuning=False)
+    with transaction.atomic(using="scratch"), setup.cursor() as cursor:
+        cursor.execute("CREATE TABLE score (id INTEGER PRIMARY KEY, points INTEGER, pad TEXT)")
+        cursor.executemany(
+            "INSERT INTO score (points, pad) VALUES (%s, %s)", [(0, "x" * 200)] * 20000
+        )
+    setup.close()
+    yield connect
+    del connections["scratch"]
+
+
+def in_thread(target):
+    """Run ``target`` on its own thread; returns the thread and its outcome"""
+    outcome = {}
+
+    def run():
+        started = time.perf_counter()
+        try:
+            outcome["result"] = target()
+        except OperationalError as exc:
+            outcome["result"] = exc
+        outcome["seconds"] = time.perf_counter() - started
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def rescore(writer):
+    """A rescoring UPDATE large enough to spill out of a small page cache"""
+    with writer.cursor() as cursor:
+        cursor.execute("PRAGMA cache_size = 10")
+        cursor.execute("UPDATE score SET points = points + 10")
+
+
+@pytest.mark.integration
+@pytest.mark.league
+class TestSqliteTuning:
+    """Test the pragmas and their effect on concurrent access"""
+
+    def test_pragmas_applied(self, file_database):
+        """Test that new connections get WAL, NORMAL sync and the busy timeout"""
+        wrapper = file_database()
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            assert cursor.fetchone()[0] == "wal"
+            cursor.execute("PRAGMA synchronous")
+            assert cursor.fetchone()[0] == 1
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 5000
+        wrapper.close()
+
+    @pytest.mark.parametrize("tuning", [True, False])
+    def test_readers_during_rescoring(self, file_database, tuning):
+        """Test that only the tuned profile lets readers through an open rescore"""
+        writer = file_database(tuning=tuning)
+
+        def read():
+            reader = file_database(tuning=tuning, timeout=0.2)
+            with reader.cursor() as cursor:
+                cursor.execute("SELECT SUM(points) FROM score")
+                total = cursor.fetchone()[0]
+            reader.close()
+            return total
+
+        with transaction.atomic(using="scratch"):
+            rescore(writer)
+            thread, outcome = in_thread(read)
+            thread.join()
+        writer.close()
+
+        if tuning:
+            assert outcome["result"] == 0
+        else:
+            assert "database is locked" in str(outcome["result"])
+
+    def test_concurrent_writer_waits_for_rescoring(self, file_database):
+        """Test that a prediction write waits for the rescore instead of failing"""
+        writer = file_database()
+
+        def write():
+            other = file_database()
+            with transaction.atomic(using="scratch"):
+                with other.cursor() as cursor:
+                    cursor.execute("UPDATE score SET points = 1 WHERE id = 1")
+            other.close()
+            return "written"
+
+        with transaction.atomic(using="scratch"):
+            rescore(writer)
+            thread, outcome = in_thread(write)
+            time.sleep(0.3)
+        thread.join()
+        writer.close()
+
+        assert outcome["result"] == "written"
+        assert outcome["seconds"] >= 0.2
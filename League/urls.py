@@ -1,23 +1,35 @@
+from django.conf import settings
 from django.urls import path
-from League import views
+from League import async_views, views
+
+# Read-heavy endpoints, sync or async per deployment
+reads = async_views if settings.LEAGUE_ASYNC_VIEWS else views
 
 urlpatterns = [
     # Leagues
-    path("leagues/", views.LeagueListView.as_view(), name="league-list"),
-    path("leagues/<int:league_id>/teams/", views.TeamListView.as_view(), name="team-list"),
+    path("leagues/", reads.LeagueListView.as_view(), name="league-list"),
+    path("leagues/<int:league_id>/teams/", reads.TeamListView.as_view(), name="team-list"),
+    path("leagues/<int:league_id>/picks/", views.PickDistributionView.as_view(), name="pick-distribution"),
     
     # Predictions
     path("prediction/", views.PredictionCreateUpdateView.as_view(), name="prediction-create"),
-    path("predictions/", views.PredictionListView.as_view(), name="prediction-list"),
-    path("predictions/check/<int:league_id>/", views.CheckPredictionView.as_view(), name="prediction-check"),
+    path("predictions/", reads.PredictionListView.as_view(), name="prediction-list"),
+    path("predictions/check/<int:league_id>/", reads.CheckPredictionView.as_view(), name="prediction-check"),
     
     # Results (Admin only)
     path("admin/results/", views.LeagueResultListView.as_view(), name="result-list"),
     path("admin/result/create/", views.LeagueResultCreateView.as_view(), name="result-create"),
+    path("admin/result/simulate/", views.WhatIfStandingsView.as_view(), name="result-simulate"),
     path("admin/result/<int:pk>/", views.LeagueResultUpdateView.as_view(), name="result-update"),
     path("admin/result/<int:pk>/delete/", views.LeagueResultDeleteView.as_view(), name="result-delete"),
+    path("admin/projection/probabilities/", views.ProbabilitySetCreateView.as_view(), name="probability-set-create"),
+    path("admin/reconcile/", views.PointsReconciliationView.as_view(), name="points-reconcile"),
     
     # Leaderboards
-    path("leaderboard/", views.LeaderboardView.as_view(), name="leaderboard-global"),
-    path("leaderboard/<int:league_id>/", views.LeagueLeaderboardView.as_view(), name="leaderboard-league"),
+    path("leaderboard/", reads.LeaderboardView.as_view(), name="leaderboard-global"),
+    path("leaderboard/changes/", views.LeaderboardChangesView.as_view(), name="leaderboard-changes"),
+    path("leaderboard/events/", views.LeaderboardEventsView.as_view(), name="leaderboard-events"),
+    path("leaderboard/movement/", views.RankMovementView.as_view(), name="leaderboard-movement"),
+    path("leaderboard/projection/", views.ProjectionLeaderboardView.as_view(), name="leaderboard-projection"),
+    path("leaderboard/<int:league_id>/", reads.LeagueLeaderboardView.as_view(), name="leaderboard-league"),
 ]
\ No newline at end of file
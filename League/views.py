@@ -1,4 +1,7 @@
-from rest_framework import generics, permissions
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import exceptions, generics, permissions
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework import status
 from .models import League, Team, Prediction, LeagueResult
@@ -7,15 +10,32 @@ from .serializers import (
     TeamSerializer,
     PredictionSerializer,
     LeagueResultSerializer,
+    WhatIfStandingsSerializer,
+    ProbabilitySetSerializer,
 )
-from django.db.models import Sum, F, Value
-from django.db.models.functions import Coalesce
-from accounts.models import Profile
+from League.authentication import aauthenticate
+from League.services.reconciliation import reconcile, repair_league
+from League.services.simulation import simulate_standings
+from League.services.projection import current_projection
+from League.services.popularity import pick_distribution
+from League.services.leaderboard import (
+    changes_since,
+    global_board,
+    global_columns,
+    league_board,
+    league_columns,
+    publish,
+)
+from League.services.history import rank_movement
+from League.services.events import event_stream
 from django.shortcuts import get_object_or_404
+from rest_framework.settings import api_settings
+from Elmosliga.renderers import ColumnarJSONRenderer
 
 
 class LeagueListView(generics.ListAPIView):
     """List all active leagues with their teams"""
+    read_from_replica = True
     queryset = League.objects.filter(is_active=True).prefetch_related("teams")
     serializer_class = LeagueSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -23,6 +43,7 @@ class LeagueListView(generics.ListAPIView):
 
 class TeamListView(generics.ListAPIView):
     """List teams for a specific league"""
+    read_from_replica = True
     serializer_class = TeamSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -31,8 +52,18 @@ class TeamListView(generics.ListAPIView):
         return Team.objects.filter(league_id=league_id)
 
 
+class PickDistributionView(generics.GenericAPIView):
+    """Share of players who picked each team in a league"""
+    read_from_replica = True
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, league_id, *args, **kwargs):
+        return Response(pick_distribution(league_id))
+
+
 class CheckPredictionView(generics.GenericAPIView):
     """Check if user has already predicted for a league"""
+    read_from_replica = True
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, league_id, *args, **kwargs):
@@ -112,6 +143,7 @@ class PredictionCreateUpdateView(generics.CreateAPIView, generics.UpdateAPIView)
 
 class PredictionListView(generics.ListAPIView):
     """List all predictions for the current user"""
+    read_from_replica = True
     serializer_class = PredictionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -129,7 +161,9 @@ class PredictionListView(generics.ListAPIView):
 
 class LeagueResultListView(generics.ListAPIView):
     """Admin only - List all league results"""
-    queryset = LeagueResult.objects.all().select_related('league')
+    queryset = LeagueResult.objects.all().select_related('league').prefetch_related(
+        'league__standings__team'
+    )
     serializer_class = LeagueResultSerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -159,59 +193,203 @@ class LeagueResultDeleteView(generics.DestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 
+class WhatIfStandingsView(generics.GenericAPIView):
+    """Admin only - Preview points for hypothetical standings before saving them"""
+    serializer_class = WhatIfStandingsSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        return Response(
+            simulate_standings(data["league"].id, data["team_ids"], top=data["top"])
+        )
+
+
+class PointsReconciliationView(generics.GenericAPIView):
+    """Admin only - Report (GET) or repair (POST) drifted prediction points"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            league_ids = self._league_ids(request)
+        except ValueError:
+            return self._invalid_leagues()
+        reports = reconcile(league_ids)
+        return Response([report for report in reports if report["mismatches"]])
+
+    def post(self, request, *args, **kwargs):
+        try:
+            batch_size = int(request.data.get("batch_size", 1000))
+        except (TypeError, ValueError):
+            batch_size = 0
+        if batch_size < 1:
+            return Response(
+                {"error": "batch_size must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            league_ids = self._league_ids(request)
+        except ValueError:
+            return self._invalid_leagues()
+        reports = reconcile(league_ids)
+        repaired = {
+            report["league"]: repair_league(report["league"], batch_size)
+            for report in reports
+            if report["mismatches"]
+        }
+        if repaired:
+            publish(list(repaired))
+        return Response({"repaired": repaired})
+
+    def _league_ids(self, request):
+        """None (every league) when ``leagues`` is absent; ValueError if malformed"""
+        leagues = request.query_params.get("leagues")
+        if leagues is None:
+            return None
+        league_ids = leagues.split(",")
+        if not all(league.isdigit() for league in league_ids):
+            raise ValueError(leagues)
+        return [int(league) for league in league_ids]
+
+    def _invalid_leagues(self):
+        return Response(
+            {"error": "leagues must be a comma-separated list of league ids"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class ProbabilitySetCreateView(generics.CreateAPIView):
+    """Admin only - Upload per-team finishing probabilities for projections"""
+    serializer_class = ProbabilitySetSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+
+class ProjectionPagination(LimitOffsetPagination):
+    default_limit = 100
+    max_limit = 1000
+
+
+class ProjectionLeaderboardView(generics.ListAPIView):
+    """Get every profile's projected final points and rank distribution"""
+    read_from_replica = True
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ProjectionPagination
+
+    def get(self, request, *args, **kwargs):
+        # Simulated by the project_scores command, never on a request
+        probability_set, projection = current_projection()
+        if probability_set is None:
+            return Response(
+                {"error": "No probability set has been uploaded yet."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if projection is None:
+            return Response(
+                {"error": "The projection is still being computed."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "60"},
+            )
+
+        response = self.get_paginated_response(self.paginate_queryset(projection))
+        response.data = {
+            "version": probability_set.pk,
+            "simulations": probability_set.simulations,
+            **response.data,
+        }
+        return response
+
+
 class LeaderboardView(generics.ListAPIView):
     """Get leaderboard showing all users ranked by total points"""
+    read_from_replica = True
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
 
     def get(self, request, *args, **kwargs):
-        leaderboard = (
-            Profile.objects.select_related("user")
-            .annotate(
-                total_points=Coalesce(Sum("predictions__points"), Value(0))
-            )
-            .order_by("-total_points")
-            .values(
-                "id",
-                "user__email",
-                "first_name",
-                "last_name",
-                "total_points",
-                "image",
+        # Served from the last published generation, never a half-scored one
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            return Response(global_columns())
+        return Response(global_board())
+
+
+class LeaderboardChangesView(generics.GenericAPIView):
+    """Get global entries changed since a client's leaderboard version"""
+    read_from_replica = True
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get("since")
+        try:
+            version = int(since) if since is not None else None
+        except ValueError:
+            return Response(
+                {"error": "since must be an integer version."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        return Response(changes_since(version))
+
+
+class LeaderboardEventsView(View):
+    """
+    Stream leaderboard rescoring events as Server-Sent Events.
+
+    Needs the ASGI application: each idle connection is a coroutine waiting
+    on an in-process queue.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user, profile_id = await aauthenticate(request)
+        except exceptions.AuthenticationFailed as exc:
+            return self.unauthorized(request, exc.detail)
+        if not user.is_authenticated:
+            return self.unauthorized(request, exceptions.NotAuthenticated.default_detail)
+
+        response = StreamingHttpResponse(
+            event_stream(profile_id), content_type="text/event-stream"
         )
-        
-        # Add rank
-        leaderboard_list = list(leaderboard)
-        for idx, entry in enumerate(leaderboard_list, start=1):
-            entry["rank"] = idx
-        
-        return Response(leaderboard_list)
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def unauthorized(request, detail):
+        # Shaped like DRF's own 401s, challenge included
+        if not isinstance(detail, dict):
+            detail = {"detail": detail}
+        response = JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = api_settings.DEFAULT_AUTHENTICATION_CLASSES[
+            0
+        ]().authenticate_header(request)
+        return response
+
+
+class RankMovementView(generics.GenericAPIView):
+    """Get the current user's rank change between the last two scoring runs"""
+    read_from_replica = True
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        profile = getattr(request.user, 'profile', None)
+        movement = rank_movement(profile.pk) if profile else None
+        if movement is None:
+            return Response(
+                {"error": "No ranking history yet."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(movement)
 
 
 class LeagueLeaderboardView(generics.ListAPIView):
     """Get leaderboard for a specific league"""
+    read_from_replica = True
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
 
     def get(self, request, league_id, *args, **kwargs):
-        predictions = (
-            Prediction.objects.filter(league_id=league_id)
-            .select_related(
-                "profile__user",
-                "predicted_team"
-            )
-            .order_by("-points")
-            .values(
-                "profile__id",
-                "profile__user__email",
-                "profile__first_name",
-                "profile__last_name",
-                "points",
-                "predicted_team__name",
-            )
-        )
-        
-        predictions_list = list(predictions)
-        for idx, entry in enumerate(predictions_list, start=1):
-            entry["rank"] = idx
-        
-        return Response(predictions_list)
\ No newline at end of file
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            return Response(league_columns(league_id))
+        return Response(league_board(league_id))
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.tokens import default_token_generator
 import logging
+from Elmosliga.metrics import EMAIL_QUEUE_DEPTH
 logger = logging.getLogger(__name__)
 
 class EmailThread(threading.Thread):
@@ -10,6 +11,10 @@ class EmailThread(threading.Thread):
         super().__init__(daemon=True)
         self.email_obj = email_obj
 
+    def start(self):
+        EMAIL_QUEUE_DEPTH.inc()
+        super().start()
+
     def run(self):
         try:
             logger.info(f"Attempting to send email to: {self.email_obj.to}")
@@ -18,3 +23,5 @@ class EmailThread(threading.Thread):
         except Exception as e:
             logger.error(f"Failed to send email: {str(e)}")
             logger.exception(e)
+        finally:
+            EMAIL_QUEUE_DEPTH.dec()
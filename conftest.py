@@ -4,13 +4,23 @@ Place this file in your project root directory.
 """
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 from accounts.models import Profile
 from League.models import League, Team, Prediction, LeagueResult
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached projections and replica pins must not leak between tests"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 # ============================================
 # User & Authentication Fixtures
 # ============================================
@@ -77,6 +87,18 @@ def authenticated_client(api_client, user):
     return api_client
 
 
+@pytest.fixture
+def bearer():
+    """
+    Return a function giving a user's Authorization header with a real JWT,
+    for code that reads the credential before DRF authenticates (middleware,
+    the async views)
+    """
+    def headers(user):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+    return headers
+
+
 @pytest.fixture
 def admin_client(api_client, admin_user):
     """Return an authenticated admin API client"""